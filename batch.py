@@ -0,0 +1,384 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from pathlib import Path
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import msgspec
+
+from dewarp.image import WarpedImage, optimise_stacked
+from main import add_config_arguments, get_next_result_directory, make_config, perform_ocr_many
+from ocr_engine import ENGINES, make_engine
+
+# 디렉토리 입력 시 처리할 이미지 확장자
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+# 목록 파일 확장자 (한 줄에 이미지 경로 하나)
+LIST_EXTENSIONS = {".txt", ".lst"}
+
+
+def collect_inputs(sources):
+    # 디렉토리, glob 패턴, 목록 파일, 단일 이미지 경로를 모두 받아 이미지 경로 목록으로 펼침
+    paths = []
+    for source in sources:
+        source_path = Path(source)
+        if source_path.is_dir():
+            paths.extend(
+                sorted(p for p in source_path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+            )
+        elif source_path.is_file() and source_path.suffix.lower() in LIST_EXTENSIONS:
+            with open(source_path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    # 목록 파일 안의 상대 경로는 목록 파일 위치 기준
+                    entry = Path(line)
+                    paths.append(entry if entry.is_absolute() else source_path.parent / entry)
+        elif source_path.is_file():
+            paths.append(source_path)
+        else:
+            paths.extend(sorted(Path(p) for p in glob.glob(source, recursive=True)))
+
+    # 중복 제거 (순서 유지)
+    unique = {}
+    for p in paths:
+        unique.setdefault(p.resolve(), None)
+    return list(unique)
+
+
+# 워커 프로세스마다 한 번 만들어 계속 재사용하는 OCR 엔진
+ocr_engine = None
+# 연속 페이지 모드(--warm-start)에서 이 워커가 마지막으로 처리한 페이지의 params
+#   워커가 하나일 때만 사용 (run_batch 참고): 여러 워커면 어느 페이지가 앞 페이지가 될지 스케줄링에 따라 달라짐
+previous_params = None
+
+
+def init_worker(engine_name="subprocess"):
+    global ocr_engine
+    # 프로세스 하나당 코어 하나를 쓰도록 OpenCV 내부 스레드를 끔 (코어 수에 선형으로 확장되도록)
+    cv2.setNumThreads(1)
+    ocr_engine = make_engine(engine_name)
+
+
+@contextmanager
+def working_directory(path):
+    # WarpedImage와 디버그 출력은 현재 디렉토리에 파일을 씀
+    original_cwd = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(original_cwd)
+
+
+def new_record(input_path, result_dir):
+    return {
+        "input": str(input_path),
+        "result_dir": str(result_dir),
+        "status": "failed",
+        "outfile": None,
+        "ocr_text": None,
+        "cached": False,
+        "optim_status": None,
+    }
+
+
+def finish_images(images, records, result_dirs):
+    # 디워핑이 끝난 이미지들을 OCR 하고 매니페스트 항목을 채움
+    #   OCR 은 perform_ocr_many 한 번으로 함께 (listfile 엔진이면 tesseract 실행 한 번)
+    for warped_img, record, result_dir in zip(images, records, result_dirs):
+        record["cached"] = warped_img.cache_hit
+        record["optim_status"] = warped_img.optim_status
+        if warped_img.outfile is not None:
+            record["outfile"] = str(result_dir / warped_img.outfile)
+    # 디워핑 결과는 메모리에서 바로 OCR 하고, PNG 저장(async)은 그동안 백그라운드에서 진행
+    ocr_results = perform_ocr_many(
+        [(warped_img.dewarped, result_dir, warped_img.cache, warped_img.cache_key) for warped_img, result_dir in zip(images, result_dirs)],
+        engine=ocr_engine,
+    )
+    for warped_img, record, result_dir, (ocr_text, _) in zip(images, records, result_dirs, ocr_results):
+        warped_img.wait_for_output()
+        if ocr_text is not None:
+            record["ocr_text"] = str(result_dir / "ocr_result.txt")
+            record["status"] = "ok"
+        else:
+            record["status"] = "ocr_failed"
+
+
+def finish_image(warped_img, record, result_dir):
+    finish_images([warped_img], [record], [result_dir])
+
+
+def process_image(input_path, result_dir, config):
+    # 워커 프로세스에서 이미지 한 장을 디워핑 + OCR 하고 매니페스트 항목을 반환
+    global previous_params
+    start = time.perf_counter()
+    record = new_record(input_path, result_dir)
+    try:
+        result_dir.mkdir(parents=True, exist_ok=True)
+        with working_directory(result_dir):
+            warm_start = previous_params if config.WARM_START else None
+            warped_img = WarpedImage(str(input_path), config=config, warm_start=warm_start)
+            if warped_img.written:
+                previous_params = warped_img.params
+                finish_image(warped_img, record, result_dir)
+            else:
+                record["status"] = "no_spans"
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["seconds"] = round(time.perf_counter() - start, 3)
+    return record
+
+
+def process_stack(items, config):
+    # 워커 프로세스에서 이미지 여러 장을 묶어 처리 (--stack)
+    #   장마다 키포인트를 찾고, 최적화는 모든 장을 한 번에 (optimise_stacked), 리매핑은 다시 장마다,
+    #   OCR 은 묶음 전체를 한 번에 (finish_images)
+    #   시간은 묶음 전체 시간을 장 수로 나눠 기록
+    start = time.perf_counter()
+    records = [new_record(input_path, result_dir) for input_path, result_dir in items]
+    images = [None] * len(items)
+    for i, (input_path, result_dir) in enumerate(items):
+        try:
+            result_dir.mkdir(parents=True, exist_ok=True)
+            with working_directory(result_dir):
+                # 결과 PNG 는 백그라운드 저장 중에 작업 디렉토리가 바뀌어도 되도록 절대 경로로
+                warped_img = WarpedImage(str(input_path), config=config, defer=True, output_dir=result_dir)
+                if warped_img.cache_hit or warped_img.find_keypoints():
+                    images[i] = warped_img
+                else:
+                    records[i]["status"] = "no_spans"
+        except Exception as e:
+            records[i]["error"] = f"{type(e).__name__}: {e}"
+
+    todo = [i for i, warped_img in enumerate(images) if warped_img is not None and not warped_img.cache_hit]
+    try:
+        optimise_stacked([images[i] for i in todo])
+    except Exception as e:
+        for i in todo:
+            records[i]["error"] = f"{type(e).__name__}: {e}"
+            images[i] = None
+
+    ready = []
+    for i, ((_, result_dir), warped_img) in enumerate(zip(items, images)):
+        if warped_img is None:
+            continue
+        try:
+            with working_directory(result_dir):
+                if not warped_img.cache_hit:
+                    warped_img.threshold(warped_img.page_dims, warped_img.params)
+                    warped_img.written = True
+            ready.append(i)
+        except Exception as e:
+            records[i]["error"] = f"{type(e).__name__}: {e}"
+    try:
+        finish_images([images[i] for i in ready], [records[i] for i in ready], [items[i][1] for i in ready])
+    except Exception as e:
+        for i in ready:
+            records[i]["error"] = f"{type(e).__name__}: {e}"
+    seconds = round((time.perf_counter() - start) / len(items), 3)
+    for record in records:
+        record["seconds"] = seconds
+    return records
+
+
+def make_run_dir(output, name):
+    output_dir = Path(output).resolve()
+    output_dir.mkdir(exist_ok=True, parents=True)
+    run_num = get_next_result_directory(output_dir=output_dir, output_name=name)
+    run_dir = output_dir / f"{name}{run_num}"
+    run_dir.mkdir(exist_ok=True)
+    return run_dir
+
+
+def write_manifest(run_dir, records, elapsed, **extra):
+    # 이미지별 결과와 전체 처리량을 manifest.json으로 저장
+    counts = {}
+    for record in records:
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    manifest = {
+        "run_dir": str(run_dir),
+        **extra,
+        "images": len(records),
+        "status_counts": counts,
+        "seconds": round(elapsed, 3),
+        "images_per_sec": round(len(records) / elapsed, 3) if elapsed > 0 else None,
+        "results": records,
+    }
+    manifest_path = run_dir / "manifest.json"
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"처리 완료: {len(records)}장 / {elapsed:.2f}초 ({manifest['images_per_sec']} images/sec)")
+    print(f"매니페스트: {manifest_path}")
+    return manifest
+
+
+def retry_config(config, factor):
+    # 예산 초과로 끝난 페이지를 다시 돌릴 때 쓸 설정: 시간/평가 횟수 예산을 factor 배로 늘림
+    return msgspec.structs.replace(
+        config,
+        OPTIM_MAX_SECONDS=config.OPTIM_MAX_SECONDS * factor,
+        OPTIM_MAX_EVALS=int(config.OPTIM_MAX_EVALS * factor),
+    )
+
+
+def make_pool(workers, engine_name):
+    return ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(engine_name,))
+
+
+def run_jobs(jobs, workers, engine_name, on_done):
+    # jobs: [(함수, 인자...), ...] 를 워커 풀에서 실행하고 하나가 끝날 때마다 on_done(번호, 결과, 예외) 호출
+    #   작업에서 난 예외는 그 작업의 실패로만 넘기고 나머지 작업은 계속 진행
+    #   한 번에 workers 개까지만 제출하므로, 워커가 죽어(메모리 부족 등) 풀이 깨지면(BrokenProcessPool)
+    #   그때 실행 중이던 작업만 함께 실패함 -> 풀을 새로 만들고 그 작업들을 하나씩 따로 다시 실행해
+    #   워커를 죽인 작업만 실패로 기록
+    pending = list(range(len(jobs)))[::-1]
+    suspects, crashed = [], set()
+    pool = make_pool(workers, engine_name)
+    try:
+        while pending or suspects:
+            source, limit = (suspects, 1) if suspects else (pending, workers)
+            running = {}
+            while source or running:
+                while source and len(running) < limit:
+                    j = source.pop()
+                    running[pool.submit(*jobs[j])] = j
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                if any(isinstance(future.exception(), BrokenProcessPool) for future in done):
+                    # 풀이 깨지면 실행 중이던 나머지 작업도 곧 끝남 (대부분 BrokenProcessPool)
+                    wait(running)
+                    done = list(running)
+                broken = []
+                for future in done:
+                    j = running.pop(future)
+                    error = future.exception()
+                    if isinstance(error, BrokenProcessPool):
+                        broken.append(j)
+                    else:
+                        on_done(j, None if error else future.result(), error)
+                if broken:
+                    for j in broken:
+                        if j in crashed:
+                            # 혼자 실행했는데도 풀이 깨짐: 이 작업이 워커를 죽인 것
+                            on_done(j, None, BrokenProcessPool("워커 프로세스가 비정상 종료됨"))
+                        else:
+                            crashed.add(j)
+                            suspects.append(j)
+                    pool.shutdown(wait=False)
+                    pool = make_pool(workers, engine_name)
+                    break
+    finally:
+        pool.shutdown()
+
+
+def failed_record(input_path, result_dir, error):
+    record = new_record(input_path, result_dir)
+    record["error"] = f"{type(error).__name__}: {error}"
+    record["seconds"] = None
+    return record
+
+
+def run_batch(sources, output="./output", name="batch", workers=None, ocr_engine="subprocess", retry_factor=0.0, stack=1, **opts):
+    inputs = collect_inputs(sources)
+    if not inputs:
+        print(f"처리할 이미지 없음: {sources}")
+        return None
+
+    run_dir = make_run_dir(output, name)
+
+    # 배치 모드는 화면 출력 없이 동작
+    opts.setdefault("debug", 0)
+    opts["debug_out"] = "file"
+    config = make_config(**opts)
+    workers = workers or os.cpu_count() or 1
+    if config.WARM_START and (workers > 1 or stack > 1):
+        # 워커가 여럿이면 워커마다 직전에 처리한 페이지가 입력 순서상 앞 페이지라는 보장이 없음
+        # (--stack 묶음 최적화는 연속 페이지 모드를 쓰지 않음)
+        print("연속 페이지 모드(--warm-start)는 워커 1개(-j 1)일 때만 사용, 이번 실행에서는 끔")
+        config = msgspec.structs.replace(config, WARM_START=False)
+
+    print(f"이미지 {len(inputs)}장, 워커 {workers}개 -> {run_dir}")
+    start = time.perf_counter()
+    records = [None] * len(inputs)
+    # 같은 파일명이 여러 디렉토리에 있을 수 있으므로 순번을 붙임
+    result_dirs = [run_dir / f"{i:05d}_{input_path.stem}" for i, input_path in enumerate(inputs)]
+    try:
+        if stack > 1:
+            # 연속된 stack 장씩 묶어서 워커 하나가 한 번의 최적화로 처리
+            groups = [list(range(first, min(first + stack, len(inputs)))) for first in range(0, len(inputs), stack)]
+            jobs = [(process_stack, [(inputs[i], result_dirs[i]) for i in indices], config) for indices in groups]
+        else:
+            groups = [[i] for i in range(len(inputs))]
+            jobs = [(process_image, inputs[i], result_dirs[i], config) for i in range(len(inputs))]
+        done = 0
+
+        def on_done(j, result, error):
+            nonlocal done
+            indices = groups[j]
+            if error is not None:
+                result = [failed_record(inputs[i], result_dirs[i], error) for i in indices]
+            elif stack == 1:
+                result = [result]
+            for i, record in zip(indices, result):
+                records[i] = record
+                done += 1
+                print(f"[{done}/{len(inputs)}] {records[i]['status']}: {inputs[i].name} ({records[i]['seconds']} sec)")
+
+        run_jobs(jobs, workers, ocr_engine, on_done)
+
+        # 예산 안에 수렴하지 못한 페이지는 모든 페이지가 끝난 뒤 늘린 예산으로 한 번 더 처리
+        retry = [i for i, record in enumerate(records) if record["optim_status"] == "budget-exhausted"]
+        if retry and retry_factor > 1:
+            print(f"예산 초과 {len(retry)}장을 예산 {retry_factor}배로 다시 처리")
+            bigger = retry_config(config, retry_factor)
+            jobs = [(process_image, inputs[i], Path(records[i]["result_dir"]), bigger) for i in retry]
+
+            def on_retried(j, record, error):
+                i = retry[j]
+                if error is not None:
+                    record = failed_record(inputs[i], result_dirs[i], error)
+                record["retried"] = True
+                record["seconds"] = round(records[i]["seconds"] + (record["seconds"] or 0), 3)
+                records[i] = record
+                print(f"[retry] {record['status']} ({record['optim_status']}): {inputs[i].name} ({record['seconds']} sec)")
+
+            run_jobs(jobs, workers, ocr_engine, on_retried)
+    finally:
+        # 중간에 멈추더라도 (Ctrl+C 등) 그때까지의 결과로 매니페스트를 남김
+        for i, record in enumerate(records):
+            if record is None:
+                records[i] = failed_record(inputs[i], result_dirs[i], RuntimeError("처리되지 않음"))
+        elapsed = time.perf_counter() - start
+        manifest = write_manifest(run_dir, records, elapsed, workers=workers, ocr_engine=ocr_engine)
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("inputs", nargs="+", help="inputs: 입력 디렉토리, glob 패턴 또는 목록 파일(.txt)")
+    parser.add_argument("--output", "-o", type=str, default="./output", help="output: 출력 디렉토리")
+    parser.add_argument("--name", "-n", type=str, default="batch", help="name: 배치 결과 폴더명 접두사")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="workers: 워커 프로세스 수 (기본값: CPU 코어 수)")
+    parser.add_argument("--ocr-engine", type=str, default="subprocess", choices=list(ENGINES), help="ocr_engine: OCR 엔진 (워커마다 한 번 생성해 재사용)")
+    parser.add_argument("--stack", type=int, default=1, help="stack: 워커마다 이미지를 이 장 수씩 묶어 최적화를 한 번에 수행 (작은 페이지가 많을 때 빠름, 예산/멀티 스타트/연속 페이지 옵션은 적용 안 됨)")
+    parser.add_argument("--retry-factor", type=float, default=0.0, help="retry_factor: 최적화 예산(--budget-seconds/--budget-evals)을 다 써서 끝난 페이지를 마지막에 예산을 이 배수로 늘려 한 번 더 처리 (1 이하면 재시도 안 함)")
+
+    add_config_arguments(parser)
+    # 배치 모드 기본값: 디버그 이미지 없음, 결과 PNG는 백그라운드 저장
+    parser.set_defaults(debug=0, write="async")
+    opt = parser.parse_args()
+    return opt
+
+
+if __name__ == "__main__":
+    opt = vars(parse_args())
+    manifest = run_batch(opt.pop("inputs"), **opt)
+    sys.exit(0 if manifest else 1)
@@ -0,0 +1,482 @@
+import io
+import os
+import sys
+import glob
+import time
+import argparse
+import subprocess
+import contextlib
+
+import cv2
+import numpy as np
+
+# 성능 측정 스크립트
+#   python benchmark.py ocr --pages 8 --engines subprocess,listfile,tesserocr
+#   python benchmark.py importtime --max-ms 300
+#   python benchmark.py optimise --methods powell,trf,lm
+#   python benchmark.py scaling --spans 10,25,50,100,200
+#   python benchmark.py projection --points 10,100,1000 --batch 64
+#   python benchmark.py pagedims
+#   python benchmark.py stacked --pages 64
+#   python benchmark.py spans --rows 10,25,50,100
+
+
+def load_pages(pattern, pages, max_side):
+    # 입력 이미지를 그레이스케일로 읽어 pages 장이 될 때까지 반복 사용
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise SystemExit(f"이미지 없음: {pattern}")
+    images = []
+    for path in paths:
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        scale = max_side / max(img.shape)
+        if scale < 1:
+            img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        images.append(img)
+    return [images[i % len(images)] for i in range(pages)]
+
+
+def bench_ocr(args):
+    from ocr_engine import make_engine
+
+    images = load_pages(args.images, args.pages, args.max_side)
+    print(f"OCR 엔진 벤치마크: {len(images)}페이지, lang={args.lang}")
+    print(f"{'engine':<12}{'setup(s)':>10}{'first(s)':>10}{'per page(s)':>13}{'total(s)':>10}")
+    for name in args.engines.split(","):
+        try:
+            start = time.perf_counter()
+            engine = make_engine(name, lang=args.lang, oem=args.oem, psm=args.psm)
+            setup = time.perf_counter() - start
+            with engine:
+                if name == "listfile":
+                    # 목록 파일 엔진은 모든 페이지를 프로세스 하나로 처리
+                    t0 = time.perf_counter()
+                    engine.recognise_many(images)
+                    total = time.perf_counter() - t0
+                    first = per_page = total / len(images)
+                else:
+                    times = []
+                    for image in images:
+                        t0 = time.perf_counter()
+                        engine.recognise(image)
+                        times.append(time.perf_counter() - t0)
+                    total = sum(times)
+                    first = times[0]
+                    per_page = sum(times[1:]) / max(len(times) - 1, 1)
+        except Exception as e:
+            print(f"{name:<12}실행 불가: {type(e).__name__}: {e}")
+            continue
+        print(f"{name:<12}{setup:>10.3f}{first:>10.3f}{per_page:>13.3f}{setup + total:>10.3f}")
+
+
+def measure_import(module):
+    # 새 인터프리터에서 python -X importtime 으로 모듈을 임포트하고 모듈별 누적 시간(ms)을 돌려줌
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"{module} 임포트 실패:\n{proc.stderr}")
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, total, name = line.split("|")
+        cumulative[name.strip()] = int(total) / 1000
+    return cumulative
+
+
+def bench_importtime(args):
+    # 시작 시간 회귀 검사: 누적 임포트 시간이 max_ms 를 넘거나
+    # 지연 임포트해야 할 무거운 모듈이 시작 시점에 임포트되면 실패(종료 코드 1)
+    forbidden = [name for name in args.forbid.split(",") if name]
+    failed = False
+    print(f"임포트 시간 검사: {args.repeat}회 중 최솟값, 기준 {args.max_ms:.0f}ms")
+    for module in args.modules.split(","):
+        runs = [measure_import(module) for _ in range(args.repeat)]
+        total = min(run[module] for run in runs)
+        loaded = sorted(name for name in runs[0] if name.split(".")[0] in forbidden and "." not in name)
+        ok = total <= args.max_ms and not loaded
+        failed |= not ok
+        print(f"  {module:<16}{total:>9.1f}ms  {'ok' if ok else 'FAIL'}")
+        if loaded:
+            print(f"    시작 시점에 임포트됨: {', '.join(loaded)}")
+        if args.top:
+            slowest = sorted(runs[0].items(), key=lambda item: item[1], reverse=True)[1 : args.top + 1]
+            for name, ms in slowest:
+                print(f"    {ms:>9.1f}ms  {name}")
+    return 1 if failed else 0
+
+
+def prepare_keypoints(paths):
+    # 이미지마다 스팬/키포인트 검출까지만 한 번 수행 (최적화 입력 준비)
+    from dewarp.image import WarpedImage
+    from dewarp.options.core import Config
+
+    config = Config(DEBUG_LEVEL=0, OUTPUT_WRITE="none")
+    pages = []
+    for path in paths:
+        with contextlib.redirect_stdout(io.StringIO()):
+            warped = WarpedImage(path, config=config, defer=True)
+            found = warped.find_keypoints()
+        if found:
+            pages.append(warped)
+        else:
+            print(f"{os.path.basename(path)}: 스팬 없음, 건너뜀")
+    return pages
+
+
+def bench_optimise(args):
+    # 같은 키포인트/초기값에서 최적화 방법(과 coarse 단계)별 시간과 최종 목적함수 값을 비교
+    #   목적함수가 더 낮아도 자세가 퇴화한 해(페이지가 카메라 쪽으로 줄어듦)일 수 있으므로
+    #   페이지 크기와 타당성(WarpedImage.optimise 가 다른 방법으로 다시 최적화하는 조건)을 함께 출력
+    from dewarp.image import solve_page_dims
+    from dewarp.keypoints import make_keypoint_index, project_keypoints
+    from dewarp.optimise import optimise_params, plausible_pose
+
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        raise SystemExit(f"이미지 없음: {args.images}")
+    pages = prepare_keypoints(paths)
+    # "trf" 또는 "trf/4" (스팬당 4점 coarse 단계 후 전체)
+    runs = [(method, coarse) for method in args.methods.split(",") for coarse in (int(c) for c in args.coarse.split(","))]
+    labels = [method if not coarse else f"{method}/{coarse}" for method, coarse in runs]
+    print(f"{'image':<12}{'params':>8}{'method':>9}{'time(s)':>10}{'objective':>14}{'page dims':>14}{'plausible':>11}")
+    totals = {label: 0.0 for label in labels}
+    for page in pages:
+        keypoint_index = make_keypoint_index(page.span_counts)
+        for label, (method, coarse) in zip(labels, runs):
+            times = []
+            for _ in range(args.repeat):
+                log = io.StringIO()
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(log):
+                    params = optimise_params(page.stem, page.small, page.dstpoints, page.span_counts, page.params.copy(), 0, method=method, coarse_points=coarse).params
+                times.append(time.perf_counter() - t0)
+            objective = float(np.sum((page.dstpoints - project_keypoints(params, keypoint_index)) ** 2))
+            with contextlib.redirect_stdout(io.StringIO()):
+                dims = solve_page_dims(page.corners, page.rough_dims, params, max_ratio=np.inf)
+                plausible = solve_page_dims(page.corners, page.rough_dims, params) is not None and plausible_pose(params, page.params)
+            dims_text = "failed" if dims is None else f"{dims[0]:.2f}x{dims[1]:.2f}"
+            totals[label] += min(times)
+            print(f"{page.basename:<12}{len(page.params):>8}{label:>9}{min(times):>10.3f}{objective:>14.6g}{dims_text:>14}{'yes' if plausible else 'no':>11}")
+            if args.verbose:
+                # 단계별 시간/목적함수 (optimise_params 로그)
+                print("".join(line for line in log.getvalue().splitlines(True) if "took" in line or "objective" in line), end="")
+    print("합계: " + ", ".join(f"{label} {total:.2f}s" for label, total in totals.items()))
+
+
+def synthetic_page(nspans, per_span, seed=0):
+    # 알려진 페이지 모델에서 만든 가상 키포인트 (스팬 수에 따른 최적화 시간 측정용)
+    from dewarp.keypoints import make_keypoint_index, project_keypoints
+
+    rng = np.random.default_rng(seed)
+    span_counts = [per_span] * nspans
+    ycoords = np.linspace(0.05, 1.35, nspans)
+    xcoords = rng.uniform(0.0, 1.0, nspans * per_span)
+    truth = np.hstack(([0.05, -0.1, 0.02, -0.5, -0.7, 1.3, 0.1, -0.05], ycoords, xcoords))
+    dstpoints = project_keypoints(truth, make_keypoint_index(span_counts))
+    dstpoints += rng.normal(0.0, 1e-3, dstpoints.shape)
+    # 초기값: 자세는 조금 틀리고 곡률은 0, 좌표에는 잡음
+    params = truth + np.hstack((rng.normal(0.0, 0.02, 6), -truth[6:8], rng.normal(0.0, 0.01, nspans + len(xcoords))))
+    return span_counts, dstpoints, params
+
+
+def bench_scaling(args):
+    # 스팬 수를 늘려 가며 키포인트 수에 대한 최적화 시간 증가 추세를 확인
+    from dewarp.keypoints import make_keypoint_index, project_keypoints_jacobian
+    from dewarp.optimise import optimise_params
+
+    methods = args.methods.split(",")
+    print(f"{'spans':>6}{'points':>8}{'params':>8}{'jac(ms)':>9}" + "".join(f"{method + '(s)':>11}" for method in methods))
+    for nspans in (int(n) for n in args.spans.split(",")):
+        span_counts, dstpoints, params = synthetic_page(nspans, args.points)
+        keypoint_index = make_keypoint_index(span_counts)
+        project_keypoints_jacobian(params, keypoint_index)  # scipy.sparse 임포트 제외
+        t0 = time.perf_counter()
+        for _ in range(10):
+            project_keypoints_jacobian(params, keypoint_index)
+        jac_ms = (time.perf_counter() - t0) * 100
+        row = f"{nspans:>6}{len(dstpoints):>8}{len(params):>8}{jac_ms:>9.2f}"
+        for method in methods:
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                optimise_params("scaling", None, dstpoints, span_counts, params.copy(), 0, method=method)
+            row += f"{time.perf_counter() - t0:>11.3f}"
+        print(row)
+
+
+def project_xy_opencv(xy_coords, pvec):
+    # 이전 project_xy 구현 (cv2.projectPoints), 비교 기준
+    from dewarp.options.core import cfg
+    from dewarp.options.k_opt import K
+
+    alpha, beta = tuple(pvec[slice(*cfg.CUBIC_IDX)])
+    poly = np.array([alpha + beta, -2 * alpha - beta, alpha, 0])
+    xy_coords = xy_coords.reshape((-1, 2))
+    z_coords = np.polyval(poly, xy_coords[:, 0])
+    objpoints = np.hstack((xy_coords, z_coords.reshape((-1, 1))))
+    image_points, _ = cv2.projectPoints(objpoints, pvec[slice(*cfg.RVEC_IDX)], pvec[slice(*cfg.TVEC_IDX)], K(cfg=cfg), np.zeros(5))
+    return image_points
+
+
+def time_call(func, repeat):
+    # 호출 한 번의 최소 시간 (마이크로초)
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1e6
+
+
+def bench_projection(args):
+    # cv2.projectPoints 기반 이전 구현과 NumPy 투영(단일/배치)의 호출당 시간과 결과 차이 비교
+    from dewarp.projection import project_xy, project_xy_batch
+
+    rng = np.random.default_rng(0)
+    batch = args.batch
+    print(f"{'points':>8}{'opencv(us)':>12}{'numpy(us)':>11}{f'batch/{batch}(us)':>16}{'max diff':>11}")
+    for npts in (int(n) for n in args.points.split(",")):
+        xy_coords = rng.uniform(0.0, 1.0, (npts, 2))
+        pvecs = np.hstack((rng.normal(0.0, 0.2, (batch, 3)), np.tile([-0.5, -0.7, 1.3], (batch, 1)) + rng.normal(0.0, 0.05, (batch, 3)), rng.normal(0.0, 0.1, (batch, 2))))
+        out = np.empty((batch, npts, 2))
+        expected = np.stack([project_xy_opencv(xy_coords, pvec).reshape((-1, 2)) for pvec in pvecs])
+        diff = max(
+            np.abs(project_xy_batch(xy_coords, pvecs) - expected).max(),
+            max(np.abs(project_xy(xy_coords, pvec).reshape((-1, 2)) - e).max() for pvec, e in zip(pvecs, expected)),
+        )
+        opencv = time_call(lambda: project_xy_opencv(xy_coords, pvecs[0]), args.repeat)
+        single = time_call(lambda: project_xy(xy_coords, pvecs[0]), args.repeat)
+        batched = time_call(lambda: project_xy_batch(xy_coords, pvecs, out=out), args.repeat) / batch
+        print(f"{npts:>8}{opencv:>12.1f}{single:>11.1f}{batched:>16.1f}{diff:>11.1e}")
+        if diff > 1e-9:
+            print("결과 불일치")
+            return 1
+    return 0
+
+
+def page_dims_powell(corners, rough_dims, params):
+    # 이전 get_page_dims 구현 (scipy Powell), 비교 기준
+    from scipy.optimize import minimize
+
+    from dewarp.projection import project_xy
+
+    dst_br = corners[2].flatten()
+
+    def objective(dims):
+        return np.sum((dst_br - project_xy(dims, params).flatten()) ** 2)
+
+    return minimize(objective, np.array(rough_dims), method="Powell").x
+
+
+def bench_pagedims(args):
+    # 최적화된 params 에서 페이지 크기 계산: 이전 Powell 구현 대비 Newton 풀이 시간과 결과 차이
+    from dewarp.image import get_page_dims
+    from dewarp.optimise import optimise_params
+
+    paths = sorted(glob.glob(args.images))
+    if not paths:
+        raise SystemExit(f"이미지 없음: {args.images}")
+    print(f"{'image':<12}{'powell(ms)':>12}{'newton(ms)':>12}{'width':>10}{'height':>10}{'diff':>10}")
+    for page in prepare_keypoints(paths):
+        with contextlib.redirect_stdout(io.StringIO()):
+            params = optimise_params(page.stem, page.small, page.dstpoints, page.span_counts, page.params, 0, method="trf").params
+            expected = page_dims_powell(page.corners, page.rough_dims, params)
+            dims = get_page_dims(page.corners, page.rough_dims, params)
+        powell = time_call(lambda: page_dims_powell(page.corners, page.rough_dims, params), args.repeat) / 1000
+        with contextlib.redirect_stdout(io.StringIO()):
+            newton = time_call(lambda: get_page_dims(page.corners, page.rough_dims, params), args.repeat) / 1000
+        diff = float(np.abs(dims - expected).max())
+        print(f"{page.basename:<12}{powell:>12.3f}{newton:>12.3f}{dims[0]:>10.4f}{dims[1]:>10.4f}{diff:>10.1e}")
+
+
+def bench_stacked(args):
+    # 작은 가상 페이지(영수증) 여러 장: 장마다 optimise_params 대 optimise_params_stacked 한 번
+    from dewarp.optimise import optimise_params, optimise_params_stacked
+
+    pages = [synthetic_page(args.spans, args.points, seed) for seed in range(args.pages)]
+    problems = [(dstpoints, span_counts, params) for span_counts, dstpoints, params in pages]
+    print(f"{'method':>10}{'time(s)':>10}{'pages/s':>10}{'objective':>14}")
+    solo = []
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for dstpoints, span_counts, params in problems:
+            solo.append(optimise_params("stacked", None, dstpoints, span_counts, params.copy(), 0, method=args.method))
+    elapsed = time.perf_counter() - t0
+    print(f"{args.method:>10}{elapsed:>10.3f}{len(pages) / elapsed:>10.1f}{sum(r.objective for r in solo):>14.6g}")
+    times = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        stacked = optimise_params_stacked(problems)
+        times.append(time.perf_counter() - t0)
+    elapsed = min(times)
+    print(f"{'stacked':>10}{elapsed:>10.3f}{len(pages) / elapsed:>10.1f}{sum(r.objective for r in stacked):>14.6g}")
+    # 페이지별 목적함수가 단독 풀이와 얼마나 다른지 (음수면 stacked 쪽이 더 낮음)
+    diffs = [(b.objective - a.objective) / a.objective for a, b in zip(solo, stacked)]
+    statuses = [r.status for r in stacked]
+    print(f"목적함수 상대 차이: 최대 {max(diffs):.2e}, 최소 {min(diffs):.2e}")
+    print("상태: " + ", ".join(f"{status} {statuses.count(status)}" for status in sorted(set(statuses))))
+
+
+def synthetic_glyph_mask(rows, per_row, seed=0):
+    # 줄마다 per_row 개의 글자 덩어리(가로로 긴 사각형)를 살짝 휘어지게 그린 가상 텍스트 마스크
+    rng = np.random.default_rng(seed)
+    width, height = per_row * 40 + 40, rows * 20 + 40
+    mask = np.zeros((height, width), dtype=np.uint8)
+    for row in range(rows):
+        x = 20
+        for _ in range(per_row):
+            w = int(rng.integers(18, 32))
+            y = int(20 + row * 20 + 4 * np.sin(np.pi * x / width))
+            cv2.rectangle(mask, (x, y), (x + w - 1, y + int(rng.integers(3, 7))), 255, -1)
+            x += w + int(rng.integers(4, 12))
+    return mask
+
+
+def angle_dist_loop(angle_b, angle_a):
+    diff = angle_b - angle_a
+    while diff > np.pi:
+        diff -= 2 * np.pi
+    while diff < -np.pi:
+        diff += 2 * np.pi
+    return np.abs(diff)
+
+
+def assemble_spans_all_pairs(contours):
+    # 이전 구현 (결과 비교용): 모든 윤곽선 쌍을 점수 매겨 점수 순으로 잇고, 머리부터 따라가며 스팬을 만듦
+    from dewarp.options import cfg
+
+    cinfo_list = sorted(contours, key=lambda cinfo: cinfo.rect[1])
+    edges = []
+    for i, cinfo_i in enumerate(cinfo_list):
+        for j in range(i):
+            a, b = cinfo_i, cinfo_list[j]
+            if a.point0[0] > b.point1[0]:
+                a, b = b, a
+            x_overlap = max(a.local_overlap(b), b.local_overlap(a))
+            overall_tangent = b.center - a.center
+            overall_angle = np.arctan2(overall_tangent[1], overall_tangent[0])
+            delta_angle = np.divide(max(angle_dist_loop(a.angle, overall_angle), angle_dist_loop(b.angle, overall_angle)) * 180, np.pi)
+            dist = np.linalg.norm(b.point0 - a.point1)
+            if not (dist > cfg.EDGE_MAX_LENGTH or x_overlap > cfg.EDGE_MAX_OVERLAP or delta_angle > cfg.EDGE_MAX_ANGLE):
+                edges.append((dist + delta_angle * cfg.EDGE_ANGLE_COST, a.index, b.index))
+    edges.sort(key=lambda e: e[0])
+    succ, pred = {}, {}
+    for _, a, b in edges:
+        if a not in succ and b not in pred:
+            succ[a], pred[b] = b, a
+    spans = []
+    remaining = [cinfo.index for cinfo in cinfo_list]
+    while remaining:
+        k = remaining[0]
+        while k in pred:
+            k = pred[k]
+        span, width = [], 0.0
+        while k is not None:
+            remaining.remove(k)
+            span.append(k)
+            width += contours.local_xrngs[k][1] - contours.local_xrngs[k][0]
+            k = succ.get(k)
+        if width > cfg.SPAN_MIN_WIDTH:
+            spans.append(span)
+    return spans
+
+
+def bench_spans(args):
+    # 가상 텍스트 페이지: 글자 덩어리 수에 따른 윤곽선 추출/스팬 조립/샘플링 시간, 이전 (모든 쌍) 구현과 결과 비교
+    from dewarp.contours import get_contours
+    from dewarp.spans import assemble_spans, sample_spans
+
+    print(f"{'blobs':>7}{'contours(ms)':>14}{'spans(ms)':>11}{'sample(ms)':>12}{'all pairs(ms)':>15}{'spans':>7}{'same':>6}")
+    for rows in (int(n) for n in args.rows.split(",")):
+        mask = synthetic_glyph_mask(rows, args.per_row)
+        small = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
+        pagemask = np.full_like(mask, 255)
+        contours = get_contours("bench", small, mask)
+        contour_ms = time_call(lambda: get_contours("bench", small, mask), args.repeat) / 1000
+        spans = assemble_spans("bench", small, pagemask, contours)
+        span_ms = time_call(lambda: assemble_spans("bench", small, pagemask, contours), args.repeat) / 1000
+        sample_ms = time_call(lambda: sample_spans(mask.shape, spans), args.repeat) / 1000
+        if len(contours) <= args.max_pairs_blobs:
+            t0 = time.perf_counter()
+            expected = assemble_spans_all_pairs(contours)
+            pairs_ms = f"{(time.perf_counter() - t0) * 1000:.1f}"
+            same = str([[cinfo.index for cinfo in span] for span in spans] == expected)
+        else:
+            pairs_ms = same = "-"
+        print(f"{len(contours):>7}{contour_ms:>14.2f}{span_ms:>11.2f}{sample_ms:>12.2f}{pairs_ms:>15}{len(spans):>7}{same:>6}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ocr = commands.add_parser("ocr", help="OCR 엔진별 페이지당 지연 시간 비교")
+    ocr.add_argument("--images", type=str, default="./input/*.jpg", help="입력 이미지 glob 패턴")
+    ocr.add_argument("--pages", type=int, default=8, help="측정할 페이지 수")
+    ocr.add_argument("--max-side", type=int, default=1600, help="페이지 이미지의 최대 변 길이 (픽셀)")
+    ocr.add_argument("--engines", type=str, default="subprocess,listfile,tesserocr", help="쉼표로 구분한 엔진 이름")
+    ocr.add_argument("--lang", type=str, default="kor+eng")
+    ocr.add_argument("--oem", type=int, default=2)
+    ocr.add_argument("--psm", type=int, default=6)
+    ocr.set_defaults(func=bench_ocr)
+
+    importtime = commands.add_parser("importtime", help="python -X importtime 으로 시작(임포트) 시간 회귀 검사")
+    importtime.add_argument("--modules", type=str, default="main,dewarp.image,batch,pipeline,service", help="쉼표로 구분한 검사할 모듈")
+    importtime.add_argument("--max-ms", type=float, default=300, help="모듈별 누적 임포트 시간 상한 (밀리초)")
+    importtime.add_argument("--forbid", type=str, default="scipy,PIL,pytesseract", help="시작 시점에 임포트되면 안 되는 패키지")
+    importtime.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    importtime.add_argument("--top", type=int, default=0, help="가장 느린 모듈 N개 출력")
+    importtime.set_defaults(func=bench_importtime)
+
+    optimise = commands.add_parser("optimise", help="optimise_params 최적화 방법별 시간/최종 목적함수 비교")
+    optimise.add_argument("--images", type=str, default="./input/test*.jpg", help="입력 이미지 glob 패턴")
+    optimise.add_argument("--methods", type=str, default="powell,trf,lm", help="쉼표로 구분한 방법 (powell, trf, lm)")
+    optimise.add_argument("--coarse", type=str, default="0", help="쉼표로 구분한 coarse 단계의 스팬당 키포인트 수 (0=한 번에 전체)")
+    optimise.add_argument("--repeat", type=int, default=1, help="반복 횟수 (최솟값 사용)")
+    optimise.add_argument("--verbose", "-v", action="store_true", help="단계별 시간/목적함수 로그 출력")
+    optimise.set_defaults(func=bench_optimise)
+
+    scaling = commands.add_parser("scaling", help="가상 페이지의 스팬 수에 따른 최적화 시간 (희소 야코비안 확인)")
+    scaling.add_argument("--spans", type=str, default="10,25,50,100,200", help="쉼표로 구분한 스팬 수")
+    scaling.add_argument("--points", type=int, default=25, help="스팬당 키포인트 수")
+    scaling.add_argument("--methods", type=str, default="trf", help="쉼표로 구분한 방법 (powell, trf, lm)")
+    scaling.set_defaults(func=bench_scaling)
+
+    projection = commands.add_parser("projection", help="project_xy: cv2.projectPoints 이전 구현 대비 NumPy 투영 시간/결과 비교")
+    projection.add_argument("--points", type=str, default="10,100,1000,10000,100000", help="쉼표로 구분한 점 개수")
+    projection.add_argument("--batch", type=int, default=64, help="배치 투영 시 한 번에 넘길 매개변수 벡터 수")
+    projection.add_argument("--repeat", type=int, default=200, help="반복 횟수 (최솟값 사용)")
+    projection.set_defaults(func=bench_projection)
+
+    pagedims = commands.add_parser("pagedims", help="get_page_dims: 이전 Powell 구현 대비 Newton 풀이 시간/결과 비교")
+    pagedims.add_argument("--images", type=str, default="./input/test*.jpg", help="입력 이미지 glob 패턴")
+    pagedims.add_argument("--repeat", type=int, default=20, help="반복 횟수 (최솟값 사용)")
+    pagedims.set_defaults(func=bench_pagedims)
+
+    stacked = commands.add_parser("stacked", help="작은 가상 페이지 여러 장: 장별 optimise_params 대비 한 번에 쌓아 푸는 optimise_params_stacked")
+    stacked.add_argument("--pages", type=int, default=64, help="페이지 수")
+    stacked.add_argument("--spans", type=int, default=6, help="페이지당 스팬 수")
+    stacked.add_argument("--points", type=int, default=8, help="스팬당 키포인트 수")
+    stacked.add_argument("--method", type=str, default="trf", help="장별 풀이에 쓸 방법 (powell, trf, lm, varpro)")
+    stacked.add_argument("--repeat", type=int, default=3, help="반복 횟수 (최솟값 사용)")
+    stacked.set_defaults(func=bench_stacked)
+
+    spans = commands.add_parser("spans", help="가상 텍스트 페이지의 글자 덩어리 수에 따른 윤곽선 추출/스팬 조립/샘플링 시간")
+    spans.add_argument("--rows", type=str, default="10,25,50,100", help="쉼표로 구분한 텍스트 줄 수")
+    spans.add_argument("--per-row", type=int, default=40, help="줄마다 글자 덩어리 수")
+    spans.add_argument("--max-pairs-blobs", type=int, default=1500, help="이전 (모든 쌍) 구현으로 비교할 최대 윤곽선 수")
+    spans.add_argument("--repeat", type=int, default=5, help="반복 횟수 (최솟값 사용)")
+    spans.set_defaults(func=bench_spans)
+
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    sys.exit(args.func(args))
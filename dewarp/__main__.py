@@ -37,9 +37,12 @@ def main():
     outfiles = []
     print(f"Parsed config: {config}")
 
+    previous_params = None  # sequence mode: seeds the next page's optimisation
     for imgfile in parser.input_images:
-        processed_img = WarpedImage(imgfile, config=config)
+        warm_start = previous_params if config.WARM_START else None
+        processed_img = WarpedImage(imgfile, config=config, warm_start=warm_start)
         if processed_img.written:
+            previous_params = processed_img.params
             outfiles.append(processed_img.outfile)
             print(f"  wrote {processed_img.outfile}", end="\n\n")
 
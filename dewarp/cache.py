@@ -0,0 +1,321 @@
+"""Content-addressed on-disk cache of dewarping (and OCR) results.
+
+This module provides:
+- A function (`config_fingerprint`) that serializes the `Config` fields which affect
+  the dewarped output, so that a changed option never returns a stale result.
+- A function (`cache_key`) that hashes the image bytes together with that fingerprint.
+- A `ResultCache` class that stores, per key, the optimised params, page dims, the
+  dewarped page and any OCR results, evicting least recently used entries once the
+  cache grows beyond `Config.CACHE_MAX_MB`. Its total size is scanned once per
+  process and then tracked as entries are written, so the directory is only walked
+  again when the limit is exceeded.
+
+Each entry is a directory `<root>/<key[:2]>/<key>/` holding `meta.json`,
+`dewarped.png` and one `ocr_<engine key>.json` per OCR engine setup. Entries are
+written to a temporary directory and renamed into place, so several processes can
+share one cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import msgspec
+import numpy as np
+from cv2 import IMREAD_UNCHANGED, imread, imwrite
+
+from dewarp.options.core import Config, cfg
+
+
+#__all__ = ["config_fingerprint", "cache_key", "ResultCache"]
+
+# Bump when the stored layout or the meaning of a cached result changes
+CACHE_VERSION = 1
+
+# Options that do not change the params, page dims or dewarped pixels
+IGNORED_FIELDS = frozenset(
+    {
+        "CACHE_DIR",
+        "CACHE_MAX_MB",
+        "CONVERT_TO_PDF",
+        "DEBUG_LEVEL",
+        "DEBUG_OUTPUT",
+        "OPTIM_MAX_EVALS",  # budget-limited results are never stored
+        "OPTIM_MAX_SECONDS",
+        "OPTIM_START_WORKERS",
+        "OUTPUT_DPI",
+        "OUTPUT_WRITE",
+    },
+)
+
+
+def config_fingerprint(config: Config) -> bytes:
+    """Serialize the result-affecting fields of `config` (and the global `cfg`).
+
+    The contour, span and projection stages read the module-level `cfg` rather than
+    the `Config` passed to `WarpedImage`, so both are part of the fingerprint.
+
+    Args:
+        config: The `Config` passed to `WarpedImage`.
+
+    Returns:
+        A canonical JSON encoding of the relevant fields.
+
+    """
+    fields = [
+        {k: v for k, v in msgspec.structs.asdict(c).items() if k not in IGNORED_FIELDS}
+        for c in (config, cfg)
+    ]
+    return msgspec.json.encode([CACHE_VERSION, *fields])
+
+
+def cache_key(image: bytes | np.ndarray, config: Config) -> str:
+    """Return the hex SHA-256 of the image content and the config fingerprint.
+
+    Args:
+        image: The encoded image file bytes, or an already decoded image array.
+        config: The `Config` the image will be processed with.
+
+    Returns:
+        A 64-character hexadecimal key.
+
+    """
+    digest = hashlib.sha256()
+    if isinstance(image, np.ndarray):
+        digest.update(f"array:{image.dtype}:{image.shape}".encode())
+        digest.update(np.ascontiguousarray(image).data)
+    else:
+        digest.update(b"file:")
+        digest.update(image)
+    digest.update(config_fingerprint(config))
+    return digest.hexdigest()
+
+
+class CacheEntry(msgspec.Struct):
+    """A cached dewarping result."""
+
+    params: np.ndarray
+    page_dims: np.ndarray
+    dewarped: np.ndarray
+
+
+class ResultCache:
+    """An LRU, size-bounded directory of dewarping results keyed by `cache_key`.
+
+    The total size is an estimate: it is scanned on the first write of this
+    instance, then grown by what this instance writes. Only when it exceeds
+    `max_bytes` is the directory scanned again (picking up what other processes
+    wrote) and the least recently used entries evicted.
+    """
+
+    # Instances returned by `from_config`, one per (directory, size limit)
+    opened: dict[tuple[str, int], ResultCache] = {}
+
+    def __init__(self, root: str | Path, max_mb: float = 512.0) -> None:
+        """Open (creating if needed) the cache directory.
+
+        Args:
+            root: Directory holding the cache entries.
+            max_mb: Total size above which the least recently used entries are evicted.
+
+        """
+        self.root = Path(root)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.total_bytes: int | None = None  # not scanned yet
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: Config) -> ResultCache | None:
+        """Return the cache configured by `CACHE_DIR`, or None if caching is disabled.
+
+        Every `WarpedImage` of a process with the same settings shares one instance,
+        so the size scan is not repeated per image.
+        """
+        if not config.CACHE_DIR:
+            return None
+        key = (str(Path(config.CACHE_DIR).resolve()), int(config.CACHE_MAX_MB * 1024 * 1024))
+        if key not in cls.opened:
+            cls.opened[key] = cls(config.CACHE_DIR, config.CACHE_MAX_MB)
+        return cls.opened[key]
+
+    def entry_dir(self, key: str) -> Path:
+        """Return the directory of the entry for `key` (which may not exist)."""
+        return self.root / key[:2] / key
+
+    def touch(self, entry: Path) -> None:
+        """Mark an entry as recently used (its `meta.json` mtime is the LRU clock)."""
+        try:
+            os.utime(entry / "meta.json")
+        except FileNotFoundError:
+            pass
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Load the dewarping result stored under `key`.
+
+        Returns:
+            The cached entry, or None on a miss (or an entry evicted mid-read).
+
+        """
+        entry = self.entry_dir(key)
+        try:
+            meta = json.loads((entry / "meta.json").read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        dewarped = imread(str(entry / "dewarped.png"), IMREAD_UNCHANGED)
+        if dewarped is None:
+            return None
+        self.touch(entry)
+        return CacheEntry(
+            params=np.array(meta["params"], dtype=float),
+            page_dims=np.array(meta["page_dims"], dtype=float),
+            dewarped=dewarped,
+        )
+
+    def put(
+        self,
+        key: str,
+        params: np.ndarray,
+        page_dims: np.ndarray,
+        dewarped: np.ndarray,
+    ) -> None:
+        """Store a dewarping result under `key`, evicting if the size limit is exceeded.
+
+        Args:
+            key: The `cache_key` of the source image and config.
+            params: The optimised parameter vector.
+            page_dims: The final page dimensions.
+            dewarped: The dewarped (thresholded) page.
+
+        """
+        entry = self.entry_dir(key)
+        if entry.exists():
+            self.touch(entry)
+            return
+        entry.parent.mkdir(exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(prefix=".tmp-", dir=self.root))
+        try:
+            imwrite(str(tmp / "dewarped.png"), dewarped)
+            meta = {
+                "params": np.asarray(params, dtype=float).tolist(),
+                "page_dims": np.asarray(page_dims, dtype=float).tolist(),
+                "created": time.time(),
+            }
+            (tmp / "meta.json").write_text(json.dumps(meta))
+            written = sum(f.stat().st_size for f in tmp.iterdir())
+            os.rename(tmp, entry)
+        except OSError:
+            # Another process stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+        self.grow(written)
+
+    def get_ocr(self, key: str, ocr_key: str) -> tuple[dict, str, bytes] | None:
+        """Load the OCR result for entry `key` made with the engine setup `ocr_key`.
+
+        Returns:
+            `(data, text, hocr)` as returned by `OCREngine.recognise`, or None.
+
+        """
+        path = self.entry_dir(key) / f"ocr_{self.hash_ocr_key(ocr_key)}.json"
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        return stored["data"], stored["text"], stored["hocr"].encode("utf-8")
+
+    def put_ocr(self, key: str, ocr_key: str, data: dict, text: str, hocr: bytes) -> None:
+        """Store an OCR result alongside an existing entry (no-op if it was evicted)."""
+        entry = self.entry_dir(key)
+        if not entry.is_dir():
+            return
+        stored = {"ocr_key": ocr_key, "data": data, "text": text, "hocr": hocr.decode("utf-8")}
+        path = entry / f"ocr_{self.hash_ocr_key(ocr_key)}.json"
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        try:
+            with tempfile.NamedTemporaryFile(
+                "w",
+                encoding="utf-8",
+                dir=entry,
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                json.dump(stored, f, ensure_ascii=False)
+            written = os.stat(f.name).st_size
+            os.replace(f.name, path)
+        except OSError:
+            return
+        self.grow(written - replaced)
+
+    @staticmethod
+    def hash_ocr_key(ocr_key: str) -> str:
+        """Shorten an OCR engine description to a file-name-safe hash."""
+        return hashlib.sha256(ocr_key.encode("utf-8")).hexdigest()[:16]
+
+    def entries(self) -> list[tuple[float, int, Path]]:
+        """List `(last used, size in bytes, directory)` for every complete entry."""
+        found = []
+        for entry in self.root.glob("??/*"):
+            try:
+                last_used = (entry / "meta.json").stat().st_mtime
+                size = sum(f.stat().st_size for f in entry.iterdir())
+            except FileNotFoundError:
+                continue  # incomplete or concurrently evicted
+            found.append((last_used, size, entry))
+        return found
+
+    def size(self) -> int:
+        """Return the total size of all entries in bytes."""
+        return sum(size for _, size, _ in self.entries())
+
+    def grow(self, nbytes: int) -> None:
+        """Add `nbytes` just written to the tracked size, evicting if it is exceeded.
+
+        The first call scans the directory for the current size (`size`).
+        """
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self.size()
+            else:
+                self.total_bytes += nbytes
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used entries until the cache fits in `max_bytes`.
+
+        Scans every entry, and resets the tracked size to the scanned total.
+
+        Returns:
+            The number of entries removed.
+
+        """
+        with self.lock:
+            entries = sorted(self.entries(), key=lambda e: e[0])
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, entry in entries:
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                removed += 1
+            self.total_bytes = total
+            return removed
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        with self.lock:
+            for _, _, entry in self.entries():
+                shutil.rmtree(entry, ignore_errors=True)
+            self.total_bytes = 0
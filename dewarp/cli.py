@@ -168,7 +168,23 @@ class ArgParser(argparse.ArgumentParser):
         self.add_default_argument(["-z", "--output-zoom"])
         self.add_default_argument(["-dpi", "--output-dpi"])
         self.add_default_argument(["-nb", "--no-binary"], "NO_BINARY")
+        self.add_default_argument(
+            ["-w", "--output-write"],
+            choices=["sync", "async", "none"],
+        )
         self.add_default_argument(["-s", "--shrink"], "REMAP_DECIMATE")
+        self.add_default_argument(
+            ["-om", "--optim-method"],
+            choices=["powell", "trf", "lm", "varpro"],
+        )
+        self.add_default_argument(["-oc", "--optim-coarse-points"])
+        self.add_default_argument(["-oe", "--optim-max-evals"])
+        self.add_default_argument(["-ot", "--optim-max-seconds"])
+        self.add_default_argument(["-os", "--optim-starts"])
+        self.add_default_argument(["-ow", "--optim-start-workers"])
+        self.add_default_argument(["-ws", "--warm-start"])
+        self.add_default_argument(["-cd", "--cache-dir"])
+        self.add_default_argument(["-cm", "--cache-max-mb"])
 
     def __init__(self):
         """Initialize the ArgParser, then parse and store CLI parameters."""
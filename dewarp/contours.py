@@ -2,28 +2,33 @@
 
 This module provides functions to:
 - Find external contours in a binary mask,
-- Calculate centroid and orientation for each contour (via SVD on central moments),
+- Calculate centroid and orientation for all contours at once (via the eigenvectors
+  of their central moments),
+- Label the blobs they enclose in one pass, measuring each blob's columns,
 - Filter contours by size and shape,
-- Construct minimal masks,
+- Hold the results as columns of a `ContourTable` (with `ContourInfo` row views),
 - And visualize the resulting contours for debugging.
 
 """
 
 from __future__ import annotations
 
+from collections.abc import Iterator
+
 import numpy as np
 from cv2 import (
+    BORDER_CONSTANT,
     CHAIN_APPROX_NONE,
     LINE_AA,
     RETR_EXTERNAL,
-    SVDecomp,
-    boundingRect,
     circle,
+    connectedComponentsWithStats,
+    copyMakeBorder,
     drawContours,
     findContours,
+    floodFill,
     line,
 )
-from cv2 import moments as cv2_moments
 
 from dewarp.debug_utils.colours import cCOLOURS
 from dewarp.debug_utils.viewer import debug_show
@@ -33,54 +38,176 @@ from dewarp.snoopy import snoop
 
 
 # __all__ = [
-#     "blob_mean_and_tangent",
+#     "concatenate_contours",
+#     "select_ranges",
+#     "fill_holes",
+#     "label_columns",
+#     "blob_means_and_tangents",
 #     "interval_measure_overlap",
+#     "ContourTable",
 #     "ContourInfo",
-#     "make_tight_mask",
 #     "get_contours",
 #     "visualize_contours",
 # ]
 
 
-@snoop()
-def blob_mean_and_tangent(contour: np.ndarray) -> tuple[np.ndarray, np.ndarray] | None:
-    """Compute the centroid and principal orientation of a contour.
+def concatenate_contours(contours: list[np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+    """Stack the points of several contours into one array.
+
+    Args:
+        contours: Contours as returned by `cv2.findContours`, each of shape (k, 1, 2).
+
+    Returns:
+        A tuple `(points, starts)` where `points` is an (N, 2) int32 array of all the
+        contour points and `starts` holds the `len(contours) + 1` offsets at which
+        each contour begins (the last being N), so contour `i` is
+        `points[starts[i]:starts[i + 1]]`.
+
+    """
+    lengths = [len(contour) for contour in contours]
+    starts = np.zeros(len(contours) + 1, dtype=np.intp)
+    np.cumsum(lengths, out=starts[1:])
+    if not contours:
+        return np.zeros((0, 2), dtype=np.int32), starts
+    return np.concatenate(contours).reshape(-1, 2), starts
+
 
-    Constructs the blob image's covariance matrix from second-order central moments
-    by dividing them by the 0th-order 'area moment' to make them translation-invariant.
-    The eigenvectors of the covariance matrix provide the blob's principal axes,
-    from which we extract a 2D orientation vector (`tangent`) and a centroid (`center`).
+def select_ranges(starts: np.ndarray, rows: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Gather some of the consecutive ranges of a concatenated array.
 
     Args:
-        contour: A single contour (numpy array) representing the boundary of a shape.
+        starts: The offsets of each range (the last being the array's length), as
+            from `concatenate_contours`.
+        rows: The indices of the ranges to gather, in the order wanted.
 
     Returns:
-        A tuple `(center, tangent)` where:
-            - `center` is (x, y) for the contour's centroid,
-            - `tangent` is the principal orientation as a unit vector.
-        Returns `None` if the contour area is zero.
+        A tuple `(index, new_starts)` where `index` picks the elements of the
+        gathered ranges out of the concatenated array and `new_starts` holds the
+        offsets of the ranges in the result.
 
     """
-    moments = cv2_moments(contour)
-    area = moments["m00"]
-    if area:
-        mean_x = moments["m10"] / area
-        mean_y = moments["m01"] / area
-        covariance_matrix = np.divide(
-            [[moments["mu20"], moments["mu11"]], [moments["mu11"], moments["mu02"]]],
-            area,
-        )
-        _, svd_u, _ = SVDecomp(covariance_matrix)
-        center = np.array([mean_x, mean_y])
-        tangent = svd_u[:, 0].flatten().copy()
-        if cfg.DEBUG_LEVEL > 2:
+    lengths = np.diff(starts)[rows]
+    new_starts = np.zeros(len(rows) + 1, dtype=np.intp)
+    np.cumsum(lengths, out=new_starts[1:])
+    index = np.arange(new_starts[-1]) + np.repeat(starts[rows] - new_starts[:-1], lengths)
+    return index, new_starts
+
+
+def fill_holes(mask: np.ndarray) -> np.ndarray:
+    """Fill the holes in the blobs of a binary mask.
+
+    Holes are the (4-connected) background regions that do not reach the edge of
+    the mask. Filling them makes each (8-connected) blob cover the same pixels as
+    its external contour drawn filled.
+
+    Args:
+        mask: A 2D uint8 binary mask.
+
+    Returns:
+        A copy of the mask with its holes set to 255.
+
+    """
+    # Flood the background from a 1px border, which touches every edge region
+    flooded = copyMakeBorder(mask, 1, 1, 1, 1, BORDER_CONSTANT, value=0)
+    floodFill(flooded, None, (0, 0), 255)
+    return np.where(flooded[1:-1, 1:-1] == 0, np.uint8(255), mask)
+
+
+def label_columns(
+    labels: np.ndarray,
+    stats: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Count the pixels in, and sum the y-offsets of, every column of every blob.
+
+    Args:
+        labels: The label image from `cv2.connectedComponentsWithStats`.
+        stats: The per-label stats `(left, top, width, height, area)` from the same.
+
+    Returns:
+        A tuple `(counts, ysums, starts)` of concatenated per-column values: label
+        `i` covers columns `starts[i]:starts[i + 1]` (one per column of its
+        bounding box, none for the background label 0), `counts` holds the number
+        of the label's pixels in each column, and `ysums` the sum of their y
+        coordinates relative to the top of the bounding box.
+
+    """
+    widths = stats[:, 2].astype(np.intp)
+    widths[0] = 0
+    starts = np.zeros(len(stats) + 1, dtype=np.intp)
+    np.cumsum(widths, out=starts[1:])
+    pixels = np.flatnonzero(labels)
+    ys, xs = np.divmod(pixels, labels.shape[1])
+    pixel_labels = labels.ravel()[pixels]
+    columns = starts[pixel_labels] + xs - stats[pixel_labels, 0]
+    counts = np.bincount(columns, minlength=starts[-1])
+    ysums = np.bincount(columns, weights=ys - stats[pixel_labels, 1], minlength=starts[-1])
+    return counts, ysums, starts
+
+
+@snoop()
+def blob_means_and_tangents(
+    points: np.ndarray,
+    starts: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compute the area, centroid and principal orientation of many contours at once.
+
+    The moments of each contour polygon are summed over its edges with Green's
+    theorem, as `cv2.moments` does, in a single pass over the concatenated points.
+    Dividing the second-order central moments by the 0th-order 'area moment' gives
+    each blob's (translation-invariant) covariance matrix, whose leading eigenvector
+    is the blob's principal axis (`tangent`). The eigenvectors are taken in closed
+    form and signed like those of `cv2.SVDecomp`, i.e. with their larger component
+    positive.
+
+    Args:
+        points: The (N, 2) contour points from `concatenate_contours`.
+        starts: The contour offsets from `concatenate_contours`.
+
+    Returns:
+        A tuple `(areas, centers, tangents)` of arrays with one row per contour:
+            - `areas` is the contour's area (0 where `cv2.moments` is all-zero),
+            - `centers` is (x, y) for the contour's centroid,
+            - `tangents` is the principal orientation as a unit vector.
+        The centroid and orientation of zero-area contours are not meaningful.
+
+    """
+    heads = starts[:-1]
+    x = points[:, 0].astype(np.float64)
+    y = points[:, 1].astype(np.float64)
+    # Each point's predecessor along its (closed) contour
+    prev = np.arange(-1, len(points) - 1)
+    prev[heads] = starts[1:] - 1
+    x_prev, y_prev = x[prev], y[prev]
+    cross = x_prev * y - x * y_prev
+    x_sum, y_sum = x_prev + x, y_prev + y
+    terms = np.stack(
+        [
+            cross,
+            cross * x_sum,
+            cross * y_sum,
+            cross * (x_prev * x_sum + x * x),
+            cross * (x_prev * (y_sum + y_prev) + x * (y_sum + y)),
+            cross * (y_prev * y_sum + y * y),
+        ],
+    )
+    a00, a10, a01, a20, a11, a02 = np.add.reduceat(terms, heads, axis=1)
+    # `cv2.moments` returns all-zero moments for (near) zero-area contours
+    sign = np.where(np.abs(a00) > np.finfo(np.float32).eps, np.sign(a00), 0.0)
+    areas = a00 * sign / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        centers = np.column_stack([a10 * sign / 6, a01 * sign / 6]) / areas[:, None]
+        mu20 = a20 * sign / 12 - a10 * sign / 6 * centers[:, 0]
+        mu11 = a11 * sign / 24 - a10 * sign / 6 * centers[:, 1]
+        mu02 = a02 * sign / 12 - a01 * sign / 6 * centers[:, 1]
+        cov_xx, cov_xy, cov_yy = mu20 / areas, mu11 / areas, mu02 / areas
+    half_angles = np.arctan2(2 * cov_xy, cov_xx - cov_yy) / 2
+    tangents = np.column_stack([np.cos(half_angles), np.sin(half_angles)])
+    dominant = np.abs(tangents).argmax(axis=1)
+    tangents *= np.sign(tangents[np.arange(len(tangents)), dominant])[:, None]
+    if cfg.DEBUG_LEVEL > 2:
+        for center, tangent in zip(centers[areas > 0], tangents[areas > 0]):
             print(f"Got contour with {center=} {tangent=}")
-        return center, tangent
-    else:
-        # Sometimes `cv2.moments()` returns all-zero moments. Prevent ZeroDivisionError:
-        if cfg.DEBUG_LEVEL > 0:
-            print("Discarding contour with zero moments")
-        return None
+    return areas, centers, tangents
 
 
 def interval_measure_overlap(
@@ -103,47 +230,157 @@ def interval_measure_overlap(
     return min(int_a[1], int_b[1]) - max(int_a[0], int_b[0])
 
 
-class ContourInfo:
-    """Holds geometric and orientation data about a single contour."""
+class ContourTable:
+    """Holds geometric and orientation data about a set of contours, as columns.
+
+    Row `i` describes one contour; `table[i]` gives a `ContourInfo` view of it.
+    """
 
     def __init__(
         self,
-        contour: np.ndarray,
-        moments: tuple[np.ndarray, np.ndarray],
-        rect: tuple[int, int, int, int],
-        mask: np.ndarray,
+        points: np.ndarray,
+        starts: np.ndarray,
+        centers: np.ndarray,
+        tangents: np.ndarray,
+        rects: np.ndarray,
+        column_counts: np.ndarray,
+        column_ysums: np.ndarray,
+        column_starts: np.ndarray,
     ) -> None:
-        """Initialize a contour's geometry, orientation, bounding rect, and mask.
+        """Initialize the table's columns and derive the local extent of each contour.
+
+        Args:
+            points: The (N, 2) points of all the contours, concatenated.
+            starts: The `n + 1` offsets of each contour's points in `points`.
+            centers: An (n, 2) array of contour centroids.
+            tangents: An (n, 2) array of unit principal axes.
+            rects: An (n, 4) array of bounding rectangles `(xmin, ymin, width, height)`.
+            column_counts: The number of pixels in each column of each contour's
+                rect that the (filled) contour covers, concatenated.
+            column_ysums: The sum of the y-offsets (from the top of the rect) of
+                those pixels, concatenated likewise.
+            column_starts: The `n + 1` offsets of each contour's columns in
+                `column_counts` and `column_ysums`.
+
+        """
+        self.points = points
+        self.starts = starts
+        self.centers = centers
+        self.tangents = tangents
+        self.rects = rects
+        self.column_counts = column_counts
+        self.column_ysums = column_ysums
+        self.column_starts = column_starts
+        self.angles = np.arctan2(tangents[:, 1], tangents[:, 0])
+
+        # Project each point onto the local tangent axis of its contour.
+        rows = np.repeat(np.arange(len(self)), np.diff(starts))
+        clx = ((points - centers[rows]) * tangents[rows]).sum(axis=1)
+        if len(self):
+            lxmin = np.minimum.reduceat(clx, starts[:-1])
+            lxmax = np.maximum.reduceat(clx, starts[:-1])
+        else:
+            lxmin = lxmax = np.zeros(0)
+        self.local_xrngs = np.column_stack([lxmin, lxmax])
+        self.points0 = centers + tangents * lxmin[:, None]
+        self.points1 = centers + tangents * lxmax[:, None]
+
+    def __len__(self) -> int:
+        """Return the number of contours in the table."""
+        return len(self.centers)
+
+    def __getitem__(self, index: int) -> ContourInfo:
+        """Return a `ContourInfo` view of one row of the table."""
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"contour index {index} out of range")
+        return ContourInfo(self, index % len(self))
+
+    def __iter__(self) -> Iterator[ContourInfo]:
+        """Iterate over `ContourInfo` views of every row of the table."""
+        return (ContourInfo(self, index) for index in range(len(self)))
+
+    def __repr__(self) -> str:
+        """Return a string representation of the ContourTable object."""
+        return f"ContourTable: {len(self)} contours, {len(self.points)} points"
+
+    def contour(self, index: int) -> np.ndarray:
+        """Return the raw (k, 1, 2) points of one contour."""
+        return self.points[self.starts[index] : self.starts[index + 1]].reshape(-1, 1, 2)
+
+    def column_means(self, index: int) -> np.ndarray:
+        """Return the mean y-offset of one contour's pixels in each column of its rect."""
+        columns = slice(self.column_starts[index], self.column_starts[index + 1])
+        return np.divide(self.column_ysums[columns], self.column_counts[columns])
+
+
+class ContourInfo:
+    """A lightweight view of one contour (a row of a `ContourTable`)."""
+
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: ContourTable, index: int) -> None:
+        """Initialize a view of row `index` of `table`.
 
         Args:
-            contour: The raw points making up the contour (numpy array).
-            moments: A tuple `(center, tangent)` from `blob_mean_and_tangent`.
-            rect: A bounding rectangle `(xmin, ymin, width, height)`.
-            mask: A binary mask of just this contour, cropped to `rect`.
+            table: The ContourTable holding the contour's data.
+            index: The row of the contour in the table.
 
         """
-        self.contour = contour
-        self.rect = rect
-        self.mask = mask
-        self.center, self.tangent = moments
-        self.angle = np.arctan2(self.tangent[1], self.tangent[0])
-
-        # Project each point onto the local tangent axis.
-        clx = [self.proj_x(point) for point in self.contour]
-        lxmin, lxmax = min(clx), max(clx)
-        self.local_xrng = (lxmin, lxmax)
-        self.point0 = self.center + self.tangent * lxmin
-        self.point1 = self.center + self.tangent * lxmax
-        self.pred = None
-        self.succ = None
+        self.table = table
+        self.index = index
 
     def __repr__(self) -> str:
         """Return a string representation of the ContourInfo object."""
         return (
-            f"ContourInfo: contour={self.contour}, rect={self.rect}, mask={self.mask}, "
+            f"ContourInfo: index={self.index}, rect={self.rect}, "
             f"center={self.center}, tangent={self.tangent}, angle={self.angle}"
         )
 
+    @property
+    def contour(self) -> np.ndarray:
+        """The raw points making up the contour."""
+        return self.table.contour(self.index)
+
+    @property
+    def rect(self) -> tuple[int, int, int, int]:
+        """The bounding rectangle `(xmin, ymin, width, height)`."""
+        return tuple(self.table.rects[self.index].tolist())
+
+    @property
+    def column_means(self) -> np.ndarray:
+        """The mean y-offset (from the top of `rect`) of each column of the contour."""
+        return self.table.column_means(self.index)
+
+    @property
+    def center(self) -> np.ndarray:
+        """The contour's centroid (x, y)."""
+        return self.table.centers[self.index]
+
+    @property
+    def tangent(self) -> np.ndarray:
+        """The contour's principal orientation, as a unit vector."""
+        return self.table.tangents[self.index]
+
+    @property
+    def angle(self) -> float:
+        """The angle of `tangent` (radians)."""
+        return self.table.angles[self.index]
+
+    @property
+    def local_xrng(self) -> tuple[float, float]:
+        """The extent of the contour along its tangent axis, relative to `center`."""
+        return tuple(self.table.local_xrngs[self.index])
+
+    @property
+    def point0(self) -> np.ndarray:
+        """The contour's leftmost point along its tangent axis."""
+        return self.table.points0[self.index]
+
+    @property
+    def point1(self) -> np.ndarray:
+        """The contour's rightmost point along its tangent axis."""
+        return self.table.points1[self.index]
+
     def proj_x(self, point: np.ndarray) -> float:
         """Compute the scalar projection of a point onto this contour's tangent axis.
 
@@ -166,44 +403,14 @@ class ContourInfo:
         return interval_measure_overlap(self.local_xrng, (xmin, xmax))
 
 
-def make_tight_mask(
-    contour: np.ndarray,
-    xmin: int,
-    ymin: int,
-    width: int,
-    height: int,
-) -> np.ndarray:
-    """Create a minimal binary mask for a contour.
-
-    The mask is cropped to the bounding rectangle `(xmin, ymin, width, height)`.
-    The contour is shifted so it fits in the top-left corner of the mask.
-
-    Args:
-        contour: The raw contour points (numpy array).
-        xmin: X coordinate of the bounding rect's top-left corner.
-        ymin: Y coordinate of the bounding rect's top-left corner.
-        width: Width of the bounding rectangle.
-        height: Height of the bounding rectangle.
-
-    Returns:
-        A 2D uint8 mask with the same shape as the bounding rectangle,
-        filled in for the region covered by `contour`.
-
-    """
-    import numpy as np
-
-    tight_mask = np.zeros((height, width), dtype=np.uint8)
-    tight_contour = contour - np.array((xmin, ymin)).reshape((-1, 1, 2))
-    drawContours(tight_mask, [tight_contour], contourIdx=0, color=1, thickness=-1)
-    return tight_mask
-
+def get_contours(name: str, small: np.ndarray, mask: np.ndarray) -> ContourTable:
+    """Detect and filter contours in a binary mask, returning them as a ContourTable.
 
-def get_contours(name: str, small: np.ndarray, mask: np.ndarray) -> list[ContourInfo]:
-    """Detect and filter contours in a binary mask, returning their ContourInfo objects.
-
-    This function finds external contours, filters them by size/aspect,
-    computes the centroid/orientation, and wraps everything in `ContourInfo`.
-    If DEBUG_LEVEL >= 2, it visualizes the resulting contours.
+    This function finds external contours and labels the blobs they enclose in a
+    single pass, which gives each contour's bounding rect and the pixel count and
+    mean y of each of its columns. It filters the contours by size/aspect and
+    thickness, computes the centroids/orientations, and collects everything in a
+    `ContourTable`. If DEBUG_LEVEL >= 2, it visualizes the resulting contours.
 
     Args:
         name: A string identifier for debugging/logging.
@@ -211,27 +418,47 @@ def get_contours(name: str, small: np.ndarray, mask: np.ndarray) -> list[Contour
         mask: A 2D binary mask in which to find contours.
 
     Returns:
-        A list of `ContourInfo` objects for those contours that pass size/aspect checks.
+        A `ContourTable` of those contours that pass size/aspect checks.
 
     """
     contours, _ = findContours(mask, RETR_EXTERNAL, CHAIN_APPROX_NONE)
-    contours_out = []
-    for contour in contours:
-        rect = boundingRect(contour)
-        xmin, ymin, width, height = rect
-        if (
-            width < cfg.TEXT_MIN_WIDTH
-            or height < cfg.TEXT_MIN_HEIGHT
-            or width < cfg.TEXT_MIN_ASPECT * height
-        ):
-            continue
-        tight_mask = make_tight_mask(contour, xmin, ymin, width, height)
-        if tight_mask.sum(axis=0).max() > cfg.TEXT_MAX_THICKNESS:
-            continue
-        if (moments := blob_mean_and_tangent(contour)) is None:
-            continue
-        info = ContourInfo(contour=contour, moments=moments, rect=rect, mask=tight_mask)
-        contours_out.append(info)
+    points, starts = concatenate_contours(contours)
+    _, labels, stats, _ = connectedComponentsWithStats(fill_holes(mask), connectivity=8)
+    # The blob enclosed by each contour is the one its first point belongs to
+    blobs = labels[points[starts[:-1], 1], points[starts[:-1], 0]]
+    rects = stats[blobs, :4].astype(np.int64)
+    xmin, ymin, width, height = rects.T
+    keep = ~(
+        (width < cfg.TEXT_MIN_WIDTH)
+        | (height < cfg.TEXT_MIN_HEIGHT)
+        | (width < cfg.TEXT_MIN_ASPECT * height)
+    )
+    counts, ysums, column_starts = label_columns(labels, stats)
+    if (rows := np.flatnonzero(keep)).size:
+        columns, row_starts = select_ranges(column_starts, blobs[rows])
+        thickness = np.maximum.reduceat(counts[columns], row_starts[:-1])
+        keep[rows[thickness > cfg.TEXT_MAX_THICKNESS]] = False
+    index, starts = select_ranges(starts, np.flatnonzero(keep))
+    points = points[index]
+    areas, centers, tangents = blob_means_and_tangents(points, starts)
+    if not (nonzero := areas > 0).all():
+        # Sometimes `cv2.moments()` returns all-zero moments: discard those contours
+        if cfg.DEBUG_LEVEL > 0:
+            print(f"Discarding {(~nonzero).sum()} contours with zero moments")
+        index, starts = select_ranges(starts, np.flatnonzero(nonzero))
+        points, centers, tangents = points[index], centers[nonzero], tangents[nonzero]
+    kept = np.flatnonzero(keep)[nonzero]
+    columns, column_starts = select_ranges(column_starts, blobs[kept])
+    contours_out = ContourTable(
+        points=points,
+        starts=starts,
+        centers=centers,
+        tangents=tangents,
+        rects=rects[kept],
+        column_counts=counts[columns],
+        column_ysums=ysums[columns],
+        column_starts=column_starts,
+    )
     if cfg.DEBUG_LEVEL >= 2:
         visualize_contours(name, small, contours_out)
     return contours_out
@@ -240,7 +467,7 @@ def get_contours(name: str, small: np.ndarray, mask: np.ndarray) -> list[Contour
 def visualize_contours(
     name: str,
     small: np.ndarray,
-    cinfo_list: list[ContourInfo],
+    cinfo_list: ContourTable,
 ) -> None:
     """Overlay colored contours on a copy of the image for debugging or inspection.
 
@@ -251,7 +478,7 @@ def visualize_contours(
     Args:
         name: A string identifier for debugging/logging.
         small: The downsampled image in which to draw.
-        cinfo_list: A list of `ContourInfo` objects (contours to visualize).
+        cinfo_list: The `ContourTable` of contours to visualize.
 
     """
     regions = np.zeros_like(small)
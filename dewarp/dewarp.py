@@ -4,8 +4,16 @@ This module provides:
 - A helper function, `round_nearest_multiple`, to round integers up to the nearest multiple.
 - A `RemappedImage` class that transforms (remaps) an input image to a
   rectified, thresholded output using a cubic parameterization of the page.
+- A `save_thresh` function that encodes that output as a PNG, and `write_thresh`,
+  which runs it either inline or on a shared background writer thread
+  (see `Config.OUTPUT_WRITE`).
 """
 
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
 import numpy as np
 from cv2 import (
     ADAPTIVE_THRESH_MEAN_C,
@@ -19,7 +27,6 @@ from cv2 import (
     remap,
     resize,
 )
-from PIL import Image
 
 from dewarp.debug_utils.viewer import debug_show
 from dewarp.normalisation import norm2pix
@@ -41,6 +48,68 @@ def round_nearest_multiple(i: int, factor: int) -> int:
     return i + factor - rem if rem else i
 
 
+def save_thresh(thresh: np.ndarray, threshfile: str, config: Config) -> None:
+    """Encode the dewarped page as a PNG (1-bit unless `NO_BINARY`) and save it.
+
+    Args:
+        thresh: The dewarped (and usually thresholded) grayscale page.
+        threshfile: Path to write the PNG to.
+        config: A `Config` object supplying `NO_BINARY` and `OUTPUT_DPI`.
+
+    """
+    from PIL import Image  # deferred: only needed once there is output to encode
+
+    pil_image = Image.fromarray(thresh)
+    if not config.NO_BINARY:
+        pil_image = pil_image.convert("1")
+    pil_image.save(threshfile, dpi=(config.OUTPUT_DPI, config.OUTPUT_DPI))
+
+
+_output_writer = None
+
+
+def output_writer() -> ThreadPoolExecutor:
+    """Return the shared background thread used for asynchronous output writes."""
+    global _output_writer
+    if _output_writer is None:
+        _output_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dewarp-writer")
+    return _output_writer
+
+
+def write_thresh(
+    thresh: np.ndarray,
+    name: str,
+    config: Config,
+    output_dir: str | Path | None = None,
+) -> tuple[str | None, Future | None]:
+    """Write the dewarped page as `<name>_thresh.png` according to `OUTPUT_WRITE`.
+
+    Args:
+        thresh: The dewarped (and usually thresholded) grayscale page.
+        name: A string name or identifier for the output file.
+        config: A `Config` object supplying `OUTPUT_WRITE`, `NO_BINARY` and `OUTPUT_DPI`.
+        output_dir: Directory to save the image in (default: the current working directory).
+
+    Returns:
+        The output path (None for "none") and the background write's future
+        (only for "async").
+
+    """
+    threshfile = name + "_thresh.png"
+    if output_dir is not None:
+        threshfile = str(Path(output_dir) / threshfile)
+    match config.OUTPUT_WRITE:
+        case "sync":
+            save_thresh(thresh, threshfile, config)
+            return threshfile, None
+        case "async":
+            return threshfile, output_writer().submit(save_thresh, thresh, threshfile, config)
+        case "none":
+            return None, None
+        case _:
+            raise ValueError(f"Unknown OUTPUT_WRITE mode {config.OUTPUT_WRITE!r}")
+
+
 class RemappedImage:
     """Rectify and threshold an image based on a cubic page parameterization.
 
@@ -61,9 +130,14 @@ class RemappedImage:
         page_dims: list | np.ndarray,
         params: np.ndarray,
         config: Config = Config(),
+        output_dir: str | Path | None = None,
     ) -> None:
         """Initialize the remapping process and save the thresholded image.
 
+        The output array is kept as `thresh`. Depending on `config.OUTPUT_WRITE` it is
+        written to `threshfile` immediately ("sync"), on a background thread whose
+        future is `write_future` ("async"), or not at all ("none", `threshfile` is None).
+
         Args:
             name: A string name or identifier for the output file.
             img: The original, full-resolution image as a NumPy array.
@@ -72,6 +146,8 @@ class RemappedImage:
                 target page dimensions in normalized units.
             params: The cubic parameters for warping (rotation, translation, etc.).
             config: A `Config` object containing options like zoom, DPI, debug level, etc.
+            output_dir: Directory to save the thresholded image in (default: the
+                current working directory).
 
         """
         self.config = config
@@ -124,7 +200,6 @@ class RemappedImage:
         )
         if config.NO_BINARY:
             thresh = remapped
-            pil_image = Image.fromarray(thresh)
         else:
             thresh = adaptiveThreshold(
                 remapped,
@@ -134,14 +209,9 @@ class RemappedImage:
                 config.ADAPTIVE_WINSZ,
                 25,
             )
-            pil_image = Image.fromarray(thresh)
-            pil_image = pil_image.convert("1")
+        self.thresh = thresh
 
-        self.threshfile = name + "_thresh.png"
-        pil_image.save(
-            self.threshfile,
-            dpi=(config.OUTPUT_DPI, config.OUTPUT_DPI),
-        )
+        self.threshfile, self.write_future = write_thresh(thresh, name, config, output_dir)
 
         if config.DEBUG_LEVEL >= 1:
             height = small.shape[0]
@@ -2,32 +2,46 @@
 
 This module includes:
 - A simple helper function (`imgsize`) to format an image's width/height into a string.
-- A function (`get_page_dims`) to optimize final page dimensions via the cubic model.
+- Functions (`solve_page_dims`, `get_page_dims`) to solve for the final page
+  dimensions via the cubic model (a capped 2-D Newton iteration, rejecting sizes far
+  from the rough estimate and falling back to it).
 - A class (`WarpedImage`) that loads an image, resizes it, finds page boundaries,
-  and threshold-remaps the final dewarped image to disk.
+  and threshold-remaps the final dewarped image to disk. Each of these stages is
+  also exposed as a method so a pipeline can run them separately. When a result
+  cache is configured (`Config.CACHE_DIR`), a previously seen image is restored
+  from it instead.
+- A function (`optimise_stacked`) that runs the `optimise` stage of many deferred
+  `WarpedImage`s as one stacked solve (`optimise_params_stacked`).
 """
 
 from __future__ import annotations
 
 from pathlib import Path
+from time import perf_counter
 
 import numpy as np
-from cv2 import INTER_AREA, imread, rectangle
+from cv2 import IMREAD_COLOR, INTER_AREA, imdecode, imread, rectangle
 from cv2 import resize as cv2_resize
-from scipy.optimize import minimize
 
-from dewarp.contours import ContourInfo
+from dewarp.cache import ResultCache, cache_key
+from dewarp.contours import ContourTable
 from dewarp.debug_utils.viewer import debug_show
-from dewarp.dewarp import RemappedImage
+from dewarp.dewarp import RemappedImage, write_thresh
 from dewarp.mask import Mask
-from dewarp.optimise import optimise_params
+from dewarp.optimise import (
+    OPTIM_FALLBACK_METHODS,
+    OptimResult,
+    optimise_params,
+    optimise_params_stacked,
+    plausible_pose,
+)
 from dewarp.options.core import Config
-from dewarp.projection import project_xy
+from dewarp.projection import project_xy_jacobian
 from dewarp.solve import get_default_params
 from dewarp.spans import assemble_spans, keypoints_from_samples, sample_spans
 
 
-#__all__ = ["imgsize", "get_page_dims", "WarpedImage"]
+#__all__ = ["imgsize", "solve_page_dims", "get_page_dims", "WarpedImage", "optimise_stacked"]
 
 
 def imgsize(img: np.ndarray) -> str:
@@ -36,32 +50,110 @@ def imgsize(img: np.ndarray) -> str:
     return f"{width}x{height}"
 
 
-def get_page_dims(
+# Newton iterations allowed in `solve_page_dims` before giving up
+PAGE_DIMS_MAX_ITER = 20
+
+# Page dimensions further than this factor from `rough_dims` (either way) are
+# rejected: they come from a degenerate pose, and the output is sized from them, so
+# `threshold` would otherwise be asked for a remap of gigabytes
+PAGE_DIMS_MAX_RATIO = 1.5
+
+
+def solve_page_dims(
     corners: np.ndarray,
     rough_dims: np.ndarray | list,
     params: np.ndarray,
-) -> np.ndarray:
-    """Optimize final page dimensions using a cubic polynomial model.
+    max_iter: int = PAGE_DIMS_MAX_ITER,
+    max_ratio: float = PAGE_DIMS_MAX_RATIO,
+) -> np.ndarray | None:
+    """Solve for the final page dimensions using a cubic polynomial model.
+
+    Finds the page point (width, height) that projects onto the bottom-right corner
+    `corners[2]`: two equations in two unknowns, solved by Newton's method with the
+    analytic derivatives of `project_xy_jacobian` (halving a step that does not
+    reduce the error), starting from `rough_dims`.
 
     Args:
         corners: The four corner points of the page outline, in reduced coordinates.
         rough_dims: An initial (height, width) estimate for page dimensions.
         params: The optimization parameter vector, e.g. includes rotation/translation/cubic slopes.
+        max_iter: The maximum number of Newton iterations.
+        max_ratio: The largest factor by which either dimension may differ from
+            `rough_dims`.
 
     Returns:
-        A 1D array of floats [height, width] representing the optimized page dimensions.
+        A 1D array of floats [height, width] representing the optimized page
+        dimensions, or None if the iteration did not converge within `max_iter`
+        iterations or gave a non-finite, negative or implausible size.
 
     """
+    start = perf_counter()
     dst_br = corners[2].flatten()
-    dims = np.array(rough_dims)
+    rough_dims = np.array(rough_dims, dtype=float)
+    dims = rough_dims.copy()
+
+    def error(dims_local: np.ndarray) -> tuple[np.ndarray, np.ndarray, float]:
+        proj_br, _, xy_jac = project_xy_jacobian(dims_local, params)
+        resid = proj_br[0] - dst_br
+        return resid, xy_jac[0], float(resid @ resid)
+
+    resid, jac, err = error(dims)
+    converged = err < 1e-24
+    iterations = 0
+    while not converged and iterations < max_iter:
+        iterations += 1
+        try:
+            step = np.linalg.solve(jac, -resid)
+        except np.linalg.LinAlgError:
+            break
+        for _ in range(10):
+            trial = error(dims + step)
+            if trial[2] < err:
+                break
+            step = step / 2
+        else:
+            break  # no descent along the Newton direction
+        dims = dims + step
+        resid, jac, err = trial
+        converged = err < 1e-24 or np.abs(step).max() < 1e-12
+    elapsed = (perf_counter() - start) * 1000
+
+    if not converged or not np.all(np.isfinite(dims)) or np.any(dims < 0):
+        print(f"  page dims solve failed after {iterations} iterations ({elapsed:.3f} ms)")
+        return None
+    if np.any(dims > rough_dims * max_ratio) or np.any(dims * max_ratio < rough_dims):
+        print(f"  got implausible page dims {dims[0]} x {dims[1]} (rough estimate {rough_dims})")
+        return None
+    print(f"  got page dims {dims[0]} x {dims[1]} ({iterations} iterations, {elapsed:.3f} ms)")
+    return dims
+
+
+def get_page_dims(
+    corners: np.ndarray,
+    rough_dims: np.ndarray | list,
+    params: np.ndarray,
+    max_iter: int = PAGE_DIMS_MAX_ITER,
+) -> np.ndarray:
+    """Optimize final page dimensions, falling back to `rough_dims`.
+
+    As `solve_page_dims`, but if that fails (no convergence within `max_iter`
+    iterations, or a non-finite, negative or implausible size) `rough_dims` is
+    returned instead.
+
+    Args:
+        corners: The four corner points of the page outline, in reduced coordinates.
+        rough_dims: An initial (height, width) estimate for page dimensions.
+        params: The optimization parameter vector, e.g. includes rotation/translation/cubic slopes.
+        max_iter: The maximum number of Newton iterations.
 
-    def objective(dims_local):
-        proj_br = project_xy(dims_local, params)
-        return np.sum((dst_br - proj_br.flatten()) ** 2)
+    Returns:
+        A 1D array of floats [height, width] representing the optimized page dimensions.
 
-    res = minimize(objective, dims, method="Powell")
-    dims = res.x
-    print("  got page dims", dims[0], "x", dims[1])
+    """
+    dims = solve_page_dims(corners, rough_dims, params, max_iter)
+    if dims is None:
+        print("  falling back to rough estimate of page dims")
+        return np.array(rough_dims, dtype=float)
     return dims
 
 
@@ -73,21 +165,69 @@ class WarpedImage:
     """
 
     written = False  # Explicitly declare the file-write attribute
+    write_future = None
+    cache_key = None
+    cache_hit = False
+    image_bytes = None  # the encoded file, read by `restore` and decoded by `load`
+    optim_status = None  # an `OPTIM_STATUSES` entry once optimised (or restored)
     config: Config
 
-    def __init__(self, imgfile: str | Path, config: Config = Config()) -> None:
+    def __init__(
+        self,
+        imgfile: str | Path | np.ndarray,
+        config: Config = Config(),
+        output_dir: str | Path | None = None,
+        defer: bool = False,
+        name: str | None = None,
+        warm_start: np.ndarray | None = None,
+    ) -> None:
         """Initialize the WarpedImage with a source file and configuration.
 
         Args:
-            imgfile: Path to the image file to load.
+            imgfile: Path to the image file to load, or an already decoded BGR image.
             config: A `Config` object that specifies various parameters and defaults.
+            output_dir: Directory to write the thresholded output to (default: the
+                current working directory).
+            defer: If True, only load the image; the caller then runs the
+                `find_keypoints`, `optimise` and `threshold` stages itself.
+            name: Name used for output files when `imgfile` is an array
+                (default: "page").
+            warm_start: Optimised `params` of the previous page of a sequence, used
+                to seed the pose and cubic slopes (see `optimise_params`).
 
         """
         self.config = config
-        if isinstance(imgfile, Path):
-            imgfile = str(imgfile)
-        self.cv2_img = imread(imgfile)
-        self.file_path = Path(imgfile).resolve()
+        self.output_dir = output_dir
+        self.warm_start = warm_start
+        self.cache = ResultCache.from_config(config)
+        if self.cache is not None and self.restore(imgfile, name=name):
+            return
+        self.load(imgfile, name=name)
+        if not defer:
+            self.dewarp()
+
+    def load(self, imgfile: str | Path | np.ndarray, name: str | None = None) -> None:
+        """Read the image, downsample it for display and compute the page extents.
+
+        Args:
+            imgfile: Path to the image file to load, or an already decoded BGR image.
+            name: Name used for output files when `imgfile` is an array.
+
+        """
+        if isinstance(imgfile, np.ndarray):
+            self.cv2_img = imgfile
+            self.file_path = Path(f"{name or 'page'}.png").resolve()
+        else:
+            if isinstance(imgfile, Path):
+                imgfile = str(imgfile)
+            if self.image_bytes is not None:
+                # Already read to compute the cache key: decode those bytes
+                buffer = np.frombuffer(self.image_bytes, dtype=np.uint8)
+                self.cv2_img = imdecode(buffer, IMREAD_COLOR)
+                self.image_bytes = None
+            else:
+                self.cv2_img = imread(imgfile)
+            self.file_path = Path(imgfile).resolve()
         self.small = self.resize_to_screen()
         size, resized = self.size, self.resized
         print(f"Loaded {self.basename} at {size=} --> {resized=}")
@@ -95,49 +235,192 @@ class WarpedImage:
             debug_show(self.stem, 0.0, "original", self.small)
 
         self.calculate_page_extents()  # set pagemask & page_outline attributes
+
+    def restore(self, imgfile: str | Path | np.ndarray, name: str | None = None) -> bool:
+        """Look the image up in the result cache and, on a hit, restore its result.
+
+        Sets `cache_key` either way. On a hit `params`, `page_dims` and `dewarped`
+        come from the cache and the output is written as `threshold` would, so no
+        image decoding, contour detection or optimisation takes place. On a miss the
+        file bytes read for the key are kept (`image_bytes`) for `load` to decode.
+
+        Args:
+            imgfile: Path to the image file, or an already decoded BGR image.
+            name: Name used for output files when `imgfile` is an array.
+
+        Returns:
+            True on a cache hit.
+
+        """
+        if isinstance(imgfile, np.ndarray):
+            self.file_path = Path(f"{name or 'page'}.png").resolve()
+            self.cache_key = cache_key(imgfile, self.config)
+        else:
+            self.file_path = Path(imgfile).resolve()
+            self.image_bytes = self.file_path.read_bytes()
+            self.cache_key = cache_key(self.image_bytes, self.config)
+        entry = self.cache.get(self.cache_key)
+        if entry is None:
+            return False
+        self.image_bytes = None
+        print(f"Restored {self.basename} from cache ({self.cache_key[:12]})")
+        self.params = entry.params
+        self.optim_status = "converged"  # only converged results are cached
+        self.page_dims = entry.page_dims
+        self.dewarped = entry.dewarped
+        self.outfile, self.write_future = write_thresh(
+            self.dewarped,
+            self.stem,
+            self.config,
+            self.output_dir,
+        )
+        self.cache_hit = self.written = True
+        return True
+
+    def dewarp(self) -> bool:
+        """Run the remaining stages on the loaded image and write the output.
+
+        Returns:
+            True if enough spans were found and the output was written.
+
+        """
+        if self.cache_hit:
+            return self.written
+        if self.find_keypoints():
+            self.optimise()
+            self.threshold(self.page_dims, self.params)
+            self.written = True
+        return self.written
+
+    def find_keypoints(self) -> bool:
+        """Detect spans and derive the keypoints and initial parameter vector.
+
+        Sets `spans`, `corners`, `rough_dims`, `span_counts`, `params` and
+        `dstpoints` for the `optimise` stage.
+
+        Returns:
+            False if no spans were found (the page should be skipped), else True.
+
+        """
         self.contour_list = self.contour_info(text=True)
         spans = self.iteratively_assemble_spans()
+        self.spans = spans
 
         # Skip if no spans
         if len(spans) < 1:
             print(f"skipping {self.stem} because only {len(spans)} spans")
-        else:
-            span_points = sample_spans(self.small.shape, spans)
-            n_pts = sum(map(len, span_points))
-            print(f"  got {len(spans)} spans with {n_pts} points.")
+            return False
 
-            corners, ycoords, xcoords = keypoints_from_samples(
-                self.stem,
-                self.small,
-                self.pagemask,
-                self.page_outline,
-                span_points,
-            )
-            rough_dims, span_counts, params = get_default_params(
-                corners,
-                ycoords,
-                xcoords,
-            )
-            dstpoints = np.vstack((corners[0].reshape((1, 1, 2)),) + tuple(span_points))
-            params = optimise_params(
+        span_points = sample_spans(self.small.shape, spans)
+        n_pts = sum(map(len, span_points))
+        print(f"  got {len(spans)} spans with {n_pts} points.")
+
+        corners, ycoords, xcoords = keypoints_from_samples(
+            self.stem,
+            self.small,
+            self.pagemask,
+            self.page_outline,
+            span_points,
+        )
+        rough_dims, span_counts, params = get_default_params(
+            corners,
+            ycoords,
+            xcoords,
+        )
+        self.corners = corners
+        self.rough_dims = rough_dims
+        self.span_counts = span_counts
+        self.params = params
+        self.dstpoints = np.vstack((corners[0].reshape((1, 1, 2)),) + tuple(span_points))
+        return True
+
+    def optimise(self) -> None:
+        """Optimise the parameter vector and the final page dimensions.
+
+        Updates `params` in place of the initial guess and sets `page_dims` and
+        `optim_status`. If `warm_start` is set, the optimisation may start from the
+        previous page instead. The optimisation stops early with the best params so
+        far once the `OPTIM_MAX_SECONDS`/`OPTIM_MAX_EVALS` budget is spent. With
+        `OPTIM_STARTS` > 1, several perturbed initial guesses are optimised in
+        parallel and the best result is kept.
+
+        If a method with an entry in `OPTIM_FALLBACK_METHODS` ends at an implausible
+        pose (`plausible_pose`) or page size (`solve_page_dims`), the page is
+        optimised again with the fallback method, with what is left of the budget.
+        If nothing is left, the implausible result is kept as "budget-exhausted".
+        """
+        max_seconds, max_evaluations = self.config.OPTIM_MAX_SECONDS, self.config.OPTIM_MAX_EVALS
+        seconds_left, evaluations_left = max_seconds, max_evaluations
+        start = perf_counter()
+        evaluations = 0
+        method = self.config.OPTIM_METHOD
+        while True:
+            result = optimise_params(
                 self.stem,
                 self.small,
-                dstpoints,
-                span_counts,
-                params,
+                self.dstpoints,
+                self.span_counts,
+                self.params,
                 self.config.DEBUG_LEVEL,
+                warm_start=self.warm_start,
+                method=method,
+                coarse_points=self.config.OPTIM_COARSE_POINTS,
+                max_seconds=seconds_left,
+                max_evaluations=evaluations_left,
+                starts=self.config.OPTIM_STARTS,
+                workers=self.config.OPTIM_START_WORKERS,
             )
-            page_dims = get_page_dims(corners, rough_dims, params)
-            if np.any(page_dims < 0):
-                # Fallback: see https://github.com/lmmx/page-dewarp/issues/9
-                print("Got a negative page dimension! Falling back to rough estimate")
-                page_dims = rough_dims
-            self.threshold(page_dims, params)
-            self.written = True
+            evaluations += result.evaluations
+            page_dims = solve_page_dims(self.corners, self.rough_dims, result.params)
+            fallback = OPTIM_FALLBACK_METHODS.get(method)
+            if fallback is None or (
+                page_dims is not None and plausible_pose(result.params, self.params)
+            ):
+                break
+            if max_seconds > 0:
+                seconds_left = max_seconds - (perf_counter() - start)
+            if max_evaluations > 0:
+                evaluations_left = max_evaluations - evaluations
+            if (max_seconds > 0 and seconds_left <= 0) or (
+                max_evaluations > 0 and evaluations_left <= 0
+            ):
+                print(f"  implausible {method} result, no budget left for {fallback}")
+                result.status = "budget-exhausted"
+                break
+            print(f"  implausible {method} result, optimizing again with {fallback}")
+            method = fallback
+        self.apply_optimised(result, page_dims)
+
+    def apply_optimised(self, result: OptimResult, page_dims: np.ndarray | None = None) -> None:
+        """Take the optimised params of `result` and solve for the page dimensions.
+
+        Sets `params`, `optim_status` and `page_dims` (the second half of `optimise`,
+        also used after `optimise_stacked`).
+
+        Args:
+            result: The `OptimResult` of this page's keypoint optimisation.
+            page_dims: The page dimensions already solved for `result`, if any
+                (default: `get_page_dims`).
+
+        """
+        self.params, self.optim_status = result.params, result.status
+        if page_dims is None:
+            page_dims = get_page_dims(self.corners, self.rough_dims, self.params)
+        if np.any(page_dims < 0):
+            # Fallback: see https://github.com/lmmx/page-dewarp/issues/9
+            print("Got a negative page dimension! Falling back to rough estimate")
+            page_dims = self.rough_dims
+        self.page_dims = page_dims
 
     def threshold(self, page_dims: np.ndarray, params: np.ndarray) -> None:
         """Construct a dewarped, thresholded image using the RemappedImage class.
 
+        The result is available in memory as `dewarped`; `outfile` is its path on
+        disk, or None when `OUTPUT_WRITE` is "none". It is also stored in the
+        result cache, if one is configured, but only when `optimise` converged for
+        this image: not when it ran out of budget or fell back to the initial params
+        (a later run may do better), nor for params taken from another image.
+
         Args:
             page_dims: The final (height, width) dimensions for the page layout.
             params: The optimization parameters (e.g. rotation, translation, cubic slopes).
@@ -150,8 +433,18 @@ class WarpedImage:
             page_dims,
             params,
             config=self.config,
+            output_dir=self.output_dir,
         )
+        self.dewarped = remap.thresh
         self.outfile = remap.threshfile
+        self.write_future = remap.write_future
+        if self.cache is not None and self.optim_status == "converged":
+            self.cache.put(self.cache_key, params, page_dims, self.dewarped)
+
+    def wait_for_output(self) -> None:
+        """Block until an asynchronous output write (if any) has finished."""
+        if self.write_future is not None:
+            self.write_future.result()
 
     def iteratively_assemble_spans(self) -> list:
         """Assemble spans from contours; fallback to line detection if too few are found.
@@ -243,16 +536,48 @@ class WarpedImage:
         """Return a formatted string 'widthxheight' for the downsampled (small) image."""
         return imgsize(self.small)
 
-    def contour_info(self, text: bool = True) -> list[ContourInfo]:
+    def contour_info(self, text: bool = True) -> ContourTable:
         """Compute contour information for either text or line detection.
 
         Args:
             text: If True, identifies text contours; otherwise detects lines.
 
         Returns:
-            A list of contour objects (ContourInfo instances).
+            A ContourTable of the detected contours.
 
         """
         c_type = "text" if text else "line"
         mask = Mask(self.stem, self.small, self.pagemask, c_type)
         return mask.contours()
+
+
+def optimise_stacked(images: list[WarpedImage]) -> None:
+    """Run the `optimise` stage of several images as one stacked solve.
+
+    For many small pages (e.g. receipts) this avoids the per-page overhead of
+    `optimise_params`. Its coarse pass, warm start, budget and multi-start options
+    do not apply. A page whose stacked result is implausible (`plausible_pose`,
+    `solve_page_dims`) is optimised again on its own with `WarpedImage.optimise`.
+
+    Args:
+        images: Deferred `WarpedImage`s whose `find_keypoints` stage succeeded.
+
+    """
+    if not images:
+        return
+    start = perf_counter()
+    results = optimise_params_stacked(
+        [(img.dstpoints, img.span_counts, img.params) for img in images],
+    )
+    print(
+        f"  optimized {len(images)} pages together in "
+        f"{round((perf_counter() - start), 2)} sec.",
+    )
+    for img, result in zip(images, results):
+        print(f"  {img.stem}: final objective is {result.objective} ({result.status})")
+        page_dims = solve_page_dims(img.corners, img.rough_dims, result.params)
+        if page_dims is None or not plausible_pose(result.params, img.params):
+            print(f"  implausible stacked result for {img.stem}, optimizing it on its own")
+            img.optimise()
+            continue
+        img.apply_optimised(result, page_dims)
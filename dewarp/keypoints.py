@@ -2,15 +2,25 @@
 
 This module provides helper functions to:
 - Generate a "keypoint index" array from span counts (for referencing parameters).
-- Project keypoints (in a parameter vector) into 2D coordinates using a cubic model.
+- Project keypoints (in a parameter vector) into 2D coordinates using a cubic model,
+  for one parameter vector or a whole batch of them.
+- Differentiate that projection with respect to the whole parameter vector, as a
+  sparse matrix (each keypoint depends on only 10 of the parameters).
 """
 
 import numpy as np
 
-from dewarp.projection import project_xy
+from dewarp.options.core import cfg
+from dewarp.projection import project_xy, project_xy_batch, project_xy_jacobian
 
 
-#__all__ = ["make_keypoint_index", "project_keypoints"]
+#__all__ = [
+#    "make_keypoint_index",
+#    "project_keypoints",
+#    "project_keypoints_batch",
+#    "keypoint_jacobian_columns",
+#    "project_keypoints_jacobian",
+#]
 
 
 def make_keypoint_index(span_counts: list[int]) -> np.ndarray:
@@ -60,3 +70,79 @@ def project_keypoints(pvec: np.ndarray, keypoint_index: np.ndarray) -> np.ndarra
     xy_coords = pvec[keypoint_index]
     xy_coords[0, :] = 0
     return project_xy(xy_coords, pvec)
+
+
+def project_keypoints_batch(pvecs: np.ndarray, keypoint_index: np.ndarray) -> np.ndarray:
+    """Project the keypoints of several parameter vectors at once.
+
+    Args:
+        pvecs: A (B,P) array of parameter vectors.
+        keypoint_index: The index array from `make_keypoint_index`.
+
+    Returns:
+        A (B,N,2) array; row b equals `project_keypoints(pvecs[b], keypoint_index)`
+        (reshaped to (N,2)).
+
+    """
+    pvecs = np.atleast_2d(pvecs)
+    xy_coords = pvecs[:, keypoint_index]
+    xy_coords[:, 0, :] = 0
+    return project_xy_batch(xy_coords, pvecs)
+
+
+def keypoint_jacobian_columns(keypoint_index: np.ndarray) -> np.ndarray:
+    """Return the parameter columns each keypoint's projection depends on.
+
+    A keypoint depends on the pose and cubic slopes, on its span's y coordinate and
+    on its own x coordinate, so every row of the Jacobian has at most 10 nonzeros
+    however many spans and keypoints the page has.
+
+    Args:
+        keypoint_index: The index array from `make_keypoint_index`.
+
+    Returns:
+        An (N, 10) integer array: the 8 pose/cubic columns (rvec, tvec, cubic order)
+        followed by the x and y columns of each keypoint. The first keypoint is the
+        page origin; its x and y columns are 0 (and its derivatives there are zero).
+
+    """
+    pose_cols = np.concatenate(
+        [np.arange(*idx) for idx in (cfg.RVEC_IDX, cfg.TVEC_IDX, cfg.CUBIC_IDX)],
+    )
+    cols = np.empty((len(keypoint_index), 10), dtype=int)
+    cols[:, :8] = pose_cols
+    cols[:, 8:] = keypoint_index
+    return cols
+
+
+def project_keypoints_jacobian(pvec: np.ndarray, keypoint_index: np.ndarray):
+    """Return the sparse Jacobian of the flattened `project_keypoints` output.
+
+    Only the columns from `keypoint_jacobian_columns` are stored, so building the
+    matrix (and multiplying by it) costs time linear in the number of keypoints.
+
+    Args:
+        pvec: The parameter vector.
+        keypoint_index: The index array from `make_keypoint_index`.
+
+    Returns:
+        A `scipy.sparse.csr_matrix` of shape (2 * len(keypoint_index), len(pvec))
+        whose rows follow the (x, y) order of
+        `project_keypoints(pvec, keypoint_index).ravel()`.
+
+    """
+    from scipy.sparse import csr_matrix  # deferred: SciPy dominates import time
+
+    xy_coords = pvec[keypoint_index]
+    xy_coords[0, :] = 0
+    _, pose_jac, xy_jac = project_xy_jacobian(xy_coords, pvec)
+    xy_jac[0] = 0  # the origin is fixed, not a parameter
+    npts = len(keypoint_index)
+    data = np.concatenate((pose_jac, xy_jac), axis=2)  # (N,2,10)
+    cols = np.broadcast_to(keypoint_jacobian_columns(keypoint_index)[:, None, :], data.shape)
+    rows = np.broadcast_to(np.arange(2 * npts).reshape(npts, 2, 1), data.shape)
+    # Duplicate (row, col) entries (the origin's) are summed
+    return csr_matrix(
+        (data.ravel(), (rows.ravel(), cols.ravel())),
+        shape=(2 * npts, len(pvec)),
+    )
@@ -18,7 +18,7 @@ from cv2 import (
     erode,
 )
 
-from dewarp.contours import ContourInfo, get_contours
+from dewarp.contours import ContourTable, get_contours
 from dewarp.debug_utils.viewer import debug_show
 from dewarp.options.core import cfg
 
@@ -112,14 +112,14 @@ class Mask:
                 step += 0.3
             debug_show(self.name, step, text, display)
 
-    def contours(self) -> list[ContourInfo]:
+    def contours(self) -> ContourTable:
         """Extract the final contours from `self.value`.
 
         Calls `get_contours` to find external contours in the thresholded,
         morphological-processed mask stored in `self.value`.
 
         Returns:
-            A list of ContourInfo objects describing each discovered contour.
+            A ContourTable describing each discovered contour.
 
         """
         return get_contours(self.name, self.small, self.value)
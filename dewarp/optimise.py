@@ -2,23 +2,190 @@
 
 This module provides:
 - A function (`draw_correspondences`) to visualize matched points (dstpoints/projpts).
-- A function (`optimise_params`) that uses an objective function and scipy's `minimize`
-  to refine the parameter vector for page dewarping.
+- A function (`optimise_params`) that refines the parameter vector for page dewarping,
+  either with scipy's derivative-free `minimize` (Powell) or with `least_squares`
+  (TRF/LM, or variable projection over the 8 global parameters) on the keypoint
+  residuals and their analytic Jacobian, optionally warm-started from the previous
+  page of a sequence and optionally preceded by a coarse pass over a few keypoints
+  per span.
+- Helpers to subsample the keypoints (`subsample_keypoints`) and to run one
+  optimiser over a keypoint set (`run_optimiser`, `run_varpro`).
+- A per-page time/evaluation budget (`OptimBudget`) that keeps the best parameters
+  evaluated so far, and the `OptimResult` (params, objective, convergence status)
+  returned by `optimise_params`.
+- A check (`plausible_pose`) that a result has not drifted to a degenerate scale,
+  and the methods to re-optimise such a result with (`OPTIM_FALLBACK_METHODS`).
+- An optional multi-start mode (`multi_start_params`, `refine_params`) that
+  optimises from several perturbed initial vectors in parallel, in a worker pool
+  kept for later pages (`get_start_pool`).
+- A function (`optimise_params_stacked`) that optimises many pages at once, in one
+  vectorised Levenberg-Marquardt iteration over all their keypoints.
 """
 
+from __future__ import annotations
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime as dt
+from time import perf_counter, time
 
+import msgspec
 import numpy as np
 from cv2 import LINE_AA, circle, line
-from scipy.optimize import minimize
 
 from dewarp.debug_utils.viewer import debug_show
-from dewarp.keypoints import make_keypoint_index, project_keypoints
+from dewarp.keypoints import (
+    keypoint_jacobian_columns,
+    make_keypoint_index,
+    project_keypoints,
+    project_keypoints_jacobian,
+)
 from dewarp.normalisation import norm2pix
+from dewarp.options.core import cfg
+from dewarp.projection import project_xy_jacobian, project_xy_jacobian_batch
 from dewarp.simple_utils import fltp
+from dewarp.solve import fit_span_coords, seed_params, span_least_squares
+
+
+#__all__ = [
+#    "draw_correspondences",
+#    "subsample_keypoints",
+#    "run_varpro",
+#    "run_optimiser",
+#    "OptimBudget",
+#    "OptimResult",
+#    "plausible_pose",
+#    "multi_start_params",
+#    "refine_params",
+#    "get_start_pool",
+#    "optimise_params",
+#    "optimise_params_stacked",
+#]
+
+OPTIM_METHODS = ("powell", "trf", "lm", "varpro")
+
+# The coarse pass only seeds the full solve, so its least-squares evaluations are
+# capped (badly conditioned subsets can otherwise take thousands of iterations)
+COARSE_MAX_EVALUATIONS = 100
+
+# `OptimResult.status`: finished normally / stopped by the budget with the best
+# params found so far / failed or got worse, so the starting params are returned
+OPTIM_STATUSES = ("converged", "budget-exhausted", "fallback")
+
+# The least-squares methods can drift to a degenerate pose that still fits the
+# keypoints (e.g. a single span: the page shrinking towards the camera). A result
+# whose camera distance (the translation's z) differs from the initial `solvePnP`
+# pose by more than this factor is re-optimised with the method's fallback
+POSE_MAX_DEPTH_RATIO = 1.5
+OPTIM_FALLBACK_METHODS = {"trf": "powell", "lm": "powell", "varpro": "trf"}
+
+# Perturbations of the extra starts of a multi-start optimisation: focal length
+# guesses (relative to `cfg.FOCAL_LENGTH`), cubic slope signs and the smallest
+# slope magnitude to flip (the default initial slopes are zero)
+START_FOCAL_FACTORS = (1.0, 0.75, 1.33)
+START_SLOPE_SIGNS = ((1, -1), (-1, 1), (1, 1), (-1, -1))
+START_SLOPE = 0.1
+
+# The worker pool of multi-start optimisations (`get_start_pool`), kept between pages
+start_pool: ProcessPoolExecutor | None = None
+start_pool_workers = 0
+
+# Levenberg-Marquardt iterations allowed in `optimise_params_stacked`
+STACKED_MAX_ITERATIONS = 100
+
+
+class BudgetExhausted(Exception):
+    """Raised from an objective evaluation once the optimisation budget is spent."""
+
+
+class OptimBudget:
+    """The wall-time and evaluation budget of one page's optimisation (all passes).
+
+    Every objective (or residual) evaluation is recorded with its parameter vector,
+    so the best parameters of the current pass are at hand when the budget runs out
+    in the middle of it.
+    """
+
+    def __init__(
+        self,
+        max_seconds: float = 0.0,
+        max_evaluations: int = 0,
+        deadline: float = 0.0,
+    ) -> None:
+        """Start the clock.
+
+        Args:
+            max_seconds: Wall-time budget in seconds (0: unlimited).
+            max_evaluations: Budget of objective evaluations (0: unlimited).
+            deadline: A `time.time()` after which to stop whatever the other limits,
+                shared by all starts of a multi-start optimisation (0: none).
+
+        """
+        self.start = perf_counter()
+        self.max_seconds = max_seconds
+        self.max_evaluations = max_evaluations
+        self.deadline = deadline
+        self.evaluations = 0
+        self.new_pass()
 
+    @property
+    def seconds(self) -> float:
+        """Return the time spent since the budget was created."""
+        return perf_counter() - self.start
 
-#__all__ = ["draw_correspondences", "optimise_params"]
+    def new_pass(self) -> None:
+        """Forget the best parameters (a new pass may use a different parameter set)."""
+        self.best_params: np.ndarray | None = None
+        self.best_objective = np.inf
+
+    def check(self) -> None:
+        """Raise `BudgetExhausted` if the time or evaluation budget is spent."""
+        if (
+            (self.max_seconds > 0 and self.seconds >= self.max_seconds)
+            or (self.max_evaluations > 0 and self.evaluations >= self.max_evaluations)
+            or (self.deadline > 0 and time() >= self.deadline)
+        ):
+            raise BudgetExhausted
+
+    def record(self, pvec: np.ndarray, objective: float) -> None:
+        """Count an evaluation, remember it if it is the best so far, then `check`."""
+        self.evaluations += 1
+        if objective < self.best_objective:
+            self.best_params, self.best_objective = pvec.copy(), float(objective)
+        self.check()
+
+
+class OptimResult(msgspec.Struct):
+    """The outcome of `optimise_params`."""
+
+    params: np.ndarray
+    objective: float
+    status: str  # one of OPTIM_STATUSES
+    seconds: float
+    evaluations: int
+
+
+def plausible_pose(
+    params: np.ndarray,
+    initial: np.ndarray,
+    max_ratio: float = POSE_MAX_DEPTH_RATIO,
+) -> bool:
+    """Check that an optimised pose is at a similar camera distance as the initial one.
+
+    Args:
+        params: The optimised parameter vector.
+        initial: The initial parameter vector (from `get_default_params`).
+        max_ratio: The largest factor by which the translation's z may have changed.
+
+    Returns:
+        True if the translation's z of `params` is within `max_ratio` of `initial`'s.
+
+    """
+    tz = cfg.TVEC_IDX[0] + 2
+    ratio = params[tz] / initial[tz]
+    return bool(1 / max_ratio <= ratio <= max_ratio)
 
 
 def draw_correspondences(
@@ -48,6 +215,359 @@ def draw_correspondences(
     return display
 
 
+def subsample_keypoints(
+    dstpoints: np.ndarray,
+    span_counts: list[int],
+    params: np.ndarray,
+    per_span: int,
+) -> tuple[np.ndarray, list[int], np.ndarray]:
+    """Keep only a few evenly spaced keypoints (including both ends) of every span.
+
+    Args:
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin.
+        span_counts: The number of keypoints in each span.
+        params: A parameter vector laid out as by `get_default_params`.
+        per_span: How many keypoints to keep per span (spans with fewer keep all).
+
+    Returns:
+        A tuple `(dstpoints, span_counts, params)` for the reduced keypoint set, with
+        the same pose, cubic slopes and span y coordinates.
+
+    """
+    nspans = len(span_counts)
+    keep, start = [], 0
+    for count in span_counts:
+        picks = np.linspace(0, count - 1, min(per_span, count))
+        keep.append(start + np.unique(np.round(picks).astype(int)))
+        start += count
+    counts = [len(k) for k in keep]
+    keep = np.concatenate(keep)
+    coarse_dstpoints = np.vstack((dstpoints[:1], dstpoints[1:][keep]))
+    coarse_params = np.concatenate((params[: 8 + nspans], params[8 + nspans :][keep]))
+    return coarse_dstpoints, counts, coarse_params
+
+
+def run_varpro(
+    dstpoints: np.ndarray,
+    span_counts: list[int],
+    params: np.ndarray,
+    max_evaluations: int | None = None,
+    budget: OptimBudget | None = None,
+) -> tuple[np.ndarray, float, str]:
+    """Minimize the keypoint objective over the pose and cubic slopes only.
+
+    Variable projection: for any 8 global parameters the span and keypoint
+    coordinates are solved for directly (`fit_span_coords`), so the outer
+    least-squares search is 8-dimensional whatever the number of keypoints. Its
+    Jacobian is the full Jacobian's pose columns with their components along the
+    coordinate columns projected out (Kaufman's approximation), computed per span
+    with `span_least_squares`.
+
+    Args:
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin.
+        span_counts: The number of keypoints in each span.
+        params: The initial parameter vector (only its first 8 entries are used).
+        max_evaluations: Stop after this many residual evaluations (None: until
+            converged).
+        budget: A budget to record every evaluation in (full parameter vectors).
+
+    Returns:
+        A tuple `(params, objective, stats)` as for `run_optimiser`, `params` being
+        the full parameter vector.
+
+    """
+    from scipy.optimize import least_squares  # deferred: SciPy dominates import time
+
+    keypoint_index = make_keypoint_index(span_counts)
+    pose_cols = keypoint_jacobian_columns(keypoint_index)[0, :8]
+    targets = dstpoints.ravel()
+    fitted = {}
+
+    def inner(pose: np.ndarray) -> np.ndarray:
+        key = pose.tobytes()
+        if key not in fitted:
+            fitted.clear()  # only the latest point is asked for twice
+            fitted[key] = fit_span_coords(
+                np.concatenate((pose, params[8:])),
+                dstpoints,
+                span_counts,
+            )
+        return fitted[key]
+
+    def residuals(pose: np.ndarray) -> np.ndarray:
+        pvec = inner(pose)
+        resid = project_keypoints(pvec, keypoint_index).ravel() - targets
+        if budget is not None:
+            budget.record(pvec, resid @ resid)
+        return resid
+
+    def jacobian(pose: np.ndarray) -> np.ndarray:
+        if budget is not None:
+            budget.check()
+        pvec = inner(pose)
+        xy_coords = pvec[keypoint_index]
+        xy_coords[0, :] = 0
+        _, pose_jac, xy_jac = project_xy_jacobian(xy_coords, pvec)
+        jac = np.empty((len(keypoint_index), 2, 8))
+        jac[:, :, pose_cols] = pose_jac
+        dx, dy = span_least_squares(xy_jac[1:, :, 0], xy_jac[1:, :, 1], jac[1:], span_counts)
+        span_ids = np.repeat(np.arange(len(span_counts)), span_counts)
+        jac[1:] -= xy_jac[1:, :, :1] * dx[:, None, :]
+        jac[1:] -= xy_jac[1:, :, 1:] * dy[span_ids][:, None, :]
+        return jac.reshape(-1, 8)
+
+    # The outer problem is small and dense: LM converges in far fewer steps than TRF
+    res = least_squares(
+        residuals,
+        params[:8],
+        jac=jacobian,
+        method="lm" if len(targets) >= 8 else "trf",
+        max_nfev=max_evaluations,
+    )
+    stats = f"{res.njev} Jacobians, {res.nfev} evaluations of 8 parameters"
+    return inner(res.x), 2 * res.cost, stats
+
+
+def run_optimiser(
+    dstpoints: np.ndarray,
+    span_counts: list[int],
+    params: np.ndarray,
+    method: str,
+    max_evaluations: int | None = None,
+    budget: OptimBudget | None = None,
+) -> tuple[np.ndarray, float, str]:
+    """Minimize the keypoint objective from `params` with one optimiser.
+
+    Args:
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin.
+        span_counts: The number of keypoints in each span.
+        params: The initial parameter vector.
+        method: One of `OPTIM_METHODS` ("lm" must have at least as many residuals
+            as parameters).
+        max_evaluations: Stop a least-squares method after this many residual
+            evaluations (None: until converged). Powell is not capped.
+        budget: A budget to record every evaluation in; once it is spent the next
+            evaluation raises `BudgetExhausted`.
+
+    Returns:
+        A tuple `(params, objective, stats)` of the optimised parameters, their
+        objective and a short description of the iterations/evaluations used.
+
+    """
+    from scipy.optimize import least_squares, minimize  # deferred: SciPy dominates import time
+
+    keypoint_index = make_keypoint_index(span_counts)
+    targets = dstpoints.ravel()
+
+    def objective(pvec: np.ndarray) -> float:
+        ppts = project_keypoints(pvec, keypoint_index)
+        value = np.sum((dstpoints - ppts) ** 2)
+        if budget is not None:
+            budget.record(pvec, value)
+        return value
+
+    def residuals(pvec: np.ndarray) -> np.ndarray:
+        resid = project_keypoints(pvec, keypoint_index).ravel() - targets
+        if budget is not None:
+            budget.record(pvec, resid @ resid)
+        return resid
+
+    def jacobian(pvec: np.ndarray):
+        if budget is not None:
+            budget.check()
+        jac = project_keypoints_jacobian(pvec, keypoint_index)
+        return jac.toarray() if method == "lm" else jac  # MINPACK needs a dense array
+
+    if method == "varpro":
+        return run_varpro(dstpoints, span_counts, params, max_evaluations, budget)
+    if method == "powell":
+        res = minimize(objective, params, method="Powell")
+        return res.x, res.fun, f"{res.nit} iterations, {res.nfev} evaluations"
+    # TRF keeps the Jacobian sparse and solves each trust-region step with LSMR,
+    # so an iteration costs time linear in the number of keypoints
+    solver = {"tr_solver": "lsmr"} if method == "trf" else {}
+    res = least_squares(
+        residuals,
+        params,
+        jac=jacobian,
+        method=method,
+        max_nfev=max_evaluations,
+        **solver,
+    )
+    return res.x, 2 * res.cost, f"{res.njev} Jacobians, {res.nfev} evaluations"
+
+
+def multi_start_params(
+    params: np.ndarray,
+    dstpoints: np.ndarray,
+    span_counts: list[int],
+    starts: int,
+) -> list[np.ndarray]:
+    """Make perturbed initial parameter vectors for a multi-start optimisation.
+
+    The first start is `params` itself. The others cycle through the focal length
+    factors of `START_FOCAL_FACTORS` and the cubic slope signs of
+    `START_SLOPE_SIGNS`. The projection's focal length is fixed by
+    `cfg.FOCAL_LENGTH`, so a focal length guess is applied as the camera distance
+    the initial `solvePnP` would have found with it: the translation's z scaled by
+    the factor. The slopes keep their magnitude (at least `START_SLOPE`) with the
+    signs flipped. The span coordinates of each start are refitted to its pose and
+    curvature (`seed_params`).
+
+    Args:
+        params: The initial parameter vector.
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin.
+        span_counts: The number of keypoints in each span.
+        starts: The number of initial vectors to return.
+
+    Returns:
+        A list of `starts` parameter vectors, `params` first.
+
+    """
+    tz = cfg.TVEC_IDX[0] + 2
+    cubic = slice(*cfg.CUBIC_IDX)
+    magnitude = np.maximum(np.abs(params[cubic]), START_SLOPE)
+    candidates = [params]
+    for i in range(1, starts):
+        pose = params.copy()
+        pose[tz] *= START_FOCAL_FACTORS[(i - 1) % len(START_FOCAL_FACTORS)]
+        pose[cubic] = magnitude * START_SLOPE_SIGNS[(i - 1) % len(START_SLOPE_SIGNS)]
+        candidates.append(seed_params(params, pose, dstpoints, span_counts))
+    return candidates
+
+
+def refine_params(
+    dstpoints: np.ndarray,
+    span_counts: list[int],
+    params: np.ndarray,
+    method: str = "powell",
+    coarse_points: int = 0,
+    max_seconds: float = 0.0,
+    max_evaluations: int = 0,
+    verbose: bool = True,
+    deadline: float = 0.0,
+) -> OptimResult:
+    """Run the coarse (optional) and full passes of `optimise_params` from `params`.
+
+    A module-level function, so that the starts of a multi-start optimisation can
+    run in worker processes.
+
+    Args:
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin.
+        span_counts: The number of keypoints in each span.
+        params: The initial parameter vector.
+        method: The optimiser, one of `OPTIM_METHODS`.
+        coarse_points: Keypoints per span in the coarse pass (0: single pass).
+        max_seconds: Wall-time budget of both passes (0: unlimited).
+        max_evaluations: Budget of objective evaluations of both passes (0: unlimited).
+        verbose: Whether to print the timings and objective of each pass.
+        deadline: A `time.time()` after which to stop, shared with the other
+            starts (0: none; see `OptimBudget`).
+
+    Returns:
+        An `OptimResult` with the refined parameters (`params` if both passes
+        failed) and their objective on all keypoints.
+
+    """
+    keypoint_index = make_keypoint_index(span_counts)
+    budget = OptimBudget(max_seconds, max_evaluations, deadline)
+    log = print if verbose else lambda *args: None
+
+    def objective(pvec: np.ndarray) -> float:
+        ppts = project_keypoints(pvec, keypoint_index)
+        return np.sum((dstpoints - ppts) ** 2)
+
+    def choose_method(nparams: int, npts: int) -> str:
+        # LM needs at least as many residuals as parameters
+        return "trf" if method == "lm" and 2 * npts < nparams else method
+
+    def run_pass(*args, **kwargs) -> tuple[np.ndarray | None, float, str, str]:
+        # run_optimiser within the budget: (params, objective, stats, status)
+        budget.new_pass()
+        try:
+            return (*run_optimiser(*args, budget=budget, **kwargs), "converged")
+        except BudgetExhausted:
+            stats = f"budget exhausted after {budget.evaluations} evaluations"
+            return budget.best_params, budget.best_objective, stats, "budget-exhausted"
+        except (ValueError, np.linalg.LinAlgError) as e:
+            return None, np.inf, f"failed: {e}", "fallback"
+
+    initial = objective(params)
+    status = "converged"
+    total_start = dt.now()
+    coarse = coarse_points > 0 and max(span_counts) > coarse_points
+    if coarse:
+        subset = subsample_keypoints(dstpoints, span_counts, params, coarse_points)
+        coarse_method = choose_method(len(subset[2]), len(subset[0]))
+        log(f"  coarse pass: {len(subset[2])} parameters with {coarse_method} ...")
+        start = dt.now()
+        coarse_params, coarse_objective, stats, status = run_pass(
+            *subset,
+            coarse_method,
+            max_evaluations=COARSE_MAX_EVALUATIONS,
+        )
+        if coarse_params is not None:
+            refitted = seed_params(params, coarse_params, dstpoints, span_counts)
+            refitted_objective = objective(refitted)
+        else:
+            refitted_objective = np.inf
+        log(
+            f"  coarse pass took {round((dt.now() - start).total_seconds(), 2)} sec. "
+            f"({stats}), objective is {coarse_objective} "
+            f"({refitted_objective} on all keypoints)",
+        )
+        if refitted_objective < initial:
+            params = refitted
+        else:
+            log("  coarse pass did not help, refining from the initial parameters")
+        status = "converged" if status == "fallback" else status
+
+    if status == "converged":
+        method = choose_method(len(params), len(dstpoints))
+        log("  optimizing", len(params), "parameters with", method, "...")
+        start = dt.now()
+        fine_params, _, stats, status = run_pass(dstpoints, span_counts, params, method)
+        end = dt.now()
+        log(f"  optimization took {round((end - start).total_seconds(), 2)} sec. ({stats})")
+        if coarse:
+            log(f"  total optimization time {round((end - total_start).total_seconds(), 2)} sec.")
+        if fine_params is not None:
+            params = fine_params
+    return OptimResult(
+        params=params,
+        objective=float(objective(params)),
+        status=status,
+        seconds=budget.seconds,
+        evaluations=budget.evaluations,
+    )
+
+
+def get_start_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the worker pool of multi-start optimisations, creating it on first use.
+
+    The pool is kept for the following pages, so its processes start (and import
+    SciPy) once per run instead of once per page. It is replaced if a different
+    number of workers is asked for.
+
+    Args:
+        workers: The number of worker processes.
+
+    Returns:
+        A `ProcessPoolExecutor` with `workers` processes.
+
+    """
+    global start_pool, start_pool_workers
+    if start_pool is None or start_pool_workers != workers:
+        if start_pool is not None:
+            start_pool.shutdown()
+        # Imported before the workers start, so that they inherit it
+        import scipy.optimize  # noqa: F401
+
+        start_pool = ProcessPoolExecutor(max_workers=workers)
+        start_pool_workers = workers
+    return start_pool
+
+
 def optimise_params(
     name: str,
     small: np.ndarray,
@@ -55,11 +575,42 @@ def optimise_params(
     span_counts: list[int],
     params: np.ndarray,
     debug_lvl: int,
-) -> np.ndarray:
+    warm_start: np.ndarray | None = None,
+    method: str = "powell",
+    coarse_points: int = 0,
+    max_seconds: float = 0.0,
+    max_evaluations: int = 0,
+    starts: int = 1,
+    workers: int = 0,
+) -> OptimResult:
     """Refine the parameter vector (params) for page dewarping via optimization.
 
-    Uses scipy's Powell method to minimize the squared distance between
-    `dstpoints` (desired) and the projected points (via `project_keypoints`).
+    Minimizes the squared distance between `dstpoints` (desired) and the projected
+    points (via `project_keypoints`). With `method="powell"` scipy's derivative-free
+    Powell method is used on the scalar objective. With "trf" or "lm", scipy's
+    `least_squares` is given the residual vector and its analytic Jacobian
+    (`project_keypoints_jacobian`), which needs far fewer projections. The Jacobian
+    is sparse (10 nonzeros per row), which "trf" exploits; "lm" densifies it and so
+    scales quadratically with the number of keypoints. "lm" falls back to "trf" when
+    there are fewer residuals than parameters. "varpro" searches over the 8 pose and
+    cubic parameters only, solving for the span coordinates inside (`run_varpro`).
+
+    With `coarse_points`, a first pass solves for the pose and cubic slopes on only
+    that many keypoints per span (`subsample_keypoints`); the span coordinates of
+    the full set are then refitted to that pose (`seed_params`) and the full set is
+    refined from there, unless the coarse result is worse than the starting point.
+
+    The passes share one `OptimBudget`. When it runs out, the best parameters
+    evaluated so far are returned with status "budget-exhausted" (after a coarse
+    pass, refitted to the full keypoint set). If an optimiser fails, or ends worse
+    than it started, the starting parameters are returned with status "fallback".
+
+    With `starts` > 1, the passes are run from that many perturbed initial vectors
+    (`multi_start_params`) in a pool of worker processes (`get_start_pool`), and the
+    result with the lowest objective is kept. The starts share one deadline,
+    `max_seconds` from now; each has its own `max_evaluations`. In a worker process
+    or a thread other than the main one (batch, pipeline and service workers, which
+    already run in parallel), the starts always run one after another in-process.
 
     Args:
         name: A string identifier for debugging/logging.
@@ -68,34 +619,280 @@ def optimise_params(
         span_counts: A list of how many keypoints belong to each text/line span.
         params: An initial parameter vector (rotation, translation, cubic slopes, etc.).
         debug_lvl: The debug verbosity level.
+        warm_start: Optimised parameters of the previous page in a sequence. Its pose
+            and cubic slopes replace those of `params` if that lowers the initial
+            objective; otherwise the cold start from `params` is kept.
+        method: The optimiser, one of `OPTIM_METHODS` (see `Config.OPTIM_METHOD`).
+        coarse_points: Keypoints per span in the coarse pass, or 0 for a single
+            pass over all keypoints (see `Config.OPTIM_COARSE_POINTS`).
+        max_seconds: Wall-time budget of the optimisation, or 0 for none (see
+            `Config.OPTIM_MAX_SECONDS`).
+        max_evaluations: Budget of objective evaluations, or 0 for none (see
+            `Config.OPTIM_MAX_EVALS`).
+        starts: The number of initial vectors to optimise from (see
+            `Config.OPTIM_STARTS`).
+        workers: Worker processes for the starts, 0 for one per CPU or 1 to run
+            them one after another in this process (see `Config.OPTIM_START_WORKERS`);
+            always 1 outside the main thread of the main process.
 
     Returns:
-        A 1D NumPy array of optimized parameters (same shape as `params`).
+        An `OptimResult` with the optimized parameters (same shape as `params`),
+        their objective and the convergence status.
 
     """
+    if method not in OPTIM_METHODS:
+        raise ValueError(f"Unknown OPTIM_METHOD {method!r}")
     keypoint_index = make_keypoint_index(span_counts)
+    start = perf_counter()
 
     def objective(pvec: np.ndarray) -> float:
         ppts = project_keypoints(pvec, keypoint_index)
         return np.sum((dstpoints - ppts) ** 2)
 
-    print("  initial objective is", objective(params))
+    initial = objective(params)
+    print("  initial objective is", initial)
+    if warm_start is not None:
+        seeded = seed_params(params, warm_start, dstpoints, span_counts)
+        seeded_objective = objective(seeded)
+        if seeded_objective < initial:
+            print("  warm start from previous page, objective is", seeded_objective)
+            params, initial = seeded, seeded_objective
+        else:
+            print(f"  warm start objective {seeded_objective} is worse, using cold start")
     if debug_lvl >= 1:
         projpts = project_keypoints(params, keypoint_index)
         display = draw_correspondences(small, dstpoints, projpts)
         debug_show(name, 4, "keypoints before", display)
 
-    print("  optimizing", len(params), "parameters...")
-    start = dt.now()
-    res = minimize(objective, params, method="Powell")
-    end = dt.now()
-    print(f"  optimization took {round((end - start).total_seconds(), 2)} sec.")
-    print(f"  final objective is {res.fun}")
+    options = (method, coarse_points, max_seconds, max_evaluations)
+    if starts > 1:
+        candidates = multi_start_params(params, dstpoints, span_counts, starts)
+        nested = (
+            multiprocessing.parent_process() is not None
+            or threading.current_thread() is not threading.main_thread()
+        )
+        workers = 1 if nested else min(workers or os.cpu_count() or 1, starts)
+        print(f"  optimizing from {starts} starts with {method} ({workers} workers) ...")
+        deadline = time() + max_seconds if max_seconds > 0 else 0.0
+        jobs = [(dstpoints, span_counts, pvec, *options, False, deadline) for pvec in candidates]
+        if workers > 1:
+            results = list(get_start_pool(workers).map(refine_params, *zip(*jobs)))
+        else:
+            results = [refine_params(*job) for job in jobs]
+        for i, result in enumerate(results):
+            print(
+                f"  start {i}: objective {objective(candidates[i])} -> {result.objective} "
+                f"({result.status}, {round(result.seconds, 2)} sec.)",
+            )
+        best = min(range(starts), key=lambda i: results[i].objective)
+        print(f"  keeping start {best}")
+        result = results[best]
+        evaluations = sum(r.evaluations for r in results)
+    else:
+        result = refine_params(dstpoints, span_counts, params, *options)
+        evaluations = result.evaluations
+
+    if not np.isfinite(result.objective) or result.objective > initial:
+        print(
+            f"  optimization failed (objective {result.objective}), "
+            "keeping the initial parameters",
+        )
+        final, status = initial, "fallback"
+    else:
+        params, final, status = result.params, result.objective, result.status
+    print(f"  final objective is {final} ({status})")
 
-    params = res.x
     if debug_lvl >= 1:
         projpts = project_keypoints(params, keypoint_index)
         display = draw_correspondences(small, dstpoints, projpts)
         debug_show(name, 5, "keypoints after", display)
 
-    return params
+    return OptimResult(
+        params=params,
+        objective=float(final),
+        status=status,
+        seconds=perf_counter() - start,
+        evaluations=evaluations,
+    )
+
+
+def optimise_params_stacked(
+    problems: list[tuple[np.ndarray, list[int], np.ndarray]],
+    max_iterations: int = STACKED_MAX_ITERATIONS,
+    ftol: float = 1e-6,
+    damping: np.ndarray | None = None,
+) -> list[OptimResult]:
+    """Optimise the parameters of many pages together in one vectorised solve.
+
+    All pages' keypoints are concatenated (with the index of their page) and every
+    iteration is a handful of NumPy calls over that whole set, so the per-page
+    Python and SciPy overhead of `optimise_params` is paid once per batch instead.
+
+    Each iteration is a Levenberg-Marquardt step per page. The (damped) span and
+    keypoint coordinate block of the normal equations is eliminated in closed form
+    with `span_least_squares`, over the spans of all pages at once, leaving an 8x8
+    Schur complement per page, solved as one stack. The coordinate step then
+    follows from the pose step. Each page keeps its own damping and stops on its
+    own once an accepted step lowers its objective by less than `ftol` (relative).
+    Once three quarters of the pages have stopped, the rest continue as a smaller
+    stack.
+
+    Args:
+        problems: A list of `(dstpoints, span_counts, params)`, one per page, as
+            passed to `optimise_params`. Every page needs at least one span.
+        max_iterations: The most LM iterations of any page.
+        ftol: The relative decrease of the objective below which a page stops.
+        damping: The initial Levenberg-Marquardt damping of each page (default 1e-3).
+
+    Returns:
+        An `OptimResult` per page, in order. Pages still improving after
+        `max_iterations` have status "budget-exhausted"; `seconds` is the time of
+        the whole stacked solve and `evaluations` the page's iterations.
+
+    """
+    start = perf_counter()
+    npages = len(problems)
+    span_counts = [count for _, counts, _ in problems for count in counts]
+    nspans = np.array([len(counts) for _, counts, _ in problems])
+    npts = np.array([sum(counts) for _, counts, _ in problems])
+    span_ids = np.repeat(np.arange(len(span_counts)), span_counts)
+    span_pages = np.repeat(np.arange(npages), nspans)
+    point_pages = np.repeat(np.arange(npages), npts)
+    point_starts = np.concatenate(([0], np.cumsum(npts)[:-1]))
+    # Rows are the page origins (which depend on the pose only), then all keypoints
+    row_pages = np.concatenate((np.arange(npages), point_pages))
+    targets = np.vstack(
+        [dstpoints[:1].reshape(1, 2) for dstpoints, _, _ in problems]
+        + [dstpoints[1:].reshape(-1, 2) for dstpoints, _, _ in problems],
+    )
+    poses = np.array([params[:8] for _, _, params in problems], dtype=float)
+    ycoords = np.concatenate(
+        [params[8 : 8 + len(counts)] for _, counts, params in problems],
+    ).astype(float)
+    xcoords = np.concatenate(
+        [params[8 + len(counts) :] for _, counts, params in problems],
+    ).astype(float)
+
+    def evaluate(poses, xcoords, ycoords):
+        # Residuals, Jacobians and per-page objectives of all rows
+        xy_coords = np.zeros((npages + len(xcoords), 2))
+        xy_coords[npages:, 0] = xcoords
+        xy_coords[npages:, 1] = ycoords[span_ids]
+        image_points, pose_jac, xy_jac = project_xy_jacobian_batch(xy_coords, poses, row_pages)
+        resid = image_points - targets
+        cost = np.bincount(row_pages, np.einsum("nc,nc->n", resid, resid), npages)
+        return resid, pose_jac, xy_jac, cost
+
+    def page_sums(per_row):
+        # Sum (N,...) row terms per page: the origin row plus the page's keypoints
+        return per_row[:npages] + np.add.reduceat(per_row[npages:], point_starts, axis=0)
+
+    resid, pose_jac, xy_jac, cost = evaluate(poses, xcoords, ycoords)
+    initial = cost.copy()
+    damping = np.full(npages, 1e-3) if damping is None else np.array(damping, dtype=float)
+    growth = np.full(npages, 2.0)
+    active = np.ones(npages, dtype=bool)
+    iterations = np.zeros(npages, dtype=int)
+    ybounds = np.cumsum(np.concatenate(([0], nspans)))
+    xbounds = np.cumsum(np.concatenate(([0], npts)))
+
+    def page_params(i):
+        ys, xs = ycoords[ybounds[i] : ybounds[i + 1]], xcoords[xbounds[i] : xbounds[i + 1]]
+        return np.concatenate((poses[i], ys, xs))
+
+    rest, rest_results = [], []
+    for iteration in range(max_iterations):
+        if not active.any():
+            break
+        if 4 * active.sum() <= npages:
+            # Stop paying for the rows of finished pages
+            rest = np.flatnonzero(active)
+            rest_results = optimise_params_stacked(
+                [(problems[i][0], problems[i][1], page_params(i)) for i in rest],
+                max_iterations - iteration,
+                ftol,
+                damping[rest],
+            )
+            break
+        x_jac, y_jac = xy_jac[npages:, :, 0], xy_jac[npages:, :, 1]
+        point_damping = damping[point_pages]
+        dx, dy = span_least_squares(
+            x_jac,
+            y_jac,
+            pose_jac[npages:],
+            span_counts,
+            point_damping,
+        )
+        reduced = pose_jac.copy()
+        reduced[npages:] -= x_jac[:, :, None] * dx[:, None, :]
+        reduced[npages:] -= y_jac[:, :, None] * dy[span_ids][:, None, :]
+        # The damped Schur complement of the coordinate block, and the reduced gradient
+        diag = np.maximum(page_sums(np.einsum("nci,nci->ni", pose_jac, pose_jac)), 1e-12)
+        hess = page_sums(np.einsum("nci,ncj->nij", pose_jac, reduced))
+        hess += (damping[:, None] * diag)[:, :, None] * np.eye(8)
+        grad = page_sums(np.einsum("nci,nc->ni", reduced, resid))
+        step = -np.linalg.solve(hess, grad[:, :, None])[:, :, 0]
+        step[~active] = 0
+
+        rhs = -(resid[npages:] + np.einsum("nci,ni->nc", pose_jac[npages:], step[point_pages]))
+        step_x, step_y = span_least_squares(
+            x_jac,
+            y_jac,
+            rhs[:, :, None],
+            span_counts,
+            point_damping,
+        )
+        trial = (poses + step, xcoords + step_x[:, 0], ycoords + step_y[:, 0])
+        trial_resid, trial_pose_jac, trial_xy_jac, trial_cost = evaluate(*trial)
+        # Gain ratio: the actual over the linearised decrease of the objective
+        linear = resid + np.einsum("nci,ni->nc", pose_jac, step[row_pages])
+        linear[npages:] += x_jac * step_x + y_jac * step_y[span_ids]
+        predicted = cost - np.bincount(row_pages, np.einsum("nc,nc->n", linear, linear), npages)
+        gain = (cost - trial_cost) / np.where(predicted > 0, predicted, np.inf)
+
+        accept = active & (trial_cost < cost)
+        poses[accept] = trial[0][accept]
+        xcoords[accept[point_pages]] = trial[1][accept[point_pages]]
+        ycoords[accept[span_pages]] = trial[2][accept[span_pages]]
+        rows = accept[row_pages]
+        resid[rows], pose_jac[rows], xy_jac[rows] = (
+            trial_resid[rows],
+            trial_pose_jac[rows],
+            trial_xy_jac[rows],
+        )
+        converged = accept & (cost - trial_cost <= ftol * cost)
+        cost[accept] = trial_cost[accept]
+        iterations[active] += 1
+        # Nielsen's update: shrink the damping by how well the model predicted the
+        # decrease, and grow it ever faster while steps keep failing
+        failed = active & ~accept
+        damping[accept] *= np.maximum(1 / 3, 1 - (2 * gain[accept] - 1) ** 3)
+        damping[failed] *= growth[failed]
+        growth[accept], growth[failed] = 2.0, growth[failed] * 2
+        # A page whose steps keep failing has stalled at its minimum
+        active &= ~converged & (damping < 1e12)
+
+    seconds = perf_counter() - start
+    continued = dict(zip(rest, rest_results))
+    results = []
+    for i, (_, _, params) in enumerate(problems):
+        if i in continued:
+            result = continued[i]
+            optimised, final, status = result.params, result.objective, result.status
+            evaluations = iterations[i] + result.evaluations
+        else:
+            optimised, final = page_params(i), cost[i]
+            status = "budget-exhausted" if active[i] else "converged"
+            evaluations = iterations[i]
+        if not np.isfinite(final) or final > initial[i]:
+            optimised, final, status = params, initial[i], "fallback"
+        results.append(
+            OptimResult(
+                params=optimised,
+                objective=float(final),
+                status=status,
+                seconds=seconds,
+                evaluations=int(evaluations),
+            ),
+        )
+    return results
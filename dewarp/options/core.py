@@ -27,6 +27,9 @@ class Config(Struct):
     output size, page margin, debug verbosity, etc.
     """
 
+    # [cache_opts]
+    CACHE_DIR: desc(str, "Directory of the content-addressed result cache ('' disables it)") = ""
+    CACHE_MAX_MB: desc(float, "Evict least recently used cache entries above this size (MB)") = 512.0
     # [camera_opts]
     FOCAL_LENGTH: desc(float, "Normalized focal length of camera") = 1.2
     # [contour_opts]
@@ -50,11 +53,20 @@ class Config(Struct):
     PAGE_MARGIN_Y: desc(int, "Reduced px to ignore near T/B edge") = 20
     # [mask_opts]
     ADAPTIVE_WINSZ: desc(int, "Window size for adaptive threshold in reduced px") = 55
+    # [optim_opts]
+    OPTIM_COARSE_POINTS: desc(int, "Keypoints per span in a coarse first pass (0: single pass)") = 0
+    OPTIM_MAX_EVALS: desc(int, "Objective evaluations allowed per page (0: unlimited)") = 0
+    OPTIM_MAX_SECONDS: desc(float, "Wall time allowed per page's optimisation, in seconds (0: unlimited)") = 0.0
+    OPTIM_METHOD: desc(str, "Optimiser: 'powell', least squares 'trf'/'lm' (analytic Jacobian) or 'varpro'") = "powell"
+    OPTIM_START_WORKERS: desc(int, "Processes for the multi-start runs (0: one per CPU, 1: in-process)") = 0
+    OPTIM_STARTS: desc(int, "Perturbed initial guesses to optimise from, keeping the best (1: single start)") = 1
+    WARM_START: desc(bool, "Seed each page's pose/curvature from the previous page") = False
     # [output_opts]
     OUTPUT_ZOOM: desc(float, "How much to zoom output relative to *original* image") = 1.0
     OUTPUT_DPI: desc(int, "Just affects stated DPI of PNG, not appearance") = 300
     REMAP_DECIMATE: desc(int, "Downscaling factor for remapping image") = 16
     NO_BINARY: desc(int, "Disable output conversion to binary thresholded image") = 0
+    OUTPUT_WRITE: desc(str, "Write output PNG: 'sync', 'async' (background thread) or 'none'") = "sync"
     # [pdf_opts]
     CONVERT_TO_PDF: desc(bool, "Merge dewarped images into a PDF") = False
     # [proj_opts]
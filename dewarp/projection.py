@@ -2,17 +2,129 @@
 
 This module provides a `project_xy` function, which:
 - Constructs a cubic polynomial from alpha/beta slopes.
-- Uses OpenCV's `projectPoints` to map the resulting 3D points into image coordinates.
+- Rotates (Rodrigues), translates and perspective-divides the resulting 3D points
+  into image coordinates, as OpenCV's `projectPoints` would with the camera `K`.
+
+`project_xy_batch` is the vectorised kernel behind it: it projects points for many
+parameter vectors at once, e.g. for finite differences or multi-start optimisation.
+`rodrigues_batch` converts a stack of rotation vectors to rotation matrices.
+
+It also provides `project_xy_jacobian`, which evaluates the same projection together
+with its analytic derivatives, for gradient-based (least-squares) optimisation, and
+`project_xy_jacobian_batch`, which does so for the points of many pages at once
+(with `rodrigues_jacobian_batch` for the rotation derivatives).
 """
 
+from __future__ import annotations
+
 import numpy as np
-from cv2 import projectPoints
+from cv2 import Rodrigues
 
 from dewarp.options.core import cfg
-from dewarp.options.k_opt import K
 
 
-#__all__ = ["project_xy"]
+#__all__ = [
+#    "rodrigues_batch",
+#    "project_xy_batch",
+#    "project_xy",
+#    "cross_matrix",
+#    "rodrigues_jacobian_batch",
+#    "project_xy_jacobian",
+#    "project_xy_jacobian_batch",
+#]
+
+
+# Maps the cubic slopes (alpha, beta) to the coefficients of x, x^2 and x^3 in z(x)
+CUBIC_MONOMIALS = np.array([[1.0, -2.0, 1.0], [0.0, -1.0, 1.0]])
+
+
+def focal_length() -> float:
+    """Return the focal length as stored in `K` (float32), so results match `K(cfg)`."""
+    return float(np.float32(cfg.FOCAL_LENGTH))
+
+
+def rodrigues_batch(rvecs: np.ndarray) -> np.ndarray:
+    """Convert rotation vectors to rotation matrices (vectorised `cv2.Rodrigues`).
+
+    Args:
+        rvecs: A (B,3) array of rotation vectors (axis times angle in radians).
+
+    Returns:
+        A (B,3,3) array of rotation matrices.
+
+    """
+    rvecs = np.asarray(rvecs, dtype=float).reshape((-1, 3))
+    if len(rvecs) == 1:
+        # A single vector (one objective evaluation) is cheaper through OpenCV
+        return Rodrigues(rvecs[0])[0][None]
+    theta = np.sqrt(np.einsum("bi,bi->b", rvecs, rvecs))
+    # A zero vector is the identity: its (meaningless) axis is scaled by sin(0) = 0
+    axis = rvecs / np.where(theta > 0, theta, 1.0)[:, None]
+    cos, sin = np.cos(theta), np.sin(theta)
+    rmats = (1 - cos)[:, None, None] * axis[:, :, None] * axis[:, None, :]
+    rmats[:, (0, 1, 2), (0, 1, 2)] += cos[:, None]
+    kx, ky, kz = (axis * sin[:, None]).T
+    rmats[:, 0, 1] -= kz
+    rmats[:, 0, 2] += ky
+    rmats[:, 1, 0] += kz
+    rmats[:, 1, 2] -= kx
+    rmats[:, 2, 0] -= ky
+    rmats[:, 2, 1] += kx
+    return rmats
+
+
+def project_xy_batch(
+    xy_coords: np.ndarray,
+    pvecs: np.ndarray,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Project page points for a batch of parameter vectors.
+
+    The z-coordinate of each page point (x, y) is the cubic
+    z(x) = (alpha + beta) x^3 - (2 alpha + beta) x^2 + alpha x; the 3D point is
+    rotated and translated into the camera frame and projected to f (X/Z, Y/Z).
+
+    Since z is linear in the monomials of x, the cubic, the rotation and the
+    translation fold into one (5,3) matrix per parameter vector, so the camera
+    coordinates are a single matrix product of the (N,5) design rows
+    (x, x^2, x^3, y, 1) with it. This keeps the number of NumPy calls (the cost for
+    small point counts) independent of both N and B.
+
+    Args:
+        xy_coords: An (N,2) array of page points shared by every parameter vector,
+            or a (B,N,2) array with one set of points per parameter vector.
+        pvecs: A (B,P) array of parameter vectors (a single (P,) vector is B = 1).
+        out: An optional preallocated (B,N,2) float array to write the result into,
+            to avoid an allocation per call in tight loops.
+
+    Returns:
+        A (B,N,2) array of the projected 2D image points (`out` if given).
+
+    """
+    pvecs = np.atleast_2d(pvecs)
+    xy_coords = np.asarray(xy_coords)
+    design = np.empty(xy_coords.shape[:-1] + (5,))
+    design[..., 0] = xy_coords[..., 0]
+    x = design[..., 0]  # float64 even for float32 input
+    np.multiply(x, x, out=design[..., 1])
+    np.multiply(design[..., 1], x, out=design[..., 2])
+    design[..., 3] = xy_coords[..., 1]
+    design[..., 4] = 1
+
+    rmats = rodrigues_batch(pvecs[:, slice(*cfg.RVEC_IDX)])
+    transform = np.empty((len(pvecs), 5, 3))
+    # (alpha, -2 alpha - beta, alpha + beta) scale the rotated z axis
+    coeffs = pvecs[:, slice(*cfg.CUBIC_IDX)] @ CUBIC_MONOMIALS
+    np.multiply(coeffs[:, :, None], rmats[:, None, :, 2], out=transform[:, :3])
+    transform[:, 0] += rmats[:, :, 0]
+    transform[:, 3] = rmats[:, :, 1]
+    transform[:, 4] = pvecs[:, slice(*cfg.TVEC_IDX)]
+    cam = design @ transform
+    if out is None:
+        out = np.empty(cam.shape[:-1] + (2,))
+    np.divide(cam[..., :2], cam[..., 2:], out=out)
+    out *= focal_length()
+    return out
 
 
 def project_xy(xy_coords: np.ndarray, pvec: np.ndarray) -> np.ndarray:
@@ -22,7 +134,7 @@ def project_xy(xy_coords: np.ndarray, pvec: np.ndarray) -> np.ndarray:
     f(1) = 0, f'(1) = beta.
 
     The polynomial is used to determine the z-coordinate of each point in `xy_coords`,
-    which is then projected into image space via `projectPoints`.
+    which is then projected into image space via `project_xy_batch`.
 
     Args:
         xy_coords: An (N,2) array of (x, y) points (float32).
@@ -32,18 +144,137 @@ def project_xy(xy_coords: np.ndarray, pvec: np.ndarray) -> np.ndarray:
         An (N,1,2) array of the projected 2D image points.
 
     """
-    alpha, beta = tuple(pvec[slice(*cfg.CUBIC_IDX)])
-    poly = np.array([alpha + beta, -2 * alpha - beta, alpha, 0])
-
-    xy_coords = xy_coords.reshape((-1, 2))
-    z_coords = np.polyval(poly, xy_coords[:, 0])
-
-    objpoints = np.hstack((xy_coords, z_coords.reshape((-1, 1))))
-    image_points, _ = projectPoints(
-        objpoints,
-        pvec[slice(*cfg.RVEC_IDX)],
-        pvec[slice(*cfg.TVEC_IDX)],
-        K(cfg=cfg),
-        np.zeros(5),
-    )
-    return image_points
+    xy_coords = np.asarray(xy_coords).reshape((-1, 2))
+    return project_xy_batch(xy_coords, pvec).reshape((-1, 1, 2))
+
+
+def cross_matrix(vecs: np.ndarray) -> np.ndarray:
+    """Return the cross-product (skew-symmetric) matrices [v]x of (...,3) vectors."""
+    mats = np.zeros(vecs.shape + (3,))
+    x, y, z = np.moveaxis(vecs, -1, 0)
+    mats[..., 0, 1], mats[..., 0, 2], mats[..., 1, 2] = -z, y, -x
+    mats[..., 1, 0], mats[..., 2, 0], mats[..., 2, 1] = z, -y, x
+    return mats
+
+
+def rodrigues_jacobian_batch(rvecs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Convert rotation vectors to rotation matrices along with their derivatives.
+
+    Uses the closed form of Gallego and Yezzi (2015),
+    dR/dv_k = (v_k [v]x + [v x (I - R) e_k]x) R / |v|^2, which is [e_k]x at v = 0.
+
+    Args:
+        rvecs: A (B,3) array of rotation vectors.
+
+    Returns:
+        A tuple of the (B,3,3) rotation matrices and a (B,3,3,3) array whose [b,k]
+        entry is dR/drvec_k of rotation b (as `cv2.Rodrigues` gives for one vector).
+
+    """
+    rvecs = np.asarray(rvecs, dtype=float).reshape((-1, 3))
+    if len(rvecs) == 1:
+        rmat, rjac = Rodrigues(rvecs[0])
+        return rmat[None], rjac.reshape((1, 3, 3, 3))
+    rmats = rodrigues_batch(rvecs)
+    theta2 = np.einsum("bi,bi->b", rvecs, rvecs)
+    # Row k of (I - R)^T is (I - R) e_k
+    crossed = np.cross(rvecs[:, None, :], np.eye(3) - np.swapaxes(rmats, 1, 2))
+    rjacs = rvecs[:, :, None, None] * cross_matrix(rvecs)[:, None] + cross_matrix(crossed)
+    rjacs = rjacs @ rmats[:, None] / np.where(theta2 > 0, theta2, 1.0)[:, None, None, None]
+    rjacs[theta2 == 0] = cross_matrix(np.eye(3))
+    return rmats, rjacs
+
+
+def project_xy_jacobian(
+    xy_coords: np.ndarray,
+    pvec: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Project page points like `project_xy`, also returning analytic derivatives.
+
+    A page point (x, y) lies on the cubic sheet P = (x, y, z(x)) with
+    z(x) = (alpha + beta) x^3 - (2 alpha + beta) x^2 + alpha x. It is moved into the
+    camera frame as C = R P + t and projected to f (C_x, C_y) / C_z (the principal
+    point of `K` is at the origin and there is no distortion). The chain rule gives
+    the derivatives with respect to the pose (via the Rodrigues Jacobian of R), the
+    cubic slopes (dz/dalpha = x^3 - 2x^2 + x, dz/dbeta = x^3 - x^2) and the page
+    coordinates themselves (dP/dx = (1, 0, z'(x)), dP/dy = (0, 1, 0)).
+
+    Args:
+        xy_coords: An (N,2) array of (x, y) page points.
+        pvec: The parameter vector, from which we extract alpha/beta and rvec/tvec.
+
+    Returns:
+        A tuple of:
+            image_points: An (N,2) array of projected image points.
+            pose_jac: An (N,2,8) array of derivatives with respect to rvec, tvec and
+                the cubic slopes, in the order (rvec, tvec, alpha, beta).
+            xy_jac: An (N,2,2) array of derivatives with respect to each point's own
+                x and y.
+
+    """
+    return project_xy_jacobian_batch(xy_coords, pvec)
+
+
+def project_xy_jacobian_batch(
+    xy_coords: np.ndarray,
+    pvecs: np.ndarray,
+    page_ids: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Evaluate `project_xy_jacobian` for points of several parameter vectors at once.
+
+    Args:
+        xy_coords: An (N,2) array of (x, y) page points.
+        pvecs: A (B,P) array of parameter vectors (a single (P,) vector is B = 1);
+            only the rvec, tvec and cubic slope entries are used, so P may be 8.
+        page_ids: An (N,) array giving the row of `pvecs` each point belongs to
+            (default: all 0).
+
+    Returns:
+        The `(image_points, pose_jac, xy_jac)` tuple of `project_xy_jacobian`, each
+        point projected and differentiated with its own parameter vector.
+
+    """
+    pvecs = np.atleast_2d(pvecs)
+    xy_coords = np.asarray(xy_coords, dtype=float).reshape((-1, 2))
+    if page_ids is None:
+        page_ids = np.zeros(len(xy_coords), dtype=int)
+    x, y = xy_coords[:, 0], xy_coords[:, 1]
+    x2 = x * x
+    # Coefficients of x, x^2 and x^3 in z(x), per point
+    coeffs = (pvecs[:, slice(*cfg.CUBIC_IDX)] @ CUBIC_MONOMIALS)[page_ids]
+    z = coeffs[:, 0] * x + coeffs[:, 1] * x2 + coeffs[:, 2] * x2 * x
+    dz_dx = coeffs[:, 0] + 2 * coeffs[:, 1] * x + 3 * coeffs[:, 2] * x2
+
+    rmats, rjacs = rodrigues_jacobian_batch(pvecs[:, slice(*cfg.RVEC_IDX)])
+    tvecs = pvecs[:, slice(*cfg.TVEC_IDX)]
+    objpoints = np.column_stack((x, y, z))
+    if len(pvecs) == 1:
+        # One rotation shared by every point: no per-point copies of it
+        rmat, rjac = rmats[0], rjacs[0]
+        cam = objpoints @ rmat.T + tvecs[0]
+        # rjac[k] is dR/drvec_k, so dC/drvec_k = (dR/drvec_k) P
+        dcam_drvec = np.einsum("kij,nj->nik", rjac, objpoints)
+    else:
+        rmat, rjac = rmats[page_ids], rjacs[page_ids]
+        cam = np.einsum("nij,nj->ni", rmat, objpoints) + tvecs[page_ids]
+        dcam_drvec = np.einsum("nkij,nj->nik", rjac, objpoints)
+    inv_z = 1.0 / cam[:, 2]
+    focal = focal_length()
+    image_points = focal * cam[:, :2] * inv_z[:, None]
+
+    # d(image point)/d(camera point): (N,2,3)
+    dproj = np.zeros((len(x), 2, 3))
+    dproj[:, 0, 0] = dproj[:, 1, 1] = focal * inv_z
+    dproj[:, :, 2] = -image_points * inv_z[:, None]
+
+    pose_jac = np.empty((len(x), 2, 8))
+    pose_jac[:, :, 0:3] = dproj @ dcam_drvec
+    pose_jac[:, :, 3:6] = dproj
+    dproj_dobj = dproj @ rmat  # (N,2,3): derivative with respect to P
+    pose_jac[:, :, 6] = dproj_dobj[:, :, 2] * (x2 * x - 2 * x2 + x)[:, None]
+    pose_jac[:, :, 7] = dproj_dobj[:, :, 2] * (x2 * x - x2)[:, None]
+
+    xy_jac = np.empty((len(x), 2, 2))
+    xy_jac[:, :, 0] = dproj_dobj[:, :, 0] + dproj_dobj[:, :, 2] * dz_dx[:, None]
+    xy_jac[:, :, 1] = dproj_dobj[:, :, 1]
+    return image_points, pose_jac, xy_jac
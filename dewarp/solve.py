@@ -3,16 +3,28 @@
 This module contains a function (`get_default_params`) that:
 - Uses four corner correspondences to estimate rotation/translation (solvePnP).
 - Includes default cubic slopes and any y/x coordinates from sampled spans.
+
+It also contains `seed_params`, which warm-starts such a vector from the
+optimised parameters of a previous page, and `fit_span_coords`, which solves for
+the span/keypoint coordinates of a fixed pose and curvature (the inner problem of
+the variable-projection solver in `dewarp.optimise`).
 """
 
 import numpy as np
-from cv2 import solvePnP
+from cv2 import Rodrigues, solvePnP
 
 from dewarp.options.core import cfg
 from dewarp.options.k_opt import K
+from dewarp.projection import focal_length, project_xy_jacobian
 
 
-#__all__ = ["get_default_params"]
+#__all__ = [
+#    "get_default_params",
+#    "seed_params",
+#    "back_project",
+#    "span_least_squares",
+#    "fit_span_coords",
+#]
 
 
 def get_default_params(
@@ -60,3 +72,165 @@ def get_default_params(
         + tuple(xcoords),
     )
     return (page_width, page_height), span_counts, params
+
+
+def seed_params(
+    params: np.ndarray,
+    seed: np.ndarray,
+    dstpoints: np.ndarray,
+    span_counts: list[int],
+) -> np.ndarray:
+    """Warm-start an initial guess from the optimised parameters of a previous page.
+
+    Consecutive shots of one book share nearly the same camera pose and page
+    curvature, so the previous page's rvec, tvec and cubic slopes are reused. The
+    span coordinates are page-specific and must agree with that pose, so each
+    keypoint is back-projected onto the seeded page surface (a ray/cubic
+    intersection, refined by Newton's method from the flat-page solution): its
+    x becomes the keypoint's x coordinate and the mean y of a span its y coordinate.
+
+    Args:
+        params: The initial parameter vector from `get_default_params`.
+        seed: The optimised parameter vector of the previous page.
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin.
+        span_counts: The number of keypoints in each span.
+
+    Returns:
+        A copy of `params` with pose and cubic slopes from `seed` and span
+        coordinates fitted to them.
+
+    """
+    seeded = params.copy()
+    for idx in (cfg.RVEC_IDX, cfg.TVEC_IDX, cfg.CUBIC_IDX):
+        seeded[slice(*idx)] = seed[slice(*idx)]
+    x, y = back_project(seeded, dstpoints)
+    nspans = len(span_counts)
+    bounds = np.cumsum([0] + list(span_counts))
+    seeded[8 : 8 + nspans] = [y[a:b].mean() for a, b in zip(bounds, bounds[1:])]
+    seeded[8 + nspans :] = x
+    return seeded
+
+
+def back_project(pvec: np.ndarray, dstpoints: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Intersect the camera rays through the keypoints with the page surface.
+
+    The ray/cubic intersection starts from the flat page (z = 0) and is refined by
+    Newton's method.
+
+    Args:
+        pvec: A parameter vector; only its rvec, tvec and cubic slopes are used.
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin
+            (which is skipped).
+
+    Returns:
+        A tuple `(x, y)` of the page coordinates of the N keypoints.
+
+    """
+    alpha, beta = pvec[slice(*cfg.CUBIC_IDX)]
+    poly = np.array([alpha + beta, -2 * alpha - beta, alpha, 0])
+    dpoly = np.polyder(poly)
+
+    # Camera rays through the keypoints, expressed in page coordinates
+    rmat, _ = Rodrigues(np.asarray(pvec[slice(*cfg.RVEC_IDX)], dtype=float))
+    tvec = pvec[slice(*cfg.TVEC_IDX)]
+    pts = dstpoints[1:].reshape(-1, 2) / focal_length()
+    origin = -rmat.T @ tvec
+    rays = np.hstack((pts, np.ones((len(pts), 1)))) @ rmat  # rows are R^T d
+
+    # Solve origin_z + s * ray_z = f(origin_x + s * ray_x), starting from z = 0
+    s = -origin[2] / rays[:, 2]
+    for _ in range(5):
+        x = origin[0] + s * rays[:, 0]
+        resid = origin[2] + s * rays[:, 2] - np.polyval(poly, x)
+        slope = rays[:, 2] - np.polyval(dpoly, x) * rays[:, 0]
+        s -= resid / slope
+    return origin[0] + s * rays[:, 0], origin[1] + s * rays[:, 1]
+
+
+def span_least_squares(
+    x_jac: np.ndarray,
+    y_jac: np.ndarray,
+    targets: np.ndarray,
+    span_counts: list[int],
+    damping: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Solve the per-span least-squares problems of the keypoint coordinates.
+
+    Keypoint k of span s moves (to first order) by x_jac[k] dx_k + y_jac[k] dy_s in
+    the image. Each span is an independent "arrowhead" system in its own dx_k and
+    one shared dy_s: eliminating each dx_k in closed form leaves a scalar equation
+    for dy_s, so all spans are solved at once without forming any matrix.
+
+    Args:
+        x_jac: An (N,2) array, the image derivative of each keypoint by its x.
+        y_jac: An (N,2) array, the image derivative of each keypoint by its span's y.
+        targets: An (N,2,M) array of M right-hand sides to fit.
+        span_counts: The number of keypoints in each span (all positive).
+        damping: An optional (N,) array of Levenberg-Marquardt factors: the normal
+            equations' diagonal terms of each keypoint (its dx_k and its share of
+            dy_s) are scaled by 1 + damping[k].
+
+    Returns:
+        A tuple `(dx, dy)` of (N,M) and (nspans,M) arrays minimizing, for every
+        right-hand side m, the sum over k of |x_jac[k] dx_k + y_jac[k] dy_s - targets[k,:,m]|^2
+        (plus the damping terms).
+
+    """
+    starts = np.cumsum([0] + list(span_counts[:-1]))
+    span_ids = np.repeat(np.arange(len(span_counts)), span_counts)
+    aa = np.einsum("nc,nc->n", x_jac, x_jac)
+    ab = np.einsum("nc,nc->n", x_jac, y_jac)
+    bb = np.einsum("nc,nc->n", y_jac, y_jac)
+    if damping is not None:
+        aa, bb = aa * (1 + damping), bb * (1 + damping)
+    at = np.einsum("nc,ncm->nm", x_jac, targets)
+    bt = np.einsum("nc,ncm->nm", y_jac, targets)
+    ratio = ab / aa
+    schur = np.add.reduceat(bb - ab * ratio, starts)
+    rhs = np.add.reduceat(bt - ratio[:, None] * at, starts, axis=0)
+    dy = rhs / np.where(schur > 0, schur, np.inf)[:, None]
+    dx = (at - ab[:, None] * dy[span_ids]) / aa[:, None]
+    return dx, dy
+
+
+def fit_span_coords(
+    pvec: np.ndarray,
+    dstpoints: np.ndarray,
+    span_counts: list[int],
+    iterations: int = 2,
+) -> np.ndarray:
+    """Fit the span y and keypoint x coordinates to a fixed pose and curvature.
+
+    The keypoints are back-projected onto the page surface (`back_project`), each
+    span's y is set to the mean of its keypoints' y, and a few Gauss-Newton steps
+    of the (separable, per-span) least-squares problem follow.
+
+    Args:
+        pvec: A parameter vector; its first 8 entries (rvec, tvec and cubic slopes)
+            are kept.
+        dstpoints: The (N+1,1,2) target keypoints, the first being the page origin.
+        span_counts: The number of keypoints in each span.
+        iterations: The number of Gauss-Newton steps.
+
+    Returns:
+        A full parameter vector with the pose of `pvec` and the fitted coordinates.
+
+    """
+    nspans = len(span_counts)
+    span_ids = np.repeat(np.arange(nspans), span_counts)
+    x, y = back_project(pvec, dstpoints)
+    bounds = np.cumsum([0] + list(span_counts))
+    ycoords = np.array([y[a:b].mean() for a, b in zip(bounds, bounds[1:])])
+    targets = dstpoints[1:].reshape(-1, 2)
+    for _ in range(iterations):
+        xy_coords = np.column_stack((x, ycoords[span_ids]))
+        image_points, _, xy_jac = project_xy_jacobian(xy_coords, pvec)
+        dx, dy = span_least_squares(
+            xy_jac[:, :, 0],
+            xy_jac[:, :, 1],
+            (targets - image_points)[:, :, None],
+            span_counts,
+        )
+        x = x + dx[:, 0]
+        ycoords = ycoords + dy[:, 0]
+    return np.concatenate((pvec[:8], ycoords, x))
@@ -1,7 +1,7 @@
 """Spanning and keypoint logic for page dewarping.
 
 This module handles:
-- Determining candidate edges between adjacent contours to form "spans."
+- Finding and scoring candidate edges between adjacent contours to form "spans."
 - Grouping individual contours into spans.
 - Sampling keypoint positions along spans.
 - Computing overall orientation from those keypoints (to find x/y directions).
@@ -11,7 +11,7 @@ This module handles:
 import numpy as np
 from cv2 import LINE_AA, PCACompute, circle, convexHull, drawContours, line, polylines
 
-from dewarp.contours import ContourInfo
+from dewarp.contours import ContourInfo, ContourTable
 from dewarp.debug_utils.colours import cCOLOURS
 from dewarp.debug_utils.viewer import debug_show
 from dewarp.normalisation import norm2pix, pix2norm
@@ -21,7 +21,11 @@ from dewarp.simple_utils import fltp
 
 # __all__ = [
 #     "angle_dist",
-#     "generate_candidate_edge",
+#     "local_overlaps",
+#     "score_candidate_edges",
+#     "candidate_pairs",
+#     "link_contours",
+#     "chain_contours",
 #     "assemble_spans",
 #     "sample_spans",
 #     "keypoints_from_samples",
@@ -30,70 +34,232 @@ from dewarp.simple_utils import fltp
 # ]
 
 
-def angle_dist(angle_b: float, angle_a: float) -> float:
-    """Compute the signed angular distance between two angles.
+def angle_dist(angle_b: np.ndarray, angle_a: np.ndarray) -> np.ndarray:
+    """Compute the (unsigned) angular distance between two arrays of angles.
 
-    The distance is corrected to lie within [-π, π].
+    The signed difference is corrected to lie within [-π, π], which a single
+    correction achieves for angles in [-π, π] (as given by `np.arctan2`).
     """
-    diff = angle_b - angle_a
-    while diff > np.pi:
-        diff -= 2 * np.pi
-    while diff < -np.pi:
-        diff += 2 * np.pi
+    diff = np.subtract(angle_b, angle_a)
+    diff = np.where(diff > np.pi, diff - 2 * np.pi, diff)
+    diff = np.where(diff < -np.pi, diff + 2 * np.pi, diff)
     return np.abs(diff)
 
 
-def generate_candidate_edge(
-    cinfo_a: ContourInfo,
-    cinfo_b: ContourInfo,
-) -> tuple[float, ContourInfo, ContourInfo] | None:
-    """Compute a left-to-right candidate edge between two contours.
+def local_overlaps(
+    contours: ContourTable,
+    first: np.ndarray,
+    second: np.ndarray,
+) -> np.ndarray:
+    """Compute the overlap of contours' local axis ranges with those of other contours.
+
+    The endpoints of each `second` contour are projected onto the tangent axis of
+    the corresponding `first` contour, and that interval overlapped with the
+    `first` contour's own local x-range (as `interval_measure_overlap`).
+
+    Args:
+        contours: The ContourTable holding both sets of contours.
+        first: Indices of the contours whose tangent axes are used.
+        second: Indices of the contours projected onto them.
+
+    Returns:
+        The 1D overlaps along the tangent axes (negative where there is a gap).
+
+    """
+    centers, tangents = contours.centers[first], contours.tangents[first]
+    xmin = ((contours.points0[second] - centers) * tangents).sum(axis=1)
+    xmax = ((contours.points1[second] - centers) * tangents).sum(axis=1)
+    xrngs = contours.local_xrngs[first]
+    return np.minimum(xrngs[:, 1], xmax) - np.maximum(xrngs[:, 0], xmin)
+
+
+def score_candidate_edges(
+    contours: ContourTable,
+    first: np.ndarray,
+    second: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score the left-to-right candidate edges between many pairs of contours.
+
+    In each pair we want the left contour to come before the right one, so the left
+    contour's successor is the right one and the right one's predecessor is the
+    left. Specifically, the right endpoint of the right contour should be to the
+    right of the left endpoint of the left contour: the pair `(first, second)` is
+    taken in that order unless `second` fails this, in which case it is swapped.
+    Then we compute how far apart they are, how much they overlap, and how
+    different their orientations are. The edges that pass the `EDGE_MAX_*`
+    thresholds are kept, with a score combining length and angle.
+
+    Args:
+        contours: The ContourTable holding the contours.
+        first: Indices of the first contour of each pair.
+        second: Indices of the second contour of each pair.
+
+    Returns:
+        A tuple `(scores, left, right)` of the kept edges (lower scores are better),
+        where `left` and `right` are the contour indices at each end of the edge.
 
-    We want `cinfo_a` (left) to come before `cinfo_b` (right), so `cinfo_a`’s successor
-    is `cinfo_b` and `cinfo_b`’s predecessor is `cinfo_a`. Specifically, the right
-    endpoint of `cinfo_b` should be to the right of the left endpoint of `cinfo_a`.  If
-    not, we swap them. Then we compute how far apart they are, how much they overlap,
-    and how different their orientations are. If these checks pass certain thresholds,
-    we return `(score, cinfo_a, cinfo_b)`, otherwise `None`.
     """
-    if cinfo_a.point0[0] > cinfo_b.point1[0]:
-        cinfo_a, cinfo_b = cinfo_b, cinfo_a
-    x_overlap_a = cinfo_a.local_overlap(cinfo_b)
-    x_overlap_b = cinfo_b.local_overlap(cinfo_a)
-    overall_tangent = cinfo_b.center - cinfo_a.center
-    overall_angle = np.arctan2(overall_tangent[1], overall_tangent[0])
+    swap = contours.points0[first, 0] > contours.points1[second, 0]
+    left = np.where(swap, second, first)
+    right = np.where(swap, first, second)
+    x_overlap = np.maximum(
+        local_overlaps(contours, left, right),
+        local_overlaps(contours, right, left),
+    )
+    overall_tangent = contours.centers[right] - contours.centers[left]
+    overall_angle = np.arctan2(overall_tangent[:, 1], overall_tangent[:, 0])
     delta_angle = np.divide(
-        max(
-            angle_dist(cinfo_a.angle, overall_angle),
-            angle_dist(cinfo_b.angle, overall_angle),
+        np.maximum(
+            angle_dist(contours.angles[left], overall_angle),
+            angle_dist(contours.angles[right], overall_angle),
         )
         * 180,
         np.pi,
     )
-    # We want the largest overlap in x to be small
-    x_overlap = max(x_overlap_a, x_overlap_b)
-    dist = np.linalg.norm(cinfo_b.point0 - cinfo_a.point1)
-    if not (
-        dist > cfg.EDGE_MAX_LENGTH
-        or x_overlap > cfg.EDGE_MAX_OVERLAP
-        or delta_angle > cfg.EDGE_MAX_ANGLE
-    ):
-        score = dist + delta_angle * cfg.EDGE_ANGLE_COST
-        return (score, cinfo_a, cinfo_b)
-    return None
+    gap = contours.points0[right] - contours.points1[left]
+    dist = np.sqrt((gap * gap).sum(axis=1))
+    keep = ~(
+        (dist > cfg.EDGE_MAX_LENGTH)
+        | (x_overlap > cfg.EDGE_MAX_OVERLAP)
+        | (delta_angle > cfg.EDGE_MAX_ANGLE)
+    )
+    scores = dist[keep] + delta_angle[keep] * cfg.EDGE_ANGLE_COST
+    return scores, left[keep], right[keep]
+
+
+def link_contours(
+    scores: np.ndarray,
+    left: np.ndarray,
+    right: np.ndarray,
+    ranks: np.ndarray,
+) -> tuple[list[int], list[int]]:
+    """Link contours into chains along the best-scoring candidate edges.
+
+    Edges are taken in order of score, and an edge joins its contours only if its
+    left contour has no successor yet and its right contour no predecessor. Edges
+    with equal scores are taken in order of the `ranks` of their left, then right,
+    contours, so the result does not depend on the order of the candidate edges.
+
+    Args:
+        scores: The scores of the candidate edges (lower is better).
+        left: The contour index at the left end of each edge.
+        right: The contour index at the right end of each edge.
+        ranks: A distinct tie-breaking rank for every contour.
+
+    Returns:
+        A tuple `(succ, pred)` of lists giving the index of each contour's
+        successor and predecessor, or -1 where it has none.
+
+    """
+    succ = [-1] * len(ranks)
+    pred = [-1] * len(ranks)
+    ranking = np.lexsort((ranks[right], ranks[left], scores))
+    for cinfo_a, cinfo_b in zip(left[ranking].tolist(), right[ranking].tolist()):
+        # If both left and right are unassigned, join them
+        if succ[cinfo_a] < 0 and pred[cinfo_b] < 0:
+            succ[cinfo_a] = cinfo_b
+            pred[cinfo_b] = cinfo_a
+    return succ, pred
+
+
+def chain_contours(
+    order: np.ndarray,
+    succ: list[int],
+    pred: list[int],
+) -> list[list[int]]:
+    """Walk linked contours into chains, visiting each contour once.
+
+    Starting from the first contour in `order` not yet visited, we follow its
+    predecessors back to the head of its chain, then follow successors to the
+    end of the chain, marking each contour as visited.
+
+    Args:
+        order: The contour indices in the order in which to start chains.
+        succ: Each contour's successor index (or -1), from `link_contours`.
+        pred: Each contour's predecessor index (or -1), from `link_contours`.
+
+    Returns:
+        A list of chains, each a list of contour indices from left to right.
+
+    """
+    visited = [False] * len(succ)
+    chains = []
+    for start in order.tolist():
+        if visited[start]:
+            continue
+        # keep following predecessors until none exists (or they loop back)
+        head = start
+        while pred[head] >= 0 and pred[head] != start:
+            head = pred[head]
+        # follow successors til end of chain
+        chain = []
+        cinfo = head
+        while cinfo >= 0 and not visited[cinfo]:
+            visited[cinfo] = True
+            chain.append(cinfo)
+            cinfo = succ[cinfo]
+        chains.append(chain)
+    return chains
+
+
+def candidate_pairs(
+    points0: np.ndarray,
+    points1: np.ndarray,
+    max_length: float,
+) -> np.ndarray:
+    """Find the pairs of contours close enough to be joined by a candidate edge.
+
+    An edge runs from the right endpoint (`point1`) of its left contour to the left
+    endpoint (`point0`) of its right contour, and is rejected if it is longer than
+    `max_length`. A k-d tree over the endpoints finds every pair with such an
+    endpoint distance within `max_length` (in either order), so only those pairs
+    need to be scored (see `score_candidate_edges`).
+
+    Args:
+        points0: An (n, 2) array of the contours' left endpoints.
+        points1: An (n, 2) array of the contours' right endpoints.
+        max_length: The maximum length of an edge (`EDGE_MAX_LENGTH`).
+
+    Returns:
+        An (m, 2) integer array of contour index pairs `(i, j)` with `j < i`,
+        in lexicographic order.
+
+    """
+    # deferred: SciPy dominates import time
+    from scipy.spatial import cKDTree
+
+    if len(points0) < 2:
+        return np.zeros((0, 2), dtype=np.intp)
+    # Slightly enlarged so that rounding never drops a pair at exactly `max_length`
+    # (`score_candidate_edges` applies the exact threshold).
+    near = cKDTree(points1).sparse_distance_matrix(
+        cKDTree(points0),
+        max_length * (1 + 1e-9),
+        output_type="ndarray",
+    )
+    first, second = near["i"].astype(np.intp), near["j"].astype(np.intp)
+    # Each unordered pair as the single key `i * n + j` with j < i, for `np.unique`
+    keys = np.unique(
+        np.maximum(first, second) * len(points0) + np.minimum(first, second),
+    )
+    keys = keys[keys // len(points0) != keys % len(points0)]
+    return np.column_stack(np.divmod(keys, len(points0)))
 
 
 def assemble_spans(
     name: str,
     small: np.ndarray,
     pagemask: np.ndarray,
-    cinfo_list: list[ContourInfo],
+    contours: ContourTable,
 ) -> list[list[ContourInfo]]:
-    """Assemble spans of contours from a list of ContourInfo objects.
+    """Assemble spans of contours from a ContourTable.
 
-    A 'span' is a left-to-right chain of contours. We generate candidate edges,
-    sort them by a "score," and build spans by linking successors/predecessors.
-    Spans are retained only if their total width exceeds `SPAN_MIN_WIDTH`.
+    A 'span' is a left-to-right chain of contours. We generate candidate edges
+    between nearby contours (see `candidate_pairs`), sort them by a "score," and
+    build spans by linking successors/predecessors (see `link_contours` and
+    `chain_contours`). The table itself is not modified, so the same contours can
+    be assembled again. Spans are retained only if their total width exceeds
+    `SPAN_MIN_WIDTH`.
 
     If DEBUG_LEVEL >= 2, the resulting spans are visualized.
 
@@ -101,59 +267,38 @@ def assemble_spans(
         name: A string identifier used for debug display.
         small: A downsampled image (for visualization).
         pagemask: A mask for the page region.
-        cinfo_list: A list of ContourInfo objects to link into spans.
+        contours: The ContourTable of contours to link into spans.
 
     Returns:
         A list of spans, where each span is a list of ContourInfo objects.
 
     """
-    cinfo_list = sorted(cinfo_list, key=lambda cinfo: cinfo.rect[1])
-    candidate_edges = []
-    for i, cinfo_i in enumerate(cinfo_list):
-        for j in range(i):
-            # note e is of the form (score, left_cinfo, right_cinfo)
-            edge = generate_candidate_edge(cinfo_i, cinfo_list[j])
-            if edge is not None:
-                candidate_edges.append(edge)
-
-    # Sort candidate edges by score (lower is better)
-    candidate_edges.sort(key=lambda e: e[0])
-
-    # TODO: implement comparison operators on ContourInfo class to permit tie breaking,
-    # see: https://github.com/lmmx/page-dewarp/pull/6/
-
-    # Link contours using successor/predecessor
-    for _, cinfo_a, cinfo_b in candidate_edges:
-        # If both left and right are unassigned, join them
-        if cinfo_a.succ is None and cinfo_b.pred is None:
-            cinfo_a.succ = cinfo_b
-            cinfo_b.pred = cinfo_a
+    order = np.argsort(contours.rects[:, 1], kind="stable")
+    pairs = candidate_pairs(
+        contours.points0[order],
+        contours.points1[order],
+        cfg.EDGE_MAX_LENGTH,
+    )
+    scores, lefts, rights = score_candidate_edges(
+        contours,
+        order[pairs[:, 0]],
+        order[pairs[:, 1]],
+    )
+    # Break ties between equal scores by reading order (top to bottom, left to right)
+    ranks = np.empty(len(contours), dtype=np.intp)
+    ranks[np.lexsort((contours.rects[:, 0], contours.rects[:, 1]))] = np.arange(len(ranks))
+    succ, pred = link_contours(scores, lefts, rights, ranks)
 
-    # Build spans by walking from each "head" to the end
+    # Build spans from the chains of linked contours
+    widths = (contours.local_xrngs[:, 1] - contours.local_xrngs[:, 0]).tolist()
     spans = []
-    while cinfo_list:
-        # get the first on the list
-        cinfo = cinfo_list[0]
-        # keep following predecessors until none exists
-        while cinfo.pred:
-            cinfo = cinfo.pred
-
-        # start a new span
-        cur_span = []
+    for chain in chain_contours(order, succ, pred):
         width = 0.0
-        # follow successors til end of span
-        while cinfo:
-            # remove from list (sadly making this loop *also* O(n^2)
-            cinfo_list.remove(cinfo)
-            # add to span
-            cur_span.append(cinfo)
-            width += cinfo.local_xrng[1] - cinfo.local_xrng[0]
-            # set successor
-            cinfo = cinfo.succ
-
+        for cinfo in chain:
+            width += widths[cinfo]
         # add if long enough
         if width > cfg.SPAN_MIN_WIDTH:
-            spans.append(cur_span)
+            spans.append([contours[cinfo] for cinfo in chain])
 
     if cfg.DEBUG_LEVEL >= 2:
         visualize_spans(name, small, pagemask, spans)
@@ -167,35 +312,41 @@ def sample_spans(
 ) -> list[np.ndarray]:
     """Extract regularly spaced keypoints from each span.
 
-    Within each contour's bounding rectangle, we measure the vertical average
-    of pixels in the contour's mask at certain horizontal steps. We then convert
-    all points to normalized coordinates.
+    Within each contour's bounding rectangle, we take the vertical average of the
+    contour's pixels at certain horizontal steps, from the per-column sums held in
+    its ContourTable. The sample positions of all the spans are gathered at once
+    into a single array, and converted to normalized coordinates.
 
     Args:
         shape: The (height, width) of the downsampled image.
-        spans: A list of spans, where each span is a list of ContourInfo objects.
+        spans: A list of spans, where each span is a list of ContourInfo objects
+            (all from the same ContourTable).
 
     Returns:
-        A list of arrays, each array containing the sampled points (in normalized coords).
+        A list of arrays, each array containing the sampled points of a span (in
+        normalized coords). The arrays are consecutive views of one float32 array.
 
     """
-    span_points = []
-    for span in spans:
-        contour_points = []
-        for cinfo in span:
-            yvals = np.arange(cinfo.mask.shape[0]).reshape((-1, 1))
-            totals = (yvals * cinfo.mask).sum(axis=0)
-            means = np.divide(totals, cinfo.mask.sum(axis=0))
-            xmin, ymin = cinfo.rect[:2]
-            step = cfg.SPAN_PX_PER_STEP
-            start = np.floor_divide((np.mod((len(means) - 1), step)), 2)
-            contour_points.extend(
-                [(x + xmin, means[x] + ymin) for x in range(start, len(means), step)],
-            )
-        contour_points = np.array(contour_points, dtype=np.float32).reshape((-1, 1, 2))
-        contour_points = pix2norm(shape, contour_points)
-        span_points.append(contour_points)
-    return span_points
+    if not spans:
+        return []
+    contours = spans[0][0].table
+    rows = np.array([cinfo.index for span in spans for cinfo in span], dtype=np.intp)
+    step = cfg.SPAN_PX_PER_STEP
+    xmin, ymin, width, _ = contours.rects[rows].T
+    start = np.floor_divide(np.mod(width - 1, step), 2)
+    # Offsets of each contour's samples (every `step` columns from `start`)
+    offsets = np.zeros(len(rows) + 1, dtype=np.intp)
+    np.cumsum((width - start + step - 1) // step, out=offsets[1:])
+    sample_rows = np.repeat(np.arange(len(rows)), np.diff(offsets))
+    x = start[sample_rows] + step * (np.arange(offsets[-1]) - offsets[sample_rows])
+    columns = contours.column_starts[rows][sample_rows] + x
+    means = np.divide(contours.column_ysums[columns], contours.column_counts[columns])
+    contour_points = np.empty((offsets[-1], 1, 2), dtype=np.float32)
+    contour_points[:, 0, 0] = x + xmin[sample_rows]
+    contour_points[:, 0, 1] = means + ymin[sample_rows]
+    contour_points = pix2norm(shape, contour_points)
+    span_ends = offsets[np.cumsum([len(span) for span in spans])]
+    return np.split(contour_points, span_ends[:-1])
 
 
 def keypoints_from_samples(
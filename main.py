@@ -3,17 +3,24 @@ import sys
 import glob
 from pathlib import Path
 import cv2
+import numpy as np
 import shutil
 import argparse
 
-import pytesseract
 from dewarp.image import WarpedImage
 from dewarp.options.core import Config
 
 #윈도우 teesract 경로
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 #mac teesract 경로
-#pytesseract.pytesseract.tesseract_cmd = r"/opt/homebrew/Cellar/tesseract/5.5.1/bin/tesseract"
+#TESSERACT_CMD = r"/opt/homebrew/Cellar/tesseract/5.5.1/bin/tesseract"
+
+
+def load_pytesseract():
+    # pytesseract(와 PIL)는 OCR 을 실제로 실행할 때 처음 임포트해서 시작 시간을 줄임
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+    return pytesseract
 
 def get_next_result_directory(output_dir, output_name):
     existing_dirs = glob.glob(str(output_dir / f"{output_name}*"))
@@ -41,143 +48,187 @@ def get_next_result_directory(output_dir, output_name):
     return max(numbers) + 1
 
 
-def perform_ocr(image_path, output_dir, lang='kor+eng', oem=2, psm=6):
-    config = f'--oem {oem} --psm {psm}'
-    try:
+def enhance_for_ocr(gray):
+    # OCR 전처리: 노이즈 제거 후 CLAHE 대비 향상 (perform_ocr, service.py 공용)
+    denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    enhanced = clahe.apply(denoised)
+    return denoised, enhanced
+
+
+def save_ocr_results(output_dir, page_text, hocr_data):
+    # 텍스트 파일 저장
+    output_txt_path = Path(output_dir) / "ocr_result.txt"
+    with open(output_txt_path, 'w', encoding='utf-8') as f:
+        f.write(page_text)
+    
+    # HTML 포맷?의 OCR 결과
+    hocr_output = Path(output_dir) / "ocr_result.html"
+    with open(hocr_output, 'wb') as f:
+        f.write(hocr_data)
+    return output_txt_path
+
+
+def prepare_ocr_input(image_path, output_dir):
+    # OCR 입력 준비: 이미지 로드, 전처리(그레이스케일/노이즈 제거/대비 향상/이진화)와 디버깅 이미지 저장
+    # 디워핑 결과 배열을 바로 받으면 PNG 저장/재로딩 없이 처리
+    if isinstance(image_path, np.ndarray):
+        img = image_path
+    else:
         img = cv2.imread(str(image_path))
-        if img is None:
-            raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
-        
-        debug_dir = Path(output_dir) / "ocr_debug"
-        debug_dir.mkdir(exist_ok=True)
-        
-        # 1. 원본 이미지 저장
-        cv2.imwrite(str(debug_dir / "1_original.png"), img)
-        
-        # 2. 그레이스케일 변환
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        cv2.imwrite(str(debug_dir / "2_grayscale.png"), gray)
-        
-        # 3. 노이즈 제거
-        denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-        cv2.imwrite(str(debug_dir / "3_denoised.png"), denoised)
-        
-        # 4. 대비 향상
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(denoised)
-        cv2.imwrite(str(debug_dir / "4_contrast_enhanced.png"), enhanced)
-        
-        # 5. 이진화
-        _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        cv2.imwrite(str(debug_dir / "5_binary.png"), binary)
-        
-        # Tesseract 페이지 분할 시각화
-        # 6. 페이지 분석 결과 시각화 (시각화용 이미지 생성)
-        #page_img = img.copy()
-        
-        # Tesseract의 --psm 옵션 설명
-        # 1: 자동 페이지 분할, OSD 적용
-        # 3: 자동 페이지 분할, OSD 없음 (기본값)
-        # 11: 텍스트 블록으로 취급, OSD 없음
-        
-        # 7. Tesseract 데이터 추출 (블록, 단락, 라인, 단어, 문자 정보)
-        data = pytesseract.image_to_data(
-            enhanced, 
-            lang=lang, 
-            output_type=pytesseract.Output.DICT,
-            config=config  # LSTM 모델 사용 및 단일 텍스트 블록으로 처리
-        )
-        # 8. 텍스트 블록 시각화
-        blocks_img = img.copy()
-        n_boxes = len(data['level'])
-        
-        
-        for i in range(n_boxes):
-            level = data['level'][i]
-            # 레벨 1: 페이지, 2: 블록, 3: 단락, 4: 라인, 5: 단어
-            
-            x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+    if img is None:
+        raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
+    if img.ndim == 2:
+        img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    
+    debug_dir = Path(output_dir) / "ocr_debug"
+    debug_dir.mkdir(exist_ok=True)
+    
+    # 1. 원본 이미지 저장
+    cv2.imwrite(str(debug_dir / "1_original.png"), img)
+    
+    # 2. 그레이스케일 변환
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    cv2.imwrite(str(debug_dir / "2_grayscale.png"), gray)
+    
+    # 3. 노이즈 제거, 4. 대비 향상
+    denoised, enhanced = enhance_for_ocr(gray)
+    cv2.imwrite(str(debug_dir / "3_denoised.png"), denoised)
+    cv2.imwrite(str(debug_dir / "4_contrast_enhanced.png"), enhanced)
+    
+    # 5. 이진화
+    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    cv2.imwrite(str(debug_dir / "5_binary.png"), binary)
+    
+    # Tesseract 페이지 분할 시각화
+    # 6. 페이지 분석 결과 시각화 (시각화용 이미지 생성)
+    #page_img = img.copy()
+    
+    # Tesseract의 --psm 옵션 설명
+    # 1: 자동 페이지 분할, OSD 적용
+    # 3: 자동 페이지 분할, OSD 없음 (기본값)
+    # 11: 텍스트 블록으로 취급, OSD 없음
+    return img, enhanced, debug_dir
+
+
+def finish_ocr(img, data, page_text, hocr_data, output_dir, debug_dir):
+    # 인식 결과(블록/라인/단어) 시각화와 텍스트/hOCR 저장
+    # 8. 텍스트 블록 시각화
+    blocks_img = img.copy()
+    n_boxes = len(data['level'])
+    
+    
+    for i in range(n_boxes):
+        level = data['level'][i]
+        # 레벨 1: 페이지, 2: 블록, 3: 단락, 4: 라인, 5: 단어
         
-            if level == 2:
-                cv2.rectangle(blocks_img, (x, y), (x + w, y + h), (0, 255, 0), 2)
-            
-        cv2.imwrite(str(debug_dir / "6_text_blocks.png"), blocks_img)
+        x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+    
+        if level == 2:
+            cv2.rectangle(blocks_img, (x, y), (x + w, y + h), (0, 255, 0), 2)
         
-        # 9. 텍스트 라인 시각화
-        lines_img = img.copy()
-        for i in range(n_boxes):
-            level = data['level'][i]
-            x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
-            
-            if level == 4:
-                cv2.rectangle(lines_img, (x, y), (x + w, y + h), (0, 0, 255), 1)
-                # 기준선 표시 (라인의 약 3/4 지점)
-                baseline_y = y + int(h * 0.75)
-                cv2.line(lines_img, (x, baseline_y), (x + w, baseline_y), (255, 0, 0), 1)
-                
-        cv2.imwrite(str(debug_dir / "7_text_lines.png"), lines_img)
+    cv2.imwrite(str(debug_dir / "6_text_blocks.png"), blocks_img)
+    
+    # 9. 텍스트 라인 시각화
+    lines_img = img.copy()
+    for i in range(n_boxes):
+        level = data['level'][i]
+        x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
         
-        # 10. 단어 시각화
-        words_img = img.copy()
-        for i in range(n_boxes):
-            level = data['level'][i]
-            x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+        if level == 4:
+            cv2.rectangle(lines_img, (x, y), (x + w, y + h), (0, 0, 255), 1)
+            # 기준선 표시 (라인의 약 3/4 지점)
+            baseline_y = y + int(h * 0.75)
+            cv2.line(lines_img, (x, baseline_y), (x + w, baseline_y), (255, 0, 0), 1)
             
-            if level == 5:
-                cv2.rectangle(words_img, (x, y), (x + w, y + h), (0, 255, 255), 1)
-                
-        cv2.imwrite(str(debug_dir / "8_words.png"), words_img)
-        
-        # 11. 특수 문자 인식 결과 시각화
-        symbols_img = img.copy()
+    cv2.imwrite(str(debug_dir / "7_text_lines.png"), lines_img)
+    
+    # 10. 단어 시각화
+    words_img = img.copy()
+    for i in range(n_boxes):
+        level = data['level'][i]
+        x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
         
-        # 신뢰도가 높은 단어만
-        for i in range(n_boxes):
-            level = data['level'][i]
-            text = data['text'][i]
-            conf = int(data['conf'][i])
-            x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+        if level == 5:
+            cv2.rectangle(words_img, (x, y), (x + w, y + h), (0, 255, 255), 1)
             
-            if level == 5 and text and conf > 60:  # 신뢰도 60% 이상만만
-                cv2.putText(symbols_img, text, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
-                
-        cv2.imwrite(str(debug_dir / "9_recognized_text.png"), symbols_img)
-        
-        
-        text = pytesseract.image_to_string(
-            enhanced, 
-            lang=lang,
-            config=config  # LSTM 모델 사용 및 단일 텍스트 블록으로 처리
-        )
-        # 텍스트 파일 저장
-        output_txt_path = Path(output_dir) / "ocr_result.txt"
-        with open(output_txt_path, 'w', encoding='utf-8') as f:
-            f.write(text)
+    cv2.imwrite(str(debug_dir / "8_words.png"), words_img)
+    
+    # 11. 특수 문자 인식 결과 시각화
+    symbols_img = img.copy()
+    
+    # 신뢰도가 높은 단어만
+    for i in range(n_boxes):
+        level = data['level'][i]
+        text = data['text'][i]
+        conf = int(data['conf'][i])
+        x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
         
-        # HTML 포맷?의 OCR 결과
-        hocr_output = Path(output_dir) / "ocr_result.html"
-        hocr_data = pytesseract.image_to_pdf_or_hocr(
-            enhanced, 
-            extension='hocr', 
-            lang=lang,
-            config=config  # LSTM 모델 사용
-        )
-        with open(hocr_output, 'wb') as f:
-            f.write(hocr_data)
+        if level == 5 and text and conf > 60:  # 신뢰도 60% 이상만만
+            cv2.putText(symbols_img, text, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
             
-        print(f"OCR 저장 경로: {output_txt_path}")
-        print(f"OCR 디버깅 경로로: {debug_dir}")
-        
-        return text, debug_dir
+    cv2.imwrite(str(debug_dir / "9_recognized_text.png"), symbols_img)
+    
+    
+    output_txt_path = save_ocr_results(output_dir, page_text, hocr_data)
         
+    print(f"OCR 저장 경로: {output_txt_path}")
+    print(f"OCR 디버깅 경로로: {debug_dir}")
+    
+    return page_text, debug_dir
+
+
+def perform_ocr(image_path, output_dir, lang='kor+eng', oem=2, psm=6, engine=None, cache=None, cache_key=None):
+    # engine: ocr_engine 의 OCR 엔진 (없으면 페이지마다 tesseract 를 실행하는 기본 엔진)
+    # cache, cache_key: 디워핑 결과 캐시 (WarpedImage.cache / cache_key), 같은 엔진 설정의 OCR 결과를 재사용
+    return perform_ocr_many([(image_path, output_dir, cache, cache_key)], lang=lang, oem=oem, psm=psm, engine=engine)[0]
+
+
+def perform_ocr_many(pages, lang='kor+eng', oem=2, psm=6, engine=None):
+    # 여러 페이지를 OCR: pages 는 (image_path, output_dir, cache, cache_key) 목록, 페이지마다 (page_text, debug_dir) 반환
+    # 캐시에 없는 페이지는 engine.recognise_many 한 번으로 함께 인식 (listfile 엔진은 tesseract 실행 한 번)
+    load_pytesseract()
+    if engine is None:
+        from ocr_engine import SubprocessEngine
+        engine = SubprocessEngine(lang=lang, oem=oem, psm=psm)
+    results = [(None, None)] * len(pages)
+    todo = []
+    for i, (image_path, output_dir, cache, cache_key) in enumerate(pages):
+        if cache is not None and cache_key is not None:
+            cached = cache.get_ocr(cache_key, engine.signature)
+            if cached is not None:
+                # 캐시 적중: 인식과 전처리, 디버깅 이미지 생성을 모두 건너뜀
+                _, page_text, hocr_data = cached
+                output_txt_path = save_ocr_results(output_dir, page_text, hocr_data)
+                print(f"OCR 결과 캐시 사용: {output_txt_path}")
+                results[i] = (page_text, None)
+                continue
+        try:
+            todo.append((i, *prepare_ocr_input(image_path, output_dir)))
+        except Exception as e:
+            print(f"OCR 처리 중 오류 발생: {e}")
+    if not todo:
+        return results
+
+    try:
+        # 7. Tesseract 데이터 추출 (블록, 단락, 라인, 단어, 문자 정보)
+        # 텍스트와 hOCR도 같은 인식 결과에서 함께 생성
+        recognised = engine.recognise_many([enhanced for _, _, enhanced, _ in todo])  # LSTM 모델 사용 및 단일 텍스트 블록으로 처리
     except Exception as e:
         print(f"OCR 처리 중 오류 발생: {e}")
-        return None, None
+        return results
+    for (i, img, _, debug_dir), (data, page_text, hocr_data) in zip(todo, recognised):
+        image_path, output_dir, cache, cache_key = pages[i]
+        try:
+            if cache is not None and cache_key is not None:
+                cache.put_ocr(cache_key, engine.signature, data, page_text, hocr_data)
+            finish_ocr(img, data, page_text, hocr_data, output_dir, debug_dir)
+            results[i] = (page_text, debug_dir)
+        except Exception as e:
+            print(f"OCR 처리 중 오류 발생: {e}")
+    return results
 
-def main(
-    input="./input/image.png",  # 입력 이미지 파일 경로
-    output="./output",  # 출력 디렉토리 경로
-    name="result",  # 결과 폴더 이름
+def make_config(
     focal=1.2,  # 카메라의 정규화된 초점거리
     tw=15,  # 검출할 텍스트 윤곽선의 최소 폭 (축소된 픽셀 단위)
     th=2,  # 검출할 텍스트 윤곽선의 최소 높이 (축소된 픽셀 단위)
@@ -204,28 +255,17 @@ def main(
     cv_idx=(6,8),  # 매개변수 벡터에서 큐빅 기울기의 인덱스 범위
     span_w=30,  # 스팬의 최소 폭 (축소된 픽셀 단위)
     span_step=20,  # 스팬을 따라 샘플링할 때의 픽셀 간격 (축소된 픽셀 단위)
-):    
-        
-    input_path = Path(input).resolve()
-    output_dir = Path(output).resolve()
-    output_name = name
-    
-    if not input_path.exists():
-        print(f"파일 못 찾음: {input_path}")
-        return 1
-    
-    output_dir.mkdir(exist_ok=True, parents=True)
-    result_num = get_next_result_directory(output_dir=output_dir, output_name=output_name)
-    result_dir = output_dir / f"{output_name}{result_num}"
-    result_dir.mkdir(exist_ok=True)
-    
-    img = cv2.imread(str(input_path))
-    if img is None:
-        print(f"이미지 못 찾음: {input_path}")
-        return 1
-    
-    print(f"이미지 크기: {img.shape[1]}x{img.shape[0]}")
-    
+    write="sync",  # 결과 PNG 저장 방식: "sync", "async"(백그라운드 스레드), "none"
+    cache_dir="",  # 결과 캐시 디렉토리 (빈 문자열이면 캐시 사용 안 함)
+    cache_mb=512.0,  # 캐시 최대 크기 (MB), 넘으면 오래 안 쓴 항목부터 삭제
+    warm_start=False,  # 연속 페이지 모드: 앞 페이지의 자세/곡률로 다음 페이지 최적화 시작
+    optim="powell",  # 최적화 방법: "powell"(미분 없음), "trf"/"lm"(해석적 야코비안 최소제곱), "varpro"(변수 투영)
+    coarse=0,  # coarse 단계에서 쓸 스팬당 키포인트 수 (0이면 전체 키포인트로 한 번에 최적화)
+    budget_seconds=0.0,  # 페이지당 최적화 시간 예산 (초, 0이면 제한 없음), 넘으면 그때까지의 최선 params 사용
+    budget_evals=0,  # 페이지당 목적함수 평가 횟수 예산 (0이면 제한 없음)
+    starts=1,  # 멀티 스타트: 초기값(초점거리/곡률 부호)을 바꿔 최적화할 시작점 수, 가장 낮은 목적함수 결과 사용
+    start_workers=0,  # 멀티 스타트 워커 프로세스 수 (0이면 CPU 코어 수, 1이면 현재 프로세스에서 차례로)
+):
     config = Config()
     config.FOCAL_LENGTH = focal  # 카메라의 정규화된 초점거리
 
@@ -263,7 +303,49 @@ def main(
     config.SPAN_MIN_WIDTH = span_w  # 스팬의 최소 폭 (축소된 픽셀 단위)
     config.SPAN_PX_PER_STEP = span_step  # 스팬을 따라 샘플링할 때의 픽셀 간격 (축소된 픽셀 단위)
 
+    config.OUTPUT_WRITE = write  # 결과 PNG 저장 방식: "sync", "async"(백그라운드 스레드), "none"
+
+    config.CACHE_DIR = str(Path(cache_dir).resolve()) if cache_dir else ""  # 결과 캐시 디렉토리 (작업 디렉토리가 바뀌어도 같은 위치)
+    config.CACHE_MAX_MB = cache_mb  # 캐시 최대 크기 (MB), 넘으면 오래 안 쓴 항목부터 삭제
+
+    config.WARM_START = warm_start  # 연속 페이지 모드: 앞 페이지의 자세/곡률로 다음 페이지 최적화 시작
+    config.OPTIM_METHOD = optim  # 최적화 방법: "powell"(미분 없음), "trf"/"lm"(해석적 야코비안 최소제곱), "varpro"(변수 투영)
+    config.OPTIM_COARSE_POINTS = coarse  # coarse 단계에서 쓸 스팬당 키포인트 수 (0이면 전체 키포인트로 한 번에 최적화)
+    config.OPTIM_MAX_SECONDS = budget_seconds  # 페이지당 최적화 시간 예산 (초, 0이면 제한 없음), 넘으면 그때까지의 최선 params 사용
+    config.OPTIM_MAX_EVALS = budget_evals  # 페이지당 목적함수 평가 횟수 예산 (0이면 제한 없음)
+    config.OPTIM_STARTS = starts  # 멀티 스타트: 초기값(초점거리/곡률 부호)을 바꿔 최적화할 시작점 수, 가장 낮은 목적함수 결과 사용
+    config.OPTIM_START_WORKERS = start_workers  # 멀티 스타트 워커 프로세스 수 (0이면 CPU 코어 수, 1이면 현재 프로세스에서 차례로)
+    return config
+
+
+def main(
+    input="./input/image.png",  # 입력 이미지 파일 경로
+    output="./output",  # 출력 디렉토리 경로
+    name="result",  # 결과 폴더 이름
+    **opts,  # make_config 매개변수 (초점거리, 텍스트 검출, 에지 연결 설정 등)
+):
+    input_path = Path(input).resolve()
+    output_dir = Path(output).resolve()
+    output_name = name
     
+    if not input_path.exists():
+        print(f"파일 못 찾음: {input_path}")
+        return 1
+    
+    output_dir.mkdir(exist_ok=True, parents=True)
+    result_num = get_next_result_directory(output_dir=output_dir, output_name=output_name)
+    result_dir = output_dir / f"{output_name}{result_num}"
+    result_dir.mkdir(exist_ok=True)
+    
+    img = cv2.imread(str(input_path))
+    if img is None:
+        print(f"이미지 못 찾음: {input_path}")
+        return 1
+    
+    print(f"이미지 크기: {img.shape[1]}x{img.shape[0]}")
+    
+    config = make_config(**opts)
+
     original_cwd = os.getcwd()
     os.chdir(result_dir)
     
@@ -273,11 +355,11 @@ def main(
         input_copy_path = result_dir / f"원본_{input_path.name}"
         shutil.copy2(input_path, input_copy_path)
         
-        # OCR 적용
-        result_img_path = result_dir / warped_img.outfile
-        ocr_text, debug_dir = perform_ocr(result_img_path, result_dir)
+        # OCR 적용 (디워핑 결과를 메모리에서 바로 전달)
+        ocr_text, debug_dir = perform_ocr(warped_img.dewarped, result_dir, cache=warped_img.cache, cache_key=warped_img.cache_key)
+        warped_img.wait_for_output()
 
-        result = cv2.imread(str(warped_img.outfile))
+        result = warped_img.dewarped
         
         window_name = f"result"
         cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
@@ -293,13 +375,8 @@ def main(
     print(f"처리 완료")
     return 0
 
-def parse_args():
-    parser = argparse.ArgumentParser()
-
-    parser.add_argument("--input", "-i", type=str, default="./input/test1.jpg", help="input: 입력 이미지 파일 경로")
-    parser.add_argument("--output", "-o", type=str, default="./output", help="output: 출력 디렉토리")
-    parser.add_argument("--name", "-n", type=str, default="result", help="name: 결과 폴더명 접두사")
-    
+def add_config_arguments(parser):
+    # make_config 매개변수와 같은 이름의 옵션들 (main.py, batch.py 공용)
     parser.add_argument("--focal", "-f", type=float, default=1.2, help="focal_length: 카메라의 정규화된 초점거리")
     
     parser.add_argument("--tw", type=int, default=15, help="text_min_width: 텍스트 윤곽선 최소 폭 (픽셀)")
@@ -335,7 +412,29 @@ def parse_args():
 
     parser.add_argument("--span-w", type=int, default=30, help="span_min_width: 스팬의 최소 폭 (픽셀)")
     parser.add_argument("--span-step", type=int, default=20, help="span_px_per_step: 스팬 샘플링 간격 (픽셀)")
+
+    parser.add_argument("--write", type=str, default="sync", choices=["sync", "async", "none"], help="output_write: 결과 PNG 저장 방식 (async=백그라운드 저장, none=저장 안 함)")
+
+    parser.add_argument("--cache-dir", type=str, default="", help="cache_dir: 결과 캐시 디렉토리 (같은 이미지+설정이면 디워핑/OCR 결과 재사용)")
+    parser.add_argument("--cache-mb", type=float, default=512.0, help="cache_max_mb: 캐시 최대 크기 (MB, 넘으면 오래 안 쓴 항목부터 삭제)")
+
+    parser.add_argument("--warm-start", action="store_true", help="warm_start: 연속 페이지 모드 (앞 페이지의 rvec/tvec/곡률로 다음 페이지 최적화 시작, 목적함수가 더 나쁘면 기본 초기값 사용)")
+    parser.add_argument("--optim", type=str, default="powell", choices=["powell", "trf", "lm", "varpro"], help="optim_method: 최적화 방법 (powell=미분 없는 기존 방식, trf/lm=해석적 야코비안 최소제곱, varpro=자세/곡률 8개만 탐색; trf/lm 결과의 자세나 페이지 크기가 비정상이면 powell로 다시 최적화)")
+    parser.add_argument("--coarse", type=int, default=0, help="optim_coarse_points: 먼저 스팬당 이 개수의 키포인트로 자세/곡률을 맞춘 뒤 전체 키포인트로 다듬음 (0=한 번에)")
+    parser.add_argument("--budget-seconds", type=float, default=0.0, help="optim_max_seconds: 페이지당 최적화 시간 예산 (초), 넘으면 그때까지의 최선 결과로 끝냄 (0=제한 없음)")
+    parser.add_argument("--budget-evals", type=int, default=0, help="optim_max_evals: 페이지당 목적함수 평가 횟수 예산 (0=제한 없음)")
+    parser.add_argument("--starts", type=int, default=1, help="optim_starts: 초점거리/곡률 부호를 바꾼 시작점 수, 병렬로 최적화해 가장 좋은 결과 사용 (1=단일 시작)")
+    parser.add_argument("--start-workers", type=int, default=0, help="optim_start_workers: 멀티 스타트 워커 프로세스 수 (0=CPU 코어 수, 1=현재 프로세스에서 차례로)")
+    return parser
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--input", "-i", type=str, default="./input/test1.jpg", help="input: 입력 이미지 파일 경로")
+    parser.add_argument("--output", "-o", type=str, default="./output", help="output: 출력 디렉토리")
+    parser.add_argument("--name", "-n", type=str, default="result", help="name: 결과 폴더명 접두사")
     
+    add_config_arguments(parser)
     opt = parser.parse_args()
     print(opt)
     return opt
@@ -0,0 +1,296 @@
+import os
+import re
+import time
+import queue
+import tempfile
+import threading
+
+# OCR 엔진 계층
+# perform_ocr_many 는 engine.recognise_many(images) 만 호출하고, 엔진이 Tesseract 실행 방식을 결정함
+# 모든 엔진의 hOCR 은 tesseract CLI 가 쓰는 것과 같은 완전한 XHTML 문서 (페이지 하나)
+#   subprocess : 페이지마다 tesseract 프로세스 실행 (기존 방식, 매번 traineddata 로드)
+#   listfile   : 여러 페이지를 목록 파일 하나로 묶어 tesseract 프로세스 한 번에 처리
+#   tesserocr  : tesserocr(libtesseract 바인딩)로 모델을 한 번만 로드하고 워커마다 API 객체 재사용
+#   fake       : tesseract 없이 고정 결과를 돌려주는 테스트용 엔진
+# pytesseract(와 PIL)는 main.load_pytesseract 처럼 인식할 때 처음 임포트 (batch/pipeline/service 시작 시간)
+
+TSV_HEADER = "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext"
+RENDERER_EXTENSIONS = ["txt", "hocr", "tsv"]
+
+# tesseract hOCR 렌더러의 문서 머리/꼬리 (API 로 얻는 hOCR 은 ocr_page div 만 있음)
+HOCR_HEAD = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+    "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+ <head>
+  <title></title>
+  <meta http-equiv="Content-Type" content="text/html;charset=utf-8"/>
+  <meta name='ocr-system' content='{system}' />
+  <meta name='ocr-capabilities' content='ocr_page ocr_carea ocr_par ocr_line ocrx_word ocrp_wconf'/>
+ </head>
+ <body>
+"""
+HOCR_TAIL = """ </body>
+</html>
+"""
+
+
+def hocr_document(page, system="tesseract"):
+    # ocr_page div(문자열)를 tesseract CLI 출력과 같은 완전한 hOCR 문서(바이트)로 감쌈
+    return (HOCR_HEAD.format(system=system) + page + HOCR_TAIL).encode("utf-8")
+
+
+def renderer_config(config):
+    # txt / hocr / tsv 렌더러를 모두 켜서 인식 한 번으로 세 결과를 함께 얻음
+    renderers = " ".join(f"-c tessedit_create_{ext}=1" for ext in RENDERER_EXTENSIONS)
+    return f"{config} {renderers}"
+
+
+def read_outputs(output_base):
+    outputs = {}
+    for ext in RENDERER_EXTENSIONS:
+        with open(f"{output_base}.{ext}", "rb") as f:
+            outputs[ext] = f.read()
+    return outputs
+
+
+def parse_tsv(tsv):
+    import pytesseract
+    return pytesseract.pytesseract.file_to_dict(tsv, "\t", -1)
+
+
+def run_tesseract_once(image, lang, config):
+    # Tesseract를 한 번만 실행해서 TSV(단어 데이터), 텍스트, hOCR을 함께 생성
+    # (image_to_data / image_to_string / image_to_pdf_or_hocr 를 따로 부르면 인식을 3번 반복함)
+    import pytesseract
+    with pytesseract.pytesseract.save(image) as (temp_name, input_filename):
+        pytesseract.pytesseract.run_tesseract(
+            input_filename,
+            temp_name,
+            " ".join(RENDERER_EXTENSIONS),
+            lang,
+            config=renderer_config(config),
+        )
+        outputs = read_outputs(temp_name)
+
+    data = parse_tsv(outputs["tsv"].decode("utf-8"))
+    text = outputs["txt"].decode("utf-8")
+    return data, text, outputs["hocr"]
+
+
+class OCREngine:
+    # 모든 엔진의 공통 인터페이스
+    # recognise(image) -> (data, text, hocr)
+    #   data: image_to_data(output_type=DICT) 와 같은 형태의 dict
+    #   text: 일반 텍스트, hocr: hOCR 문서 바이트
+    # batch_size: 파이프라인 OCR 단계가 recognise_many 에 한 번에 넘기는 최대 페이지 수
+    name = "base"
+    batch_size = 1
+
+    def __init__(self, lang="kor+eng", oem=2, psm=6):
+        self.lang = lang
+        self.oem = oem
+        self.psm = psm
+
+    @property
+    def config(self):
+        return f"--oem {self.oem} --psm {self.psm}"
+
+    @property
+    def signature(self):
+        # 결과 캐시에서 OCR 결과를 구분하는 키 (엔진 종류 + 언어 + 옵션)
+        return f"{self.name} {self.lang} {self.config}"
+
+    def recognise(self, image):
+        return self.recognise_many([image])[0]
+
+    def recognise_many(self, images):
+        return [self.recognise(image) for image in images]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SubprocessEngine(OCREngine):
+    name = "subprocess"
+
+    def recognise(self, image):
+        return run_tesseract_once(image, self.lang, self.config)
+
+
+class ListFileEngine(OCREngine):
+    # 여러 이미지를 목록 파일로 묶어 tesseract 한 번 실행 (traineddata 로드는 묶음당 한 번)
+    # 출력은 페이지가 이어 붙은 파일이므로 TSV는 page_num, 텍스트는 폼피드, hOCR은 ocr_page div로 나눔
+    name = "listfile"
+    batch_size = 8
+
+    def recognise_many(self, images):
+        import pytesseract
+        if not images:
+            return []
+        with tempfile.TemporaryDirectory(prefix="tess_batch_") as tmp_dir:
+            list_path = os.path.join(tmp_dir, "pages.txt")
+            with open(list_path, "w", encoding="utf-8") as f:
+                for i, image in enumerate(images):
+                    if isinstance(image, str):
+                        f.write(os.path.realpath(image) + "\n")
+                        continue
+                    image, extension = pytesseract.pytesseract.prepare(image)
+                    page_path = os.path.join(tmp_dir, f"page_{i:05d}.{extension}")
+                    image.save(page_path, format=image.format)
+                    f.write(page_path + "\n")
+            output_base = os.path.join(tmp_dir, "out")
+            pytesseract.pytesseract.run_tesseract(
+                list_path,
+                output_base,
+                " ".join(RENDERER_EXTENSIONS),
+                self.lang,
+                config=renderer_config(self.config),
+            )
+            outputs = read_outputs(output_base)
+
+        n_pages = len(images)
+        datas = split_tsv(outputs["tsv"].decode("utf-8"), n_pages)
+        texts = split_text(outputs["txt"].decode("utf-8"), n_pages)
+        hocrs = split_hocr(outputs["hocr"], n_pages)
+        return list(zip(datas, texts, hocrs))
+
+
+def split_tsv(tsv, n_pages):
+    # page_num 열 기준으로 페이지별 dict 로 나누고 page_num 은 1로 맞춤
+    #   행이 없는 페이지도 모든 열을 (빈 목록으로) 가짐, n_pages 를 넘는 페이지의 행은 버림 (split_text 와 같음)
+    data = parse_tsv(tsv)
+    columns = TSV_HEADER.split("\t")
+    pages = [{key: [] for key in columns} for _ in range(n_pages)]
+    for row in range(len(data.get("page_num", []))):
+        page = data["page_num"][row] - 1
+        if not 0 <= page < n_pages:
+            continue
+        for key in columns:
+            pages[page][key].append(1 if key == "page_num" else data[key][row])
+    return pages
+
+
+def split_text(text, n_pages):
+    # tesseract 는 페이지마다 끝에 폼피드(\f)를 붙임
+    pages = text.split("\f")
+    return (pages + [""] * n_pages)[:n_pages]
+
+
+def split_hocr(hocr, n_pages):
+    # 하나의 hOCR 문서를 페이지마다 머리/꼬리를 붙인 별도 문서로 나눔
+    #   div 의 들여쓰기까지 페이지에 넣어 hocr_document 로 감싼 것과 같은 문서가 되게 함
+    html = hocr.decode("utf-8")
+    divs = re.finditer(r"<div class=['\"]ocr_page['\"]", html)
+    starts = [html.rfind("\n", 0, m.start()) + 1 for m in divs]
+    if not starts:
+        return [hocr] * n_pages
+    body_end = html.rfind("\n", 0, html.rfind("</body>")) + 1
+    head, tail = html[: starts[0]], html[body_end:]
+    bounds = starts + [body_end]
+    pages = [(head + html[a:b] + tail).encode("utf-8") for a, b in zip(bounds, bounds[1:])]
+    return (pages + [head.encode("utf-8") + tail.encode("utf-8")] * n_pages)[:n_pages]
+
+
+class TesserocrEngine(OCREngine):
+    # libtesseract API 객체를 workers 개 만들어 두고 재사용 (traineddata 는 생성 시 한 번만 로드)
+    # 스레드마다 API 객체 하나를 빌려 쓰므로 여러 스레드에서 동시에 호출해도 됨
+    name = "tesserocr"
+
+    def __init__(self, lang="kor+eng", oem=2, psm=6, workers=1, tessdata=None):
+        super().__init__(lang=lang, oem=oem, psm=psm)
+        import tesserocr
+
+        self.system = tesserocr.tesseract_version().split("\n")[0]
+        kwargs = {"lang": self.lang, "oem": self.oem, "psm": self.psm}
+        if tessdata is not None:
+            kwargs["path"] = tessdata
+        self._apis = queue.Queue()
+        for _ in range(workers):
+            self._apis.put(tesserocr.PyTessBaseAPI(**kwargs))
+        self.workers = workers
+
+    def recognise(self, image):
+        import pytesseract
+        from PIL import Image
+        if isinstance(image, str):
+            image = Image.open(image)
+        else:
+            image, _ = pytesseract.pytesseract.prepare(image)
+        api = self._apis.get()
+        try:
+            api.SetImage(image)
+            api.Recognize()
+            text = api.GetUTF8Text()
+            tsv = api.GetTSVText(0)
+            hocr = api.GetHOCRText(0)
+        finally:
+            self._apis.put(api)
+        data = parse_tsv(f"{TSV_HEADER}\n{tsv}")
+        return data, text, hocr_document(hocr, self.system)
+
+    def close(self):
+        for _ in range(self.workers):
+            self._apis.get().End()
+        self.workers = 0
+
+
+class FakeEngine(OCREngine):
+    # tesseract 없이 고정된 결과를 돌려주는 엔진 (테스트용)
+    # load_seconds: 생성 시 한 번 드는 모델 로드 시간, page_seconds: 페이지당 인식 시간
+    name = "fake"
+
+    def __init__(self, lang="kor+eng", oem=2, psm=6, text="fake text\n", load_seconds=0.0, page_seconds=0.0):
+        super().__init__(lang=lang, oem=oem, psm=psm)
+        self.text = text
+        self.page_seconds = page_seconds
+        self.calls = 0
+        self._lock = threading.Lock()
+        time.sleep(load_seconds)
+
+    def recognise(self, image):
+        import pytesseract
+        from PIL import Image
+        if isinstance(image, str):
+            image = Image.open(image)
+        else:
+            image, _ = pytesseract.pytesseract.prepare(image)
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.page_seconds)
+        width, height = image.size
+        data = {
+            "level": [1, 5],
+            "page_num": [1, 1],
+            "block_num": [0, 1],
+            "par_num": [0, 1],
+            "line_num": [0, 1],
+            "word_num": [0, 1],
+            "left": [0, 0],
+            "top": [0, 0],
+            "width": [width, width],
+            "height": [height, height],
+            "conf": [-1, 100],
+            "text": ["", self.text.strip()],
+        }
+        hocr = f"  <div class='ocr_page' id='page_1' title='bbox 0 0 {width} {height}'>{self.text}</div>\n"
+        return data, self.text, hocr_document(hocr, "fake")
+
+
+ENGINES = {
+    engine.name: engine for engine in (SubprocessEngine, ListFileEngine, TesserocrEngine, FakeEngine)
+}
+
+
+def make_engine(name="subprocess", lang="kor+eng", oem=2, psm=6, workers=1, **kwargs):
+    if name not in ENGINES:
+        raise ValueError(f"알 수 없는 OCR 엔진: {name} (가능: {', '.join(ENGINES)})")
+    if name == "tesserocr":
+        kwargs["workers"] = workers
+    return ENGINES[name](lang=lang, oem=oem, psm=psm, **kwargs)
@@ -0,0 +1,255 @@
+import sys
+import time
+import queue
+import argparse
+import threading
+
+import msgspec
+
+from dewarp.image import WarpedImage
+from batch import collect_inputs, make_run_dir, write_manifest
+from main import add_config_arguments, make_config, perform_ocr_many
+from ocr_engine import ENGINES, make_engine
+
+# 단계 종료 신호
+STOP = object()
+
+
+class PageJob:
+    # 파이프라인을 따라 전달되는 이미지 한 장의 작업 상태
+    def __init__(self, index, input_path, result_dir):
+        self.index = index
+        self.input_path = input_path
+        self.result_dir = result_dir
+        self.warped = None
+        self.ocr_text = None
+        self.status = None  # None 이면 아직 처리 중
+        self.error = None
+        self.timings = {}
+
+    def to_record(self):
+        outfile = self.warped.outfile if self.warped is not None and self.warped.written else None
+        record = {
+            "input": str(self.input_path),
+            "result_dir": str(self.result_dir),
+            "status": self.status,
+            "outfile": outfile,
+            "ocr_text": str(self.result_dir / "ocr_result.txt") if self.ocr_text is not None else None,
+            "cached": self.warped is not None and self.warped.cache_hit,
+            "optim_status": self.warped.optim_status if self.warped is not None else None,
+            "seconds": round(sum(self.timings.values()), 3),
+            "stage_seconds": {k: round(v, 3) for k, v in self.timings.items()},
+        }
+        if self.error is not None:
+            record["error"] = self.error
+        return record
+
+
+class Stage:
+    # 입력 큐(크기 제한)와 워커 스레드 묶음으로 이루어진 파이프라인 단계
+    # 다음 단계 큐가 가득 차면 put 에서 대기하므로 앞 단계가 자동으로 느려짐 (backpressure)
+    # batch > 0 이면 func 에 작업 목록을 넘김: 큐에 이미 와 있는 작업을 최대 batch 개까지 (기다리지 않음)
+    def __init__(self, name, func, workers=1, queue_size=2, batch=0):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.batch = batch
+        self.inbox = queue.Queue(maxsize=queue_size)
+        self.next = None
+        self.finished = None
+        self.busy = 0.0
+        self._alive = workers
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.run, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def take(self):
+        # 다음 작업 (batch 모드면 작업 목록)과 종료 신호를 받았는지 여부
+        job = self.inbox.get()
+        if job is STOP:
+            return [], True
+        jobs = [job]
+        while len(jobs) < self.batch:
+            try:
+                job = self.inbox.get_nowait()
+            except queue.Empty:
+                break
+            if job is STOP:
+                return jobs, True
+            jobs.append(job)
+        return jobs, False
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            jobs, stopping = self.take()
+            if not jobs:
+                break
+            start = time.perf_counter()
+            try:
+                self.func(jobs if self.batch else jobs[0])
+            except Exception as e:
+                for job in jobs:
+                    job.status = "failed"
+                    job.error = f"{self.name}: {type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.busy += elapsed
+            for job in jobs:
+                # 함께 처리한 작업들은 시간을 나눠 기록
+                job.timings[self.name] = elapsed / len(jobs)
+                # 실패했거나 더 처리할 필요가 없는 작업은 남은 단계를 건너뜀
+                if job.status is not None or self.next is None:
+                    self.finished.put(job)
+                else:
+                    self.next.inbox.put(job)
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        # 마지막 워커가 끝나면 다음 단계 워커들에게 종료 신호 전달
+        if last and self.next is not None:
+            for _ in range(self.next.workers):
+                self.next.inbox.put(STOP)
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+
+
+def make_stages(config, workers, queue_size, engine):
+    def load(job):
+        job.result_dir.mkdir(parents=True, exist_ok=True)
+        job.warped = WarpedImage(job.input_path, config=config, output_dir=job.result_dir, defer=True)
+
+    # 캐시에서 결과를 복원한 페이지는 load 다음에 바로 ocr 단계로 넘어감
+    def contours(job):
+        if job.warped.cache_hit:
+            return
+        if not job.warped.find_keypoints():
+            job.status = "no_spans"
+
+    # 연속 페이지 모드: 직전에 최적화한 페이지의 params 로 다음 페이지를 시작
+    previous_params = None
+
+    def optimise(job):
+        nonlocal previous_params
+        if job.warped.cache_hit:
+            return
+        if config.WARM_START:
+            job.warped.warm_start = previous_params
+        job.warped.optimise()
+        previous_params = job.warped.params
+
+    def remap(job):
+        if job.warped.cache_hit:
+            return
+        job.warped.threshold(job.warped.page_dims, job.warped.params)
+        job.warped.written = True
+
+    def ocr(jobs):
+        # remap 단계의 결과 배열을 그대로 사용 (PNG 재로딩 없음)
+        # 큐에 함께 와 있던 페이지들은 engine.recognise_many 한 번으로 인식 (최대 engine.batch_size 장)
+        results = perform_ocr_many(
+            [(job.warped.dewarped, job.result_dir, job.warped.cache, job.warped.cache_key) for job in jobs],
+            engine=engine,
+        )
+        for job, (ocr_text, _) in zip(jobs, results):
+            job.ocr_text = ocr_text
+            job.warped.wait_for_output()
+            job.status = "ok" if job.ocr_text is not None else "ocr_failed"
+
+    funcs = {"load": load, "contours": contours, "optimise": optimise, "remap": remap, "ocr": ocr}
+    batches = {"ocr": engine.batch_size}
+    stages = [Stage(name, func, workers.get(name, 1), queue_size, batches.get(name, 0)) for name, func in funcs.items()]
+    for stage, next_stage in zip(stages, stages[1:]):
+        stage.next = next_stage
+    return stages
+
+
+def run_pipeline(sources, output="./output", name="pipeline", queue_size=2, workers=None, ocr_engine="subprocess", **opts):
+    # 단계: load -> contours (마스크/윤곽선/스팬) -> optimise -> remap -> ocr
+    # 페이지 N의 OCR(Tesseract 서브프로세스)이 도는 동안 페이지 N+1의 디워핑이 진행됨
+    inputs = collect_inputs(sources)
+    if not inputs:
+        print(f"처리할 이미지 없음: {sources}")
+        return None
+
+    run_dir = make_run_dir(output, name)
+    opts.setdefault("debug", 0)
+    opts["debug_out"] = "file"
+    config = make_config(**opts)
+
+    workers = workers or {}
+    if config.WARM_START and any(workers.get(stage, 1) > 1 for stage in ("load", "contours", "optimise")):
+        # optimise 단계 앞의 워커가 여럿이면 페이지가 입력 순서대로 도착한다는 보장이 없음
+        print("연속 페이지 모드(--warm-start)는 load/contours/optimise 워커가 1개일 때만 사용, 이번 실행에서는 끔")
+        config = msgspec.structs.replace(config, WARM_START=False)
+    # OCR 워커 스레드들이 함께 쓰는 엔진 (tesserocr 는 워커 수만큼 모델을 미리 로드)
+    engine = make_engine(ocr_engine, workers=workers.get("ocr", 1))
+    finished = queue.Queue()
+    stages = make_stages(config, workers, queue_size, engine)
+    for stage in stages:
+        stage.finished = finished
+        stage.start()
+    print(f"이미지 {len(inputs)}장 -> {run_dir}")
+    print("단계별 워커: " + ", ".join(f"{s.name}={s.workers}" for s in stages))
+
+    start = time.perf_counter()
+    for i, input_path in enumerate(inputs):
+        job = PageJob(i, input_path, run_dir / f"{i:05d}_{input_path.stem}")
+        stages[0].inbox.put(job)  # 첫 단계 큐가 가득 차면 여기서 대기
+    for _ in range(stages[0].workers):
+        stages[0].inbox.put(STOP)
+
+    records = [None] * len(inputs)
+    for done in range(1, len(inputs) + 1):
+        job = finished.get()
+        records[job.index] = job.to_record()
+        print(f"[{done}/{len(inputs)}] {job.status}: {job.input_path.name}")
+    for stage in stages:
+        stage.join()
+    elapsed = time.perf_counter() - start
+    engine.close()
+
+    stage_stats = {
+        s.name: {"workers": s.workers, "busy_seconds": round(s.busy, 3)} for s in stages
+    }
+    for stage_name, stats in stage_stats.items():
+        print(f"  {stage_name}: 워커 {stats['workers']}개, 작업 시간 {stats['busy_seconds']}초")
+    return write_manifest(run_dir, records, elapsed, queue_size=queue_size, ocr_engine=ocr_engine, stages=stage_stats)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("inputs", nargs="+", help="inputs: 입력 디렉토리, glob 패턴 또는 목록 파일(.txt)")
+    parser.add_argument("--output", "-o", type=str, default="./output", help="output: 출력 디렉토리")
+    parser.add_argument("--name", "-n", type=str, default="pipeline", help="name: 결과 폴더명 접두사")
+    parser.add_argument("--queue-size", "-q", type=int, default=2, help="queue_size: 단계 사이 큐의 최대 크기")
+    parser.add_argument("--ocr-engine", type=str, default="subprocess", choices=list(ENGINES), help="ocr_engine: OCR 엔진")
+
+    parser.add_argument("--load-workers", type=int, default=1, help="load 단계 워커 수")
+    parser.add_argument("--contours-workers", type=int, default=1, help="contours 단계 워커 수")
+    parser.add_argument("--optimise-workers", type=int, default=1, help="optimise 단계 워커 수")
+    parser.add_argument("--remap-workers", type=int, default=1, help="remap 단계 워커 수")
+    parser.add_argument("--ocr-workers", type=int, default=2, help="ocr 단계 워커 수")
+
+    add_config_arguments(parser)
+    parser.set_defaults(debug=0, write="async")
+    opt = parser.parse_args()
+    return opt
+
+
+if __name__ == "__main__":
+    opt = vars(parse_args())
+    workers = {
+        stage: opt.pop(f"{stage}_workers")
+        for stage in ("load", "contours", "optimise", "remap", "ocr")
+    }
+    manifest = run_pipeline(opt.pop("inputs"), workers=workers, **opt)
+    sys.exit(0 if manifest else 1)
@@ -0,0 +1,381 @@
+import sys
+import json
+import time
+import queue
+import base64
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from main import add_config_arguments, make_config
+from ocr_engine import ENGINES
+
+# 상주형 디워핑/OCR 서비스 (로컬 HTTP JSON API)
+#   POST /dewarp?ocr=1&name=page   본문: 이미지 바이트(jpg/png 등)
+#   GET  /health
+# 워커 프로세스는 시작할 때 cv2/scipy/PIL/pytesseract 임포트와 OCR 엔진 생성을 마쳐 두고 계속 재사용함
+# 동시에 들어온 요청은 batch_wait_ms 동안 모은 뒤 워커 수만큼 나눠 워커마다 한 번에 넘김
+
+STOP = object()
+
+# 워커 프로세스 상태 (init_worker 에서 한 번 설정)
+worker_config = None
+worker_engine = None
+
+
+def init_worker(config, engine_name):
+    global worker_config, worker_engine
+    # 무거운 모듈을 미리 임포트해서 첫 요청부터 바로 처리되게 함
+    import PIL.Image  # noqa: F401
+    import scipy.optimize  # noqa: F401
+
+    import dewarp.image  # noqa: F401
+    from main import load_pytesseract
+    from ocr_engine import make_engine
+
+    load_pytesseract()
+    cv2.setNumThreads(1)
+    worker_config = config
+    worker_engine = make_engine(engine_name)
+
+
+def warm_up():
+    return True
+
+
+def process_pages(pages):
+    # pages: [(name, 이미지 바이트, ocr 여부), ...] -> 페이지별 결과 dict 목록
+    from dewarp.image import WarpedImage
+    from main import enhance_for_ocr
+
+    results = []
+    ocr_targets = []
+    ocr_key = worker_engine.signature
+    for name, data, with_ocr in pages:
+        start = time.perf_counter()
+        result = {"name": name, "status": "failed"}
+        try:
+            img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                raise ValueError("이미지를 디코딩할 수 없습니다")
+            warped = WarpedImage(img, config=worker_config, name=name)
+            if warped.written:
+                _, png = cv2.imencode(".png", warped.dewarped)
+                result.update(
+                    status="ok",
+                    params=warped.params.tolist(),
+                    page_dims=np.asarray(warped.page_dims, dtype=float).tolist(),
+                    image=base64.b64encode(png.tobytes()).decode("ascii"),
+                )
+                result["cached"] = warped.cache_hit
+                if with_ocr:
+                    cached = warped.cache.get_ocr(warped.cache_key, ocr_key) if warped.cache is not None else None
+                    if cached is not None:
+                        data, text, hocr = cached
+                        result["ocr"] = {"text": text, "data": data, "hocr": hocr.decode("utf-8")}
+                    else:
+                        _, enhanced = enhance_for_ocr(warped.dewarped)
+                        ocr_targets.append((result, enhanced, warped))
+            else:
+                result["status"] = "no_spans"
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["seconds"] = time.perf_counter() - start
+        results.append(result)
+
+    # 묶음 안의 모든 페이지를 엔진에 한 번에 넘김 (listfile 엔진은 tesseract 한 번 실행)
+    if ocr_targets:
+        start = time.perf_counter()
+        try:
+            outputs = worker_engine.recognise_many([enhanced for _, enhanced, _ in ocr_targets])
+            for (result, _, warped), (data, text, hocr) in zip(ocr_targets, outputs):
+                result["ocr"] = {"text": text, "data": data, "hocr": hocr.decode("utf-8")}
+                if warped.cache is not None:
+                    warped.cache.put_ocr(warped.cache_key, ocr_key, data, text, hocr)
+        except Exception as e:
+            for result, *_ in ocr_targets:
+                result["status"] = "ocr_failed"
+                result["error"] = f"{type(e).__name__}: {e}"
+        ocr_seconds = (time.perf_counter() - start) / len(ocr_targets)
+        for result, *_ in ocr_targets:
+            result["seconds"] += ocr_seconds
+    for result in results:
+        result["seconds"] = round(result["seconds"], 3)
+    return results
+
+
+class DewarpService:
+    # 워커 풀 + 요청 묶음 처리기 + HTTP 서버
+    def __init__(self, config, host="127.0.0.1", port=8765, workers=1, ocr_engine="subprocess", batch_size=4, batch_wait_ms=20, request_timeout=300.0):
+        self.config = config
+        self.workers = workers
+        self.ocr_engine = ocr_engine
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000
+        self.request_timeout = request_timeout
+        self.pool = None
+        self.requests = queue.Queue()
+        self.httpd = ThreadingHTTPServer((host, port), ServiceHandler)
+        self.httpd.service = self
+        self._threads = []
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def make_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=init_worker,
+            initargs=(self.config, self.ocr_engine),
+        )
+
+    def start(self):
+        self.pool = self.make_pool()
+        # 워커 프로세스를 미리 띄워 초기화까지 끝내 둠
+        for future in [self.pool.submit(warm_up) for _ in range(self.workers)]:
+            future.result()
+        for target in (self.dispatch, self.httpd.serve_forever):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"서비스 시작: {self.url} (워커 {self.workers}개, OCR 엔진 {self.ocr_engine})")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.requests.put(STOP)
+        for thread in self._threads:
+            thread.join()
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def submit(self, name, data, with_ocr=True):
+        # HTTP 스레드에서 호출: 요청을 묶음 대기열에 넣고 결과 Future 를 돌려받음
+        future = Future()
+        self.requests.put((name, data, with_ocr, future))
+        return future
+
+    def dispatch(self):
+        # 첫 요청이 오면 batch_wait 동안 (최대 batch_size 개) 더 모아서 워커에 넘김
+        while True:
+            item = self.requests.get()
+            if item is STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self.requests.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is STOP:
+                    self.requests.put(STOP)
+                    break
+                batch.append(item)
+            # 모은 요청을 워커 수만큼 나눠 여러 워커가 동시에 처리 (나눈 묶음 안에서는 OCR 을 한 번에)
+            chunk = -(-len(batch) // self.workers)
+            for first in range(0, len(batch), chunk):
+                self.send(batch[first : first + chunk])
+
+    def send(self, batch):
+        # 묶음 하나를 워커에 넘김, 실패하면 그 묶음의 요청들에 예외를 전달 (dispatch 스레드는 계속 동작)
+        pages = [(name, data, with_ocr) for name, data, with_ocr, _ in batch]
+        futures = [future for *_, future in batch]
+        try:
+            try:
+                done = self.pool.submit(process_pages, pages)
+            except BrokenProcessPool:
+                # 워커가 죽어 풀이 깨졌으면 새 풀로 한 번 더 시도
+                print("워커 풀이 깨져 다시 만듦")
+                self.pool.shutdown(wait=False)
+                self.pool = self.make_pool()
+                done = self.pool.submit(process_pages, pages)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        done.add_done_callback(lambda done, futures=futures: self.deliver(done, futures))
+
+    @staticmethod
+    def deliver(done, futures):
+        try:
+            results = done.result()
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/health":
+            service = self.server.service
+            self.send_json(200, {"status": "ok", "workers": service.workers, "ocr_engine": service.ocr_engine})
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        url = urllib.parse.urlparse(self.path)
+        if url.path != "/dewarp":
+            self.send_json(404, {"error": "not found"})
+            return
+        query = urllib.parse.parse_qs(url.query)
+        name = query.get("name", ["page"])[0]
+        with_ocr = query.get("ocr", ["1"])[0] not in ("0", "false")
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0:
+            self.send_json(400, {"error": "이미지 바이트가 비어 있습니다"})
+            return
+        data = self.rfile.read(length)
+        service = self.server.service
+        try:
+            result = service.submit(name, data, with_ocr).result(timeout=service.request_timeout)
+        except FutureTimeoutError:
+            self.send_json(504, {"error": f"{service.request_timeout}초 안에 처리되지 않았습니다"})
+            return
+        except Exception as e:
+            self.send_json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        self.send_json(200, result)
+
+    def send_json(self, code, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServiceClient:
+    # 로컬 서비스 호출용 클라이언트
+    def __init__(self, url="http://127.0.0.1:8765", timeout=300):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def health(self):
+        with urllib.request.urlopen(f"{self.url}/health", timeout=self.timeout) as response:
+            return json.load(response)
+
+    def dewarp(self, image, name="page", ocr=True):
+        # image: 파일 경로, 이미지 바이트 또는 BGR 배열
+        # 반환값의 "image" 는 디코딩된 디워핑 결과 배열
+        if isinstance(image, np.ndarray):
+            image = cv2.imencode(".png", image)[1].tobytes()
+        elif not isinstance(image, (bytes, bytearray)):
+            with open(image, "rb") as f:
+                image = f.read()
+        query = urllib.parse.urlencode({"name": name, "ocr": int(ocr)})
+        request = urllib.request.Request(
+            f"{self.url}/dewarp?{query}",
+            data=image,
+            headers={"Content-Type": "application/octet-stream"},
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            result = json.load(response)
+        if "image" in result:
+            png = np.frombuffer(base64.b64decode(result["image"]), dtype=np.uint8)
+            result["image"] = cv2.imdecode(png, cv2.IMREAD_GRAYSCALE)
+        return result
+
+
+def self_test(paths, config, workers=2):
+    # 서비스 전체 점검: fake OCR 엔진으로 서비스를 띄우고 ServiceClient 로 이미지들을 동시에 요청해 결과를 확인
+    #   성공하면 0, 실패한 요청이 있으면 1 을 반환
+    from ocr_engine import FakeEngine
+
+    expected = FakeEngine().text
+    failed = 0
+    with DewarpService(config, port=0, workers=workers, ocr_engine="fake") as service:
+        client = ServiceClient(service.url, timeout=service.request_timeout)
+        health = client.health()
+        if health.get("status") != "ok":
+            print(f"FAIL /health: {health}")
+            failed += 1
+        results = [None] * len(paths)
+
+        def request(i):
+            try:
+                results[i] = client.dewarp(paths[i], name=f"page{i}")
+            except Exception as e:
+                results[i] = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+
+        threads = [threading.Thread(target=request, args=(i,)) for i in range(len(paths))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for path, result in zip(paths, results):
+            problems = []
+            if result.get("status") != "ok":
+                problems.append(f"status={result.get('status')} {result.get('error', '')}")
+            else:
+                image = result.get("image")
+                if image is None or image.ndim != 2 or image.size == 0:
+                    problems.append("디워핑 이미지 없음")
+                if result.get("ocr", {}).get("text") != expected:
+                    problems.append("OCR 결과 다름")
+                if not result.get("ocr", {}).get("hocr", "").startswith("<?xml"):
+                    problems.append("hOCR 문서 아님")
+            failed += bool(problems)
+            print(f"{'FAIL' if problems else 'ok'} {path} ({result.get('seconds')} sec) {'; '.join(problems)}")
+    return 1 if failed else 0
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="host: 바인딩 주소")
+    parser.add_argument("--port", type=int, default=8765, help="port: 포트")
+    parser.add_argument("--workers", "-j", type=int, default=1, help="workers: 워커 프로세스 수")
+    parser.add_argument("--ocr-engine", type=str, default="subprocess", choices=list(ENGINES), help="ocr_engine: OCR 엔진 (워커마다 한 번 생성해 재사용)")
+    parser.add_argument("--batch-size", type=int, default=4, help="batch_size: 한 번에 워커로 넘길 최대 요청 수")
+    parser.add_argument("--batch-wait-ms", type=int, default=20, help="batch_wait_ms: 요청을 모으는 최대 대기 시간 (밀리초)")
+    parser.add_argument("--request-timeout", type=float, default=300.0, help="request_timeout: 요청 하나를 기다리는 최대 시간 (초), 넘으면 504 응답")
+    parser.add_argument("--self-test", nargs="+", metavar="IMAGE", help="self_test: 서비스를 띄우지 않고, fake OCR 엔진으로 이 이미지들을 ServiceClient 로 동시에 요청해 결과를 점검 (실패 시 종료 코드 1)")
+
+    add_config_arguments(parser)
+    # 서비스는 화면/파일 출력 없이 메모리에서만 처리
+    parser.set_defaults(debug=0, write="none")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = vars(parse_args())
+    service_opts = {key: opt.pop(key) for key in ("host", "port", "workers", "ocr_engine", "batch_size", "batch_wait_ms", "request_timeout")}
+    test_paths = opt.pop("self_test")
+    opt["debug_out"] = "file"
+    if test_paths:
+        sys.exit(self_test(test_paths, make_config(**opt), workers=service_opts["workers"]))
+    service = DewarpService(make_config(**opt), **service_opts).start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print("서비스 종료")
+        service.stop()
+    sys.exit(0)
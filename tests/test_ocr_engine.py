@@ -0,0 +1,104 @@
+"""Tests for splitting multi-page Tesseract output and the fake OCR engine."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from ocr_engine import (
+    HOCR_HEAD,
+    HOCR_TAIL,
+    TSV_HEADER,
+    FakeEngine,
+    split_hocr,
+    split_text,
+    split_tsv,
+)
+
+
+def tsv_row(page, level=1, text=""):
+    return f"{level}\t{page}\t0\t0\t0\t0\t0\t0\t10\t10\t-1\t{text}"
+
+
+def make_tsv(*rows):
+    return "\n".join((TSV_HEADER, *rows)) + "\n"
+
+
+def page_div(page):
+    return f"  <div class='ocr_page' id='page_{page}' title='bbox 0 0 10 10'>page {page}</div>\n"
+
+
+def make_hocr(*pages):
+    head = HOCR_HEAD.format(system="tesseract")
+    return (head + "".join(page_div(page) for page in pages) + HOCR_TAIL).encode("utf-8")
+
+
+def test_split_tsv_by_page():
+    tsv = make_tsv(
+        tsv_row(1),
+        tsv_row(1, 5, "one"),
+        tsv_row(2),
+        tsv_row(2, 5, "two"),
+        tsv_row(2, 5, "words"),
+    )
+    first, second = split_tsv(tsv, 2)
+    assert first["text"] == ["", "one"]
+    assert second["text"] == ["", "two", "words"]
+    assert first["page_num"] == [1, 1]
+    assert second["page_num"] == [1, 1, 1]
+
+
+def test_split_tsv_empty_and_missing_pages():
+    tsv = make_tsv(tsv_row(1), tsv_row(2), tsv_row(2, 5, "two"))
+    pages = split_tsv(tsv, 3)
+    assert [page["text"] for page in pages] == [[""], ["", "two"], []]
+    assert all(set(page) == set(TSV_HEADER.split("\t")) for page in pages)
+    assert split_tsv("", 2) == [{key: [] for key in TSV_HEADER.split("\t")}] * 2
+
+
+def test_split_tsv_drops_extra_pages():
+    tsv = make_tsv(tsv_row(1, 5, "one"), tsv_row(2, 5, "two"))
+    (page,) = split_tsv(tsv, 1)
+    assert page["text"] == ["one"]
+
+
+def test_split_text():
+    assert split_text("one\n\ftwo\n\f", 2) == ["one\n", "two\n"]
+    assert split_text("one\n\f\fthree\n\f", 3) == ["one\n", "", "three\n"]
+    assert split_text("one\n\ftwo\n\f", 3) == ["one\n", "two\n", ""]
+    assert split_text("one\n\ftwo\n\f", 1) == ["one\n"]
+
+
+def test_split_text_without_form_feeds():
+    assert split_text("one\ntwo\n", 2) == ["one\ntwo\n", ""]
+    assert split_text("", 2) == ["", ""]
+
+
+def test_split_hocr():
+    first, second = split_hocr(make_hocr(1, 2), 2)
+    assert first == make_hocr(1)
+    assert second == make_hocr(2)
+
+
+def test_split_hocr_mismatched_pages():
+    pages = split_hocr(make_hocr(1), 3)
+    assert pages[0] == make_hocr(1)
+    assert pages[1] == pages[2] == make_hocr()
+    assert split_hocr(make_hocr(1, 2, 3), 2) == [make_hocr(1), make_hocr(2)]
+
+
+def test_split_hocr_without_pages():
+    hocr = make_hocr()
+    assert split_hocr(hocr, 2) == [hocr, hocr]
+
+
+def test_fake_engine_recognise_many_keeps_order():
+    images = [np.zeros((10 + i, 20 + i, 3), dtype=np.uint8) for i in range(5)]
+    with FakeEngine(text="page\n") as engine:
+        results = engine.recognise_many(images)
+    assert len(results) == len(images)
+    assert [data["width"][0] for data, _, _ in results] == [20 + i for i in range(5)]
+    assert [data["height"][0] for data, _, _ in results] == [10 + i for i in range(5)]
+    assert all(text == "page\n" for _, text, _ in results)
+    assert all(hocr.startswith(b"<?xml") and hocr.endswith(b"</html>\n") for _, _, hocr in results)
+    assert engine.calls == len(images)
+    assert engine.recognise_many([]) == []
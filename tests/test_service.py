@@ -0,0 +1,89 @@
+"""Tests for the HTTP dewarping service, run with the fake OCR engine."""
+
+from __future__ import annotations
+
+import json
+import urllib.error
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from main import make_config
+from service import DewarpService, ServiceClient, self_test
+
+INPUT_DIR = Path(__file__).resolve().parent.parent / "input"
+BLANK = np.full((100, 100, 3), 255, dtype=np.uint8)
+
+
+def service_config():
+    return make_config(debug=0, debug_out="file", write="none")
+
+
+def fail_pages(pages):
+    """Stand in for `process_pages` in a worker process, failing the whole batch."""
+    raise RuntimeError(f"failed {len(pages)} pages")
+
+
+@pytest.fixture(scope="module")
+def service():
+    with DewarpService(service_config(), port=0, workers=1, ocr_engine="fake") as service:
+        yield service
+
+
+@pytest.fixture
+def client(service):
+    return ServiceClient(service.url, timeout=60)
+
+
+def error_response(client, image=BLANK):
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        client.dewarp(image)
+    return excinfo.value.code, json.loads(excinfo.value.read())
+
+
+def test_health(client):
+    assert client.health()["status"] == "ok"
+
+
+def test_blank_page(client):
+    assert client.dewarp(BLANK)["status"] == "no_spans"
+
+
+def test_undecodable_page(client):
+    result = client.dewarp(b"not an image")
+    assert result["status"] == "failed"
+    assert result["error"].startswith("ValueError")
+
+
+def test_timeout(service, client, monkeypatch):
+    monkeypatch.setattr(service, "request_timeout", 0.001)
+    code, body = error_response(client)
+    assert code == 504
+    assert "error" in body
+
+
+def test_worker_error(service, client, monkeypatch):
+    submit = service.pool.submit
+    monkeypatch.setattr(service.pool, "submit", lambda func, *args: submit(fail_pages, *args))
+    code, body = error_response(client)
+    assert code == 500
+    assert body["error"].startswith("RuntimeError: failed")
+
+
+def test_submit_error(service, client, monkeypatch):
+    def broken_submit(func, *args):
+        raise RuntimeError("cannot submit")
+
+    monkeypatch.setattr(service.pool, "submit", broken_submit)
+    code, body = error_response(client)
+    assert code == 500
+    assert body["error"] == "RuntimeError: cannot submit"
+
+
+def test_dispatch_survives_errors(client):
+    assert client.dewarp(BLANK)["status"] == "no_spans"
+
+
+def test_self_test():
+    assert self_test([str(INPUT_DIR / "test1.jpg")], service_config(), workers=1) == 0
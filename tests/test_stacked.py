@@ -0,0 +1,41 @@
+"""Tests for the stacked optimisation of several pages (`optimise_stacked`)."""
+
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dewarp.image import WarpedImage, optimise_stacked
+from dewarp.optimise import plausible_pose
+from main import add_config_arguments, make_config
+
+INPUT_DIR = Path(__file__).resolve().parent.parent / "input"
+
+
+def cli_config():
+    """Return the config of a `main.py` run with default options and no output."""
+    parser = argparse.ArgumentParser()
+    add_config_arguments(parser)
+    options = vars(parser.parse_args([]))
+    options.update(debug=0, write="none")
+    return make_config(**options)
+
+
+@pytest.mark.parametrize("stems", [("test2",), ("test1", "test2", "test4")])
+def test_stacked_pages_are_plausible(stems):
+    config = cli_config()
+    images = []
+    for stem in stems:
+        image = WarpedImage(str(INPUT_DIR / f"{stem}.jpg"), config=config, defer=True)
+        assert image.find_keypoints()
+        images.append(image)
+    initial = [image.params.copy() for image in images]
+    optimise_stacked(images)
+    for image, params in zip(images, initial):
+        assert plausible_pose(image.params, params), image.stem
+        assert np.all(image.page_dims > 0), image.stem
+        assert np.all(image.page_dims / image.rough_dims < 1.5), image.stem
+        assert np.all(image.rough_dims / image.page_dims < 1.5), image.stem
@@ -0,0 +1,211 @@
+import sys
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from dewarp.image import WarpedImage
+from batch import make_run_dir, write_manifest
+from main import add_config_arguments, make_config
+
+# 동영상(프레임 스트림) 디워핑
+#   프레임마다 작은 썸네일로 움직임/선명도만 계산하고, 움직임이 멈춘 구간(안정 페이지)마다
+#   가장 선명한 프레임 하나만 디워핑함
+#   - 직전 출력 페이지와 (평행 이동을 맞춘 뒤) 거의 같은 내용이면 중복으로 건너뜀
+#   - 위상 상관으로 잰 페이지 이동량이 직전 디워핑 프레임 대비 track 픽셀 이하면 페이지가 그대로라고 보고
+#     params/page_dims 를 재사용해 리매핑만 수행 (윤곽선/스팬/최적화 생략)
+#   - 페이지가 움직였으면 전체 과정을 다시 수행하되 직전 params 로 최적화를 시작 (warm start)
+
+
+class FrameInfo:
+    # 프레임 한 장의 값싼 요약 정보
+    def __init__(self, index, frame, thumb_width):
+        self.index = index
+        self.frame = frame
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        scale = thumb_width / gray.shape[1]
+        thumb = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA).astype(np.float32)
+        # 밝기/대비를 맞춰서 조명 변화는 차이로 잡히지 않게 함 (0~255 범위 기준 값으로 유지)
+        self.thumb = (thumb - thumb.mean()) * (48.0 / max(float(thumb.std()), 1.0))
+        # 라플라시안 분산: 흐린(모션 블러/초점 안 맞은) 프레임일수록 작음
+        self.sharpness = float(cv2.Laplacian(self.thumb, cv2.CV_32F).var())
+
+
+def mean_diff(a, b):
+    return float(np.mean(np.abs(a - b)))
+
+
+def page_shift(a, b):
+    # 위상 상관으로 추정한 a -> b 평행 이동량(픽셀)과 응답값 (응답이 낮으면 추정을 믿을 수 없음)
+    (dx, dy), response = cv2.phaseCorrelate(a, b)
+    return float(np.hypot(dx, dy)), response
+
+
+def aligned_diff(a, b):
+    # 위상 상관으로 평행 이동을 추정해 맞춘 뒤 겹치는 영역의 평균 차이 (조금 움직인 같은 페이지 판별용)
+    (dx, dy), _ = cv2.phaseCorrelate(a, b)
+    dx, dy = int(round(dx)), int(round(dy))
+    h, w = a.shape
+    if abs(dx) >= w // 2 or abs(dy) >= h // 2:
+        return mean_diff(a, b)
+    a = a[max(-dy, 0) : h + min(-dy, 0), max(-dx, 0) : w + min(-dx, 0)]
+    b = b[max(dy, 0) : h + min(dy, 0), max(dx, 0) : w + min(dx, 0)]
+    return mean_diff(a, b)
+
+
+class VideoDewarper:
+    def __init__(self, config, run_dir, thumb_width=320, motion=3.0, min_stable=3, min_sharpness=100.0, dup=4.0, track=1.0, min_response=0.2):
+        self.config = config
+        self.run_dir = run_dir
+        self.thumb_width = thumb_width
+        self.motion = motion  # 연속 프레임 썸네일 차이가 이 값 이하면 정지 상태
+        self.min_stable = min_stable  # 안정 페이지로 인정할 최소 정지 프레임 수
+        self.min_sharpness = min_sharpness  # 이보다 흐린 프레임은 사용하지 않음
+        self.dup = dup  # 직전 출력 페이지와의 차이가 이 값 이하면 중복 페이지
+        self.track = track  # 직전 디워핑 프레임 대비 페이지 이동량(썸네일 픽셀)이 이 값 이하면 params 재사용
+        self.min_response = min_response  # 위상 상관 응답이 이보다 낮으면 이동량을 믿지 않고 다시 계산
+        self.records = []
+        self.counts = {"frames": 0, "blurry": 0, "moving": 0, "stable": 0, "duplicate": 0, "full": 0, "tracked": 0}
+        self.previous = None  # 직전 프레임
+        self.segment = []  # 현재 정지 구간의 프레임 인덱스
+        self.best = None  # 현재 정지 구간에서 가장 선명한 프레임
+        self.last_output = None  # 직전에 출력한 페이지의 프레임
+        self.last_fit = None  # 직전에 전체 과정으로 디워핑한 프레임
+        self.last_warped = None
+
+    def feed(self, index, frame):
+        info = FrameInfo(index, frame, self.thumb_width)
+        self.counts["frames"] += 1
+        moving = self.previous is not None and mean_diff(info.thumb, self.previous.thumb) > self.motion
+        self.previous = info
+        if moving:
+            # 움직이기 시작하면 지금까지의 정지 구간을 페이지 하나로 마무리
+            self.counts["moving"] += 1
+            self.finish_segment()
+            return
+        self.segment.append(index)
+        if info.sharpness < self.min_sharpness:
+            self.counts["blurry"] += 1
+        elif self.best is None or info.sharpness > self.best.sharpness:
+            self.best = info
+
+    def finish_segment(self):
+        segment, best = self.segment, self.best
+        self.segment, self.best = [], None
+        if len(segment) < self.min_stable or best is None:
+            return
+        self.counts["stable"] += 1
+        if self.last_output is not None and aligned_diff(self.last_output.thumb, best.thumb) <= self.dup:
+            self.counts["duplicate"] += 1
+            return
+        self.dewarp(best, segment)
+        self.last_output = best
+
+    def dewarp(self, info, segment):
+        start = time.perf_counter()
+        name = f"page_{len(self.records):04d}_f{info.index:06d}"
+        record = {
+            "frame": info.index,
+            "frames": [segment[0], segment[-1]],
+            "sharpness": round(info.sharpness, 1),
+            "status": "failed",
+            "mode": None,
+            "outfile": None,
+        }
+        try:
+            tracked = False
+            if self.last_fit is not None:
+                shift, response = page_shift(self.last_fit.thumb, info.thumb)
+                tracked = shift <= self.track and response >= self.min_response
+            if tracked:
+                # 페이지가 움직이지 않음: 직전 결과의 params/page_dims 로 리매핑만 수행
+                #   캐시 적중이면 이미 복원/저장됨, 직전 페이지 params 는 최적화 결과가 아니므로 캐시하지 않음
+                #   (optim_status 가 None 이면 threshold 가 캐시에 넣지 않음)
+                warped = WarpedImage(info.frame, config=self.config, output_dir=self.run_dir, defer=True, name=name)
+                if not warped.cache_hit:
+                    warped.threshold(self.last_warped.page_dims, self.last_warped.params)
+                    warped.written = True
+            else:
+                warm_start = self.last_warped.params if self.last_warped is not None else None
+                warped = WarpedImage(info.frame, config=self.config, output_dir=self.run_dir, name=name, warm_start=warm_start)
+            warped.wait_for_output()
+            if warped.written:
+                mode = "tracked" if tracked else "full"
+                self.counts[mode] += 1
+                record.update(status="ok", mode=mode, outfile=warped.outfile)
+                if not tracked:
+                    self.last_fit, self.last_warped = info, warped
+            else:
+                record["status"] = "no_spans"
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        self.records.append(record)
+        print(f"[page {len(self.records)}] {record['status']} ({record['mode']}): frame {info.index} ({record['seconds']} sec)")
+
+    def close(self):
+        self.finish_segment()
+
+
+def run_video(video, output="./output", name="video", step=1, max_frames=None, thumb_width=320, motion=3.0, min_stable=3, min_sharpness=100.0, dup=4.0, track=1.0, min_response=0.2, **opts):
+    cap = cv2.VideoCapture(str(video))
+    if not cap.isOpened():
+        print(f"동영상을 열 수 없음: {video}")
+        return None
+
+    run_dir = make_run_dir(output, name)
+    opts.setdefault("debug", 0)
+    opts["debug_out"] = "file"
+    config = make_config(**opts)
+    dewarper = VideoDewarper(config, run_dir, thumb_width, motion, min_stable, min_sharpness, dup, track, min_response)
+    print(f"동영상 {video} -> {run_dir}")
+
+    start = time.perf_counter()
+    index = 0
+    while max_frames is None or index < max_frames:
+        # step 개 중 하나만 디코딩 (나머지는 grab 으로 건너뜀)
+        if index % step:
+            if not cap.grab():
+                break
+            index += 1
+            continue
+        ok, frame = cap.read()
+        if not ok:
+            break
+        dewarper.feed(index, frame)
+        index += 1
+    dewarper.close()
+    cap.release()
+    elapsed = time.perf_counter() - start
+
+    counts = dewarper.counts
+    print("프레임 {frames}개 검사: 움직임 {moving}, 흐림 {blurry}, 안정 페이지 {stable} (중복 {duplicate}), 디워핑 전체 {full} / 재사용 {tracked}".format(**counts))
+    return write_manifest(run_dir, dewarper.records, elapsed, video=str(video), step=step, frame_counts=counts)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument("video", help="video: 입력 동영상 파일 (cv2.VideoCapture 로 읽을 수 있는 형식)")
+    parser.add_argument("--output", "-o", type=str, default="./output", help="output: 출력 디렉토리")
+    parser.add_argument("--name", "-n", type=str, default="video", help="name: 결과 폴더명 접두사")
+    parser.add_argument("--step", type=int, default=1, help="step: 몇 프레임마다 하나씩 검사할지")
+    parser.add_argument("--max-frames", type=int, default=None, help="max_frames: 읽을 최대 프레임 수")
+    parser.add_argument("--thumb-width", type=int, default=320, help="thumb_width: 움직임/선명도 계산용 썸네일 폭 (픽셀)")
+    parser.add_argument("--motion", type=float, default=3.0, help="motion: 연속 프레임 썸네일(밝기·대비 정규화)의 평균 차이가 이 값 이하면 정지 상태")
+    parser.add_argument("--min-stable", type=int, default=3, help="min_stable: 안정 페이지로 인정할 최소 정지 프레임 수")
+    parser.add_argument("--min-sharpness", type=float, default=100.0, help="min_sharpness: 라플라시안 분산이 이보다 작은(흐린) 프레임은 사용 안 함")
+    parser.add_argument("--dup", type=float, default=4.0, help="dup: 직전 출력 페이지와의 평균 차이가 이 값 이하면 중복 페이지로 건너뜀")
+    parser.add_argument("--track", type=float, default=1.0, help="track: 직전 디워핑 프레임 대비 페이지 이동량(썸네일 픽셀)이 이 값 이하면 params 재사용")
+    parser.add_argument("--min-response", type=float, default=0.2, help="min_response: 이동량 추정(위상 상관)의 최소 응답값, 낮으면 전체 과정을 다시 수행")
+
+    add_config_arguments(parser)
+    parser.set_defaults(debug=0, write="async")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    opt = vars(parse_args())
+    manifest = run_video(opt.pop("video"), **opt)
+    sys.exit(0 if manifest else 1)